@@ -0,0 +1,173 @@
+# Python imports
+import uuid
+from unittest import mock
+# Django Imports
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+# DRF Imports
+from rest_framework import status
+# Internal imports
+from .base import BaseArtistAPITestCase
+from Artists.models import Artist
+from Artists.serializers import VALIDATION_ERROR_CODE_ARTIST_NOT_FOUND, VALIDATION_ERROR_CODE_ARTIST_REPEATED
+from Artists.views import ArtistBulkView
+from Hits.models import Hit
+from RestHits.Utils.cache_helpers import DETAIL_EVICTED_MARKER, get_cache_generation, get_detail_cache_key
+from RestHits.Utils.local_cache import local_cache
+from RestHits.Utils.test_helpers import get_error_code
+
+
+class ArtistBulkCreateTests(BaseArtistAPITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.url = reverse('artists_bulk')
+        self.payload = [{'first_name': 'John', 'last_name': 'Lennon'}, {'first_name': 'Paul', 'last_name': 'McCartney'}]
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_returns_201(self):
+        response = self.client.post(self.url, data=self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([artist['last_name'] for artist in response.data], ['Lennon', 'McCartney'])
+        self.assertEqual(Artist.objects.filter(pk__in=[artist['id'] for artist in response.data]).count(), 2)
+
+    def test_bulk_create_by_not_superuser_returns_403(self):
+        self.client.force_authenticate(user=self.not_admin)
+        response = self.client.post(self.url, data=self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_create_runs_one_insert(self):
+        payload = [{'first_name': 'First', 'last_name': f'Artist {i}'} for i in range(100)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data=payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statements = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(len(statements), 1)
+
+    def test_invalid_item_creates_nothing(self):
+        payload = self.payload + [{'first_name': 'R', 'last_name': 'Starr'}]
+        response = self.client.post(self.url, data=payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[:2], [{}, {}])
+        self.assertEqual(list(response.data[2]), ['first_name'])
+        self.assertFalse(Artist.objects.exists())
+
+    def test_batch_size_is_limited(self):
+        with mock.patch.object(ArtistBulkView, 'max_batch_size', 1):
+            response = self.client.post(self.url, data=self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_caches_are_invalidated_once(self):
+        self.client.get(reverse('artists_list_create'))
+        generation = get_cache_generation('ArtistListCreateView')
+        with mock.patch('Artists.views.invalidate_artist_caches') as invalidate:
+            self.client.post(self.url, data=self.payload, format='json')
+        invalidate.assert_called_once()
+
+        self.client.post(self.url, data=[{'first_name': 'George', 'last_name': 'Harrison'}], format='json')
+        self.assertGreater(get_cache_generation('ArtistListCreateView'), generation)
+        response = self.client.get(reverse('artists_list_create'))
+        self.assertEqual(response.data['count'], 3)
+
+
+class ArtistBulkUpdateTests(BaseArtistAPITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.url = reverse('artists_bulk')
+        self.john = Artist.objects.create(first_name='John', last_name='Lennon')
+        self.paul = Artist.objects.create(first_name='Paul', last_name='McCartney')
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_update_returns_200(self):
+        payload = [{'id': self.paul.pk, 'first_name': 'James Paul'}, {'id': self.john.pk, 'last_name': 'Ono Lennon'}]
+        response = self.client.patch(self.url, data=payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([artist['id'] for artist in response.data], [str(self.paul.pk), str(self.john.pk)])
+        self.paul.refresh_from_db()
+        self.john.refresh_from_db()
+        self.assertEqual((self.paul.first_name, self.paul.last_name), ('James Paul', 'McCartney'))
+        self.assertEqual((self.john.first_name, self.john.last_name), ('John', 'Ono Lennon'))
+
+    def test_bulk_update_by_not_superuser_returns_403(self):
+        self.client.force_authenticate(user=self.not_admin)
+        response = self.client.patch(self.url, data=[{'id': self.john.pk, 'first_name': 'Johnny'}], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_only_changed_artists_and_fields_are_written(self):
+        updated_at = self.paul.updated_at
+        payload = [{'id': self.john.pk, 'first_name': 'Johnny', 'last_name': 'Lennon'},
+                   {'id': self.paul.pk, 'first_name': 'Paul'}]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, data=payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [update] = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertIn('"first_name"', update)
+        self.assertNotIn('"last_name"', update)
+        self.assertNotIn('"hit_count"', update)
+        self.paul.refresh_from_db()
+        self.assertEqual(self.paul.updated_at, updated_at)
+
+    def test_bulk_update_keeps_hit_count(self):
+        Hit.objects.create(artist=self.john, title='Imagine')
+        response = self.client.patch(self.url, data=[{'id': self.john.pk, 'first_name': 'Johnny'}], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.john.refresh_from_db()
+        self.assertEqual(self.john.hit_count, 1)
+
+    def test_errors_are_reported_per_item(self):
+        payload = [
+            {'id': self.john.pk, 'first_name': 'Johnny'},
+            {'id': uuid.uuid4(), 'first_name': 'Nobody'},
+            {'id': self.john.pk, 'last_name': 'Twice'},
+            {'first_name': 'No Id'},
+            {'id': self.paul.pk, 'first_name': 'P'},
+        ]
+        response = self.client.patch(self.url, data=payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data), 5)
+        # unknown and repeated ids are only checked once every item has valid fields
+        self.assertEqual(get_error_code(response.data[3]['id']), 'required')
+        self.assertEqual(list(response.data[4]), ['first_name'])
+
+        response = self.client.patch(self.url, data=payload[:3], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(get_error_code(response.data[1]['id']), VALIDATION_ERROR_CODE_ARTIST_NOT_FOUND)
+        self.assertEqual(get_error_code(response.data[2]['id']), VALIDATION_ERROR_CODE_ARTIST_REPEATED)
+        self.john.refresh_from_db()
+        self.assertEqual(self.john.first_name, 'John')
+
+    def test_caches_are_invalidated_once(self):
+        hit = Hit.objects.create(artist=self.john, title='Imagine')
+        self.client.get(reverse('hits_detail', args=[hit.pk]))
+        self.client.get(reverse('artists_detail', args=[self.paul.pk]))
+        generation = get_cache_generation('HitListCreateView')
+
+        payload = [{'id': self.john.pk, 'first_name': 'Johnny'}, {'id': self.paul.pk, 'first_name': 'Paulie'}]
+        response = self.client.patch(self.url, data=payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(get_cache_generation('HitListCreateView'), generation)
+        self.assertEqual(cache.get(get_detail_cache_key('HitDetailView', hit.pk))[0], DETAIL_EVICTED_MARKER)
+        self.assertEqual(cache.get(get_detail_cache_key('ArtistDetailView', self.paul.pk))[0], DETAIL_EVICTED_MARKER)
+        response = self.client.get(reverse('hits_detail', args=[hit.pk]))
+        self.assertEqual(response.data['artist']['first_name'], 'Johnny')
+
+    def test_unchanged_batch_invalidates_nothing(self):
+        with mock.patch('Artists.views.invalidate_artist_caches') as invalidate:
+            response = self.client.patch(self.url, data=[{'id': self.john.pk, 'first_name': 'John'}], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        invalidate.assert_not_called()
@@ -0,0 +1,71 @@
+# Python imports
+from io import StringIO
+# Django Imports
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+# Internal imports
+from .base import BaseArtistAPITestCase
+from Artists.models import Artist
+from Hits.models import Hit
+from RestHits.Utils.local_cache import local_cache
+
+
+class ArtistHitCountTests(BaseArtistAPITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.artist = Artist.objects.create(first_name='Freddie', last_name='Mercury')
+        self.other = Artist.objects.create(first_name='Alice', last_name='Cooper')
+
+    def assertHitCounts(self, artist_count, other_count):
+        self.artist.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.artist.hit_count, self.other.hit_count), (artist_count, other_count))
+
+    def test_create_and_delete_update_count(self):
+        hit = Hit.objects.create(artist=self.artist, title='Bohemian Rhapsody')
+        Hit.objects.create(artist=self.artist, title='Somebody to Love')
+        self.assertHitCounts(2, 0)
+
+        hit.delete()
+        self.assertHitCounts(1, 0)
+
+    def test_reassignment_moves_count(self):
+        hit = Hit.objects.create(artist=self.artist, title='Poison')
+        hit.artist = self.other
+        hit.save()
+        self.assertHitCounts(0, 1)
+
+    def test_bulk_operations_update_count(self):
+        Hit.objects.bulk_create([Hit(artist=self.artist, title=f'Track {i}') for i in range(5)])
+        self.assertHitCounts(5, 0)
+
+        Hit.objects.filter(title__in=['Track 0', 'Track 1']).update(artist=self.other)
+        self.assertHitCounts(3, 2)
+
+        Hit.objects.filter(artist=self.artist).delete()
+        self.assertHitCounts(0, 2)
+
+    def test_artist_save_keeps_count(self):
+        stale = Artist.objects.get(pk=self.artist.pk)
+        Hit.objects.create(artist=self.artist, title='Bohemian Rhapsody')
+
+        stale.last_name = 'Bulsara'
+        stale.save()
+        self.assertHitCounts(1, 0)
+        self.assertEqual(self.artist.last_name, 'Bulsara')
+
+    def test_recompute_repairs_drift(self):
+        Hit.objects.create(artist=self.artist, title='Bohemian Rhapsody')
+        Artist.objects.filter(pk=self.artist.pk).update(hit_count=7)
+        Artist.objects.filter(pk=self.other.pk).update(hit_count=3)
+        self.client.get(reverse('hits_by_artist'))
+
+        out = StringIO()
+        call_command('recompute_hit_counts', stdout=out)
+
+        self.assertIn('2 artist(s) repaired', out.getvalue())
+        self.assertHitCounts(1, 0)
+        response = self.client.get(reverse('hits_by_artist'))
+        self.assertEqual([artist['hit_count'] for artist in response.json()['results']], [1, 0])
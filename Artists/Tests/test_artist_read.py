@@ -2,18 +2,22 @@
 import uuid
 # Django Imports
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 # DRF Imports
 from rest_framework import status
 # Internal imports
 from .base import BaseArtistAPITestCase
 from Artists.models import Artist
+from RestHits.Utils.local_cache import local_cache
 
 User = get_user_model()
 
 
 class ArtistDetailViewTest(BaseArtistAPITestCase):
     def setUp(self):
+        cache.clear()
+        local_cache.clear()
         self.artist = Artist.objects.create(**self.payload)
         self.url = reverse('artists_detail', kwargs={'pk': self.artist.pk})
 
@@ -37,6 +41,8 @@ class ArtistDetailViewTest(BaseArtistAPITestCase):
 
 class ArtistListViewTest(BaseArtistAPITestCase):
     def setUp(self):
+        cache.clear()
+        local_cache.clear()
         self.url = reverse('artists_list_create')
         for i in range(10):
             Artist.objects.create(first_name=f'Name {i}', last_name=f'Last Name {i}')
@@ -52,6 +58,8 @@ class ArtistListViewTest(BaseArtistAPITestCase):
 
 class ArtistsPaginationFilterOrderingTests(BaseArtistAPITestCase):
     def setUp(self):
+        cache.clear()
+        local_cache.clear()
         self.url = reverse('artists_list_create')
         self._create_bulk_artists()
         self._create_named_artists()
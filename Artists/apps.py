@@ -7,3 +7,5 @@ class ArtistsConfig(AppConfig):
 
     def ready(self):
         import RestHits.Signals.signals
+        # views register their cache dependencies on import, signals rely on that registry
+        import Artists.views
@@ -3,7 +3,8 @@ from drf_spectacular.utils import (
     extend_schema, extend_schema_view,
     OpenApiParameter, OpenApiTypes
 )  # Internal imports
-from .serializers import (ArtistDetailSerializer, ArtistCreateSerializer, ArtistListSerializer)
+from .serializers import (ArtistDetailSerializer, ArtistCreateSerializer, ArtistListSerializer,
+                          ArtistBulkCreateSerializer, ArtistBulkUpdateSerializer)
 
 ARTIST_FILTER_PARAMS = [
     OpenApiParameter(
@@ -78,3 +79,31 @@ ARTIST_DETAIL_SCHEMA = extend_schema_view(
         tags=['Artists'],
     ),
 )
+
+ARTIST_BULK_SCHEMA = extend_schema_view(
+    post=extend_schema(
+        summary="Create artists in bulk",
+        description=(
+            "Creates up to 1000 artists in one request (admin only).\n"
+            "Request body: a list of `first_name`, `last_name` objects.\n"
+            "If any item is invalid, nothing is created and the 400 response lists "
+            "the errors of every item, in the order of the request (`{}` for valid items)."
+        ),
+        request=ArtistBulkCreateSerializer(many=True),
+        responses={201: ArtistBulkCreateSerializer(many=True)},
+        tags=['Artists'],
+    ),
+    patch=extend_schema(
+        summary="Partial update artists in bulk",
+        description=(
+            "Modifies up to 1000 artists in one request (admin only).\n"
+            "Request body: a list of objects with the `id` of the artist and the fields to change. "
+            "Returns the artists in the order of the request.\n"
+            "If any item is invalid, nothing is updated and the 400 response lists "
+            "the errors of every item, in the order of the request (`{}` for valid items)."
+        ),
+        request=ArtistBulkUpdateSerializer(many=True, partial=True),
+        responses={200: ArtistBulkUpdateSerializer(many=True)},
+        tags=['Artists'],
+    ),
+)
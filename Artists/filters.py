@@ -2,5 +2,6 @@
 import django_filters
 
 class ArtistFilter(django_filters.FilterSet):
+    # `icontains` filters are served by the trigram indexes of Artist.first_name and Artist.last_name
     first_name = django_filters.CharFilter(field_name='first_name', lookup_expr='icontains')
     last_name = django_filters.CharFilter(field_name='last_name', lookup_expr='icontains')
\ No newline at end of file
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-17 20:03
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # indexes are built concurrently, so writes are not blocked while big tables are indexed
+    atomic = False
+
+    dependencies = [
+        ('Artists', '0003_artist_artists_art_first_n_595f32_idx_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='artist',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('first_name', output_field=models.TextField())), name='gin_trgm_ops'), name='Artists_artist_first_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='artist',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('last_name', output_field=models.TextField())), name='gin_trgm_ops'), name='Artists_artist_last_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.1 on 2026-10-17 20:11
+
+from django.db import migrations, models
+
+# Statement-level triggers with transition tables: a bulk insert, delete or reassignment
+# of hits updates each affected artist once, with the sum of its changes.
+CREATE_HIT_COUNT_TRIGGERS = '''
+CREATE FUNCTION artist_hit_count_on_hit_insert() RETURNS trigger AS $$
+BEGIN
+    UPDATE "Artists_artist" artist SET hit_count = artist.hit_count + delta.hits
+    FROM (SELECT artist_id, count(*) AS hits FROM new_hits GROUP BY artist_id) delta
+    WHERE artist.id = delta.artist_id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION artist_hit_count_on_hit_delete() RETURNS trigger AS $$
+BEGIN
+    UPDATE "Artists_artist" artist SET hit_count = artist.hit_count - delta.hits
+    FROM (SELECT artist_id, count(*) AS hits FROM old_hits GROUP BY artist_id) delta
+    WHERE artist.id = delta.artist_id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION artist_hit_count_on_hit_update() RETURNS trigger AS $$
+BEGIN
+    UPDATE "Artists_artist" artist SET hit_count = artist.hit_count + delta.hits
+    FROM (
+        SELECT artist_id, sum(hits) AS hits FROM (
+            SELECT new_hits.artist_id, 1 AS hits
+            FROM new_hits JOIN old_hits USING (id) WHERE new_hits.artist_id <> old_hits.artist_id
+            UNION ALL
+            SELECT old_hits.artist_id, -1 AS hits
+            FROM new_hits JOIN old_hits USING (id) WHERE new_hits.artist_id <> old_hits.artist_id
+        ) moves
+        GROUP BY artist_id
+    ) delta
+    WHERE artist.id = delta.artist_id AND delta.hits <> 0;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER artist_hit_count_on_hit_insert
+    AFTER INSERT ON "Hits_hit" REFERENCING NEW TABLE AS new_hits
+    FOR EACH STATEMENT EXECUTE FUNCTION artist_hit_count_on_hit_insert();
+
+CREATE TRIGGER artist_hit_count_on_hit_delete
+    AFTER DELETE ON "Hits_hit" REFERENCING OLD TABLE AS old_hits
+    FOR EACH STATEMENT EXECUTE FUNCTION artist_hit_count_on_hit_delete();
+
+-- transition tables cannot be combined with `UPDATE OF artist_id`, moves are found by the join
+CREATE TRIGGER artist_hit_count_on_hit_update
+    AFTER UPDATE ON "Hits_hit" REFERENCING OLD TABLE AS old_hits NEW TABLE AS new_hits
+    FOR EACH STATEMENT EXECUTE FUNCTION artist_hit_count_on_hit_update();
+
+UPDATE "Artists_artist" artist SET hit_count = counts.hits
+FROM (SELECT artist_id, count(*) AS hits FROM "Hits_hit" GROUP BY artist_id) counts
+WHERE artist.id = counts.artist_id;
+'''
+
+DROP_HIT_COUNT_TRIGGERS = '''
+DROP TRIGGER artist_hit_count_on_hit_update ON "Hits_hit";
+DROP TRIGGER artist_hit_count_on_hit_delete ON "Hits_hit";
+DROP TRIGGER artist_hit_count_on_hit_insert ON "Hits_hit";
+DROP FUNCTION artist_hit_count_on_hit_update();
+DROP FUNCTION artist_hit_count_on_hit_delete();
+DROP FUNCTION artist_hit_count_on_hit_insert();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Artists', '0004_artist_trigram_indexes'),
+        ('Hits', '0005_hit_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artist',
+            name='hit_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        # count existing hits before indexing the column
+        migrations.RunSQL(CREATE_HIT_COUNT_TRIGGERS, DROP_HIT_COUNT_TRIGGERS),
+        migrations.AddIndex(
+            model_name='artist',
+            index=models.Index(fields=['-hit_count', 'last_name', 'first_name'], name='Artists_art_hit_cou_3c763a_idx'),
+        ),
+    ]
@@ -3,6 +3,8 @@ import uuid
 # Django imports
 from django.db import models
 from django.core.validators import MinLengthValidator, MaxLengthValidator
+# Internal imports
+from RestHits.Utils.index_helpers import icontains_trigram_index
 
 
 class Artist(models.Model):
@@ -11,6 +13,8 @@ class Artist(models.Model):
     last_name = models.CharField(max_length=255, validators=[MinLengthValidator(2), MaxLengthValidator(255)])
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Number of hits, maintained by database triggers on Hits_hit (see Artists migration 0005_artist_hit_count)
+    hit_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['first_name', 'last_name']
@@ -18,7 +22,31 @@ class Artist(models.Model):
             models.Index(fields=['first_name']),
             models.Index(fields=['last_name']),
             models.Index(fields=['first_name', 'last_name']),
+            # `icontains` filters of ArtistFilter and HitFilter
+            icontains_trigram_index('first_name', name='Artists_artist_first_trgm_idx'),
+            icontains_trigram_index('last_name', name='Artists_artist_last_trgm_idx'),
+            # leaderboard of HitsByArtistView
+            models.Index(fields=['-hit_count', 'last_name', 'first_name']),
         ]
 
+    def save(self, *args, **kwargs):
+        """
+        Save the artist without writing `hit_count` back.
+
+        The problem:
+            A plain save() updates every column, so an instance loaded before a hit
+            was created would overwrite the count kept by the database with its stale copy.
+        The solution:
+            Updates of existing rows list their fields explicitly, without `hit_count`.
+            Use `recompute_hit_counts` to repair the counts.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname != 'hit_count' and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
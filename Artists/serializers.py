@@ -1,7 +1,15 @@
+# Django imports
+from django.utils import timezone
 # DRF Imports
 from rest_framework import serializers
 # Internal imports
 from .models import Artist
+from RestHits.Utils.row_serializers import RowSerializer
+
+# Validation error codes
+VALIDATION_ERROR_CODE_ARTIST_NOT_FOUND = 'artist_not_found'
+VALIDATION_ERROR_CODE_ARTIST_REPEATED = 'artist_repeated_in_batch'
+
 
 class ArtistCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,6 +17,92 @@ class ArtistCreateSerializer(serializers.ModelSerializer):
         fields = ['id', 'first_name', 'last_name']
 
 
+class ArtistBulkCreateListSerializer(serializers.ListSerializer):
+    """
+    Insert a batch of artists with a single `bulk_create` (see `ArtistBulkView`).
+    """
+
+    def create(self, validated_data):
+        return Artist.objects.bulk_create([Artist(**item) for item in validated_data])
+
+
+class ArtistBulkCreateSerializer(ArtistCreateSerializer):
+    class Meta(ArtistCreateSerializer.Meta):
+        list_serializer_class = ArtistBulkCreateListSerializer
+
+
+class ArtistBulkUpdateListSerializer(serializers.ListSerializer):
+    """
+    Partially update a batch of artists with one SELECT and one UPDATE.
+
+    Pass the queryset to update from as `instance` (e.g. with `select_for_update()`).
+    Once the fields of every item are valid, the artists are resolved in one query,
+    unknown and repeated ids are reported per item. `bulk_update` then writes only
+    the artists whose values change, and only the fields that change.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+
+        self.artists = self.instance.in_bulk([item['id'] for item in items])
+        seen = set()
+        errors = []
+        for item in items:
+            if item['id'] not in self.artists:
+                errors.append({'id': [serializers.ErrorDetail(
+                    f'Artist with id {item["id"]} does not exist.', code=VALIDATION_ERROR_CODE_ARTIST_NOT_FOUND
+                )]})
+            elif item['id'] in seen:
+                errors.append({'id': [serializers.ErrorDetail(
+                    'Artist appears more than once in the batch.', code=VALIDATION_ERROR_CODE_ARTIST_REPEATED
+                )]})
+            else:
+                errors.append({})
+            seen.add(item['id'])
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def update(self, instance, validated_data):
+        updated_at = timezone.now()
+        changed_fields = set()
+        # artists with at least one new value, see `ArtistBulkView`
+        self.changed_artists = []
+        for item in validated_data:
+            artist = self.artists[item['id']]
+            fields = [name for name, value in item.items() if name != 'id' and getattr(artist, name) != value]
+            if fields:
+                for name in fields:
+                    setattr(artist, name, item[name])
+                # `auto_now` is only applied by save()
+                artist.updated_at = updated_at
+                changed_fields.update(fields)
+                self.changed_artists.append(artist)
+        if self.changed_artists:
+            Artist.objects.bulk_update(self.changed_artists, [*sorted(changed_fields), 'updated_at'])
+        return [self.artists[item['id']] for item in validated_data]
+
+
+class ArtistBulkUpdateSerializer(serializers.ModelSerializer):
+    """
+    Item of a bulk partial update: `id` and the fields to change (use with `many=True, partial=True`).
+    """
+    id = serializers.UUIDField()
+
+    class Meta:
+        model = Artist
+        fields = ['id', 'first_name', 'last_name', 'updated_at']
+        read_only_fields = ['updated_at']
+        list_serializer_class = ArtistBulkUpdateListSerializer
+
+    def validate(self, data):
+        # `partial` lifts `required` from every field
+        if 'id' not in data:
+            raise serializers.ValidationError({'id': [self.fields['id'].error_messages['required']]},
+                                              code='required')
+        return data
+
+
 class ArtistListSerializer(serializers.ModelSerializer):
     artist_url = serializers.HyperlinkedIdentityField(view_name='artists_detail')
 
@@ -17,8 +111,25 @@ class ArtistListSerializer(serializers.ModelSerializer):
         fields = ['id', 'first_name', 'last_name', 'artist_url']
 
 
+class ArtistListRowSerializer(RowSerializer):
+    """
+    `ArtistListSerializer` output built from `.values()` rows.
+    """
+    values_fields = ['id', 'first_name', 'last_name']
+    url_templates = {'artist_url': 'artists_detail'}
+
+    def to_representation(self, row):
+        return {
+            'id': str(row['id']),
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'artist_url': self.urls['artist_url'](row['id']),
+        }
+
+
 class ArtistDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Artist
-        fields = '__all__'
+        # `hit_count` changes with every hit write, which does not invalidate cached artist details
+        exclude = ['hit_count']
         read_only_fields = ['created_at', 'updated_at']
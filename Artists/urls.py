@@ -1,9 +1,12 @@
 # Django imports
 from django.urls import path
 # Internal imports
-from .views import (ArtistListCreateView, ArtistDetailView)
+from .views import (ArtistListCreateView, ArtistDetailView, ArtistBulkView)
+from Hits.views import ArtistHitsView
 
 urlpatterns = [
     path('', ArtistListCreateView.as_view(), name='artists_list_create'),
+    path('bulk/', ArtistBulkView.as_view(), name='artists_bulk'),
     path('<uuid:pk>/', ArtistDetailView.as_view(), name='artists_detail'),
+    path('<uuid:pk>/hits/', ArtistHitsView.as_view(), name='artists_hits'),
 ]
\ No newline at end of file
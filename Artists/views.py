@@ -1,31 +1,39 @@
+# Django imports
+from django.db import transaction
 # DRF imports
-from rest_framework import generics
+from rest_framework import generics, status
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 # Internal imports
 from .models import Artist
-from .serializers import (ArtistListSerializer, ArtistDetailSerializer, ArtistCreateSerializer)
-from .artists_spectacular_extensions import (ARTIST_LIST_CREATE_SCHEMA, ARTIST_DETAIL_SCHEMA)
+from .serializers import (ArtistListSerializer, ArtistDetailSerializer, ArtistCreateSerializer,
+                          ArtistListRowSerializer, ArtistBulkCreateSerializer, ArtistBulkUpdateSerializer)
+from .artists_spectacular_extensions import (ARTIST_LIST_CREATE_SCHEMA, ARTIST_DETAIL_SCHEMA, ARTIST_BULK_SCHEMA)
 from .filters import ArtistFilter
-from RestHits.Utils.pagination import DefaultPagination
+from RestHits.Utils.pagination import CachedCountPagination
 from RestHits.Utils.mixins import PermitGetAdminModifyMixin
-from RestHits.Utils.mixins import CacheListMixin
+from RestHits.Utils.mixins import CacheListMixin, CacheDetailMixin, ValuesListMixin
 from RestHits.Utils.view_helpers import swagger_safe_queryset
+from RestHits.Utils.cache_helpers import invalidate_artist_caches
 
 
 @ARTIST_LIST_CREATE_SCHEMA
-class ArtistListCreateView(CacheListMixin, PermitGetAdminModifyMixin, generics.ListCreateAPIView):
+class ArtistListCreateView(CacheListMixin, ValuesListMixin, PermitGetAdminModifyMixin, generics.ListCreateAPIView):
     """
     GET: List 20 artists with filtering and ordering.
     POST: Create a new artist (admin only).
     """
     queryset = Artist.objects.none()
+    row_serializer_class = ArtistListRowSerializer
     serializer_class = ArtistListSerializer
-    pagination_class = DefaultPagination
+    pagination_class = CachedCountPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = ArtistFilter
     ordering_fields = ['first_name', 'last_name', 'created_at']
     ordering = ['first_name', 'last_name']
+    cache_dependencies = [Artist]
+    query_budget = {'GET': 2, 'POST': 1}
 
     @swagger_safe_queryset
     def get_queryset(self):
@@ -38,7 +46,7 @@ class ArtistListCreateView(CacheListMixin, PermitGetAdminModifyMixin, generics.L
 
 
 @ARTIST_DETAIL_SCHEMA
-class ArtistDetailView(PermitGetAdminModifyMixin, generics.RetrieveUpdateDestroyAPIView):
+class ArtistDetailView(CacheDetailMixin, PermitGetAdminModifyMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET: Retrieve artist details.
     PUT/PATCH: Update artist (admin only).
@@ -46,7 +54,59 @@ class ArtistDetailView(PermitGetAdminModifyMixin, generics.RetrieveUpdateDestroy
     """
     serializer_class = ArtistDetailSerializer
     queryset = Artist.objects.none()
+    # updates also list the artist's hits to evict their cached details,
+    # deletes collect and delete the cascaded hits
+    query_budget = {'GET': 1, 'PUT': 3, 'PATCH': 3, 'DELETE': 4}
 
     @swagger_safe_queryset
     def get_queryset(self):
         return Artist.objects.all()
+
+
+@ARTIST_BULK_SCHEMA
+class ArtistBulkView(PermitGetAdminModifyMixin, generics.GenericAPIView):
+    """
+    POST: Create a batch of artists (admin only).
+    PATCH: Partially update a batch of artists, identified by `id` (admin only).
+
+    The problem:
+        Onboarding a roster artist by artist costs a request, a write and an invalidation
+        of every cache reading artists per artist.
+    The solution:
+        A batch is validated and written in one transaction, all or nothing, with
+        `bulk_create` / `bulk_update` (see the `ArtistBulk*` serializers). Bulk writes send no
+        signals, so the caches are invalidated here, once per batch.
+    """
+    queryset = Artist.objects.none()
+    max_batch_size = 1000
+    # INSERT; PATCH: locking the artists, UPDATE and the hits whose cached details embed them
+    query_budget = {'POST': 1, 'PATCH': 3}
+
+    def get_serializer_class(self):
+        if self.request.method == 'PATCH':
+            return ArtistBulkUpdateSerializer
+        return ArtistBulkCreateSerializer
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(many=True, max_length=self.max_batch_size)
+        return super().get_serializer(*args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        with transaction.atomic():
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            artists = serializer.save()
+        invalidate_artist_caches([artist.pk for artist in artists], updated=False)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def patch(self, request, *args, **kwargs):
+        with transaction.atomic():
+            # locked in key order, so that concurrent batches cannot deadlock
+            artists = Artist.objects.select_for_update().order_by('pk')
+            serializer = self.get_serializer(artists, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        changed_pks = [artist.pk for artist in serializer.changed_artists]
+        if changed_pks:
+            invalidate_artist_caches(changed_pks, updated=True)
+        return Response(serializer.data)
@@ -0,0 +1,112 @@
+# Python imports
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+# Django Imports
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+# Internal imports
+from Artists.models import Artist
+from Hits.catalog import copy_catalog
+from Hits.models import Hit
+from RestHits.Utils.cache_helpers import get_cache_generation
+from RestHits.Utils.local_cache import local_cache
+
+
+class CopyCatalogTests(TestCase):
+    def setUp(self):
+        self.queen = Artist.objects.create(first_name='Freddie', last_name='Mercury')
+        Hit.objects.create(artist=self.queen, title='Bohemian Rhapsody')
+        self.records = [
+            ('Freddie', 'Mercury', 'Bohemian Rhapsody'),
+            ('Freddie', 'Mercury', 'Love of My Life'),
+            ('David', 'Bowie', 'Heroes'),
+            ('David', 'Bowie', 'Heroes'),
+        ]
+
+    def test_merges_missing_rows(self):
+        progress = []
+        result = copy_catalog(self.records, on_progress=progress.append, progress_every=2)
+
+        bowie = Artist.objects.get(first_name='David', last_name='Bowie')
+        self.assertEqual((result.artists_inserted, result.hits_inserted, result.hits_unchanged), (1, 2, 2))
+        self.assertEqual(result.artist_ids, {self.queen.pk, bowie.pk})
+        self.assertEqual(progress, [2, 4])
+        self.assertEqual(list(bowie.hit.values_list('title', flat=True)), ['Heroes'])
+        self.queen.refresh_from_db()
+        self.assertEqual(self.queen.hit_count, 2)
+
+    def test_is_idempotent(self):
+        copy_catalog(self.records)
+        result = copy_catalog(self.records)
+
+        self.assertEqual((result.artists_inserted, result.hits_inserted, result.hits_unchanged), (0, 0, 4))
+        self.assertEqual(Hit.objects.count(), 3)
+
+    def test_name_shared_by_several_artists_resolves_to_oldest(self):
+        Artist.objects.create(first_name='Freddie', last_name='Mercury')
+        copy_catalog([('Freddie', 'Mercury', 'Love of My Life')])
+
+        self.assertTrue(self.queen.hit.filter(title='Love of My Life').exists())
+
+
+class ImportCatalogCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = Path(self.directory.name) / name
+        path.write_text(content, encoding='utf-8')
+        return str(path)
+
+    def import_catalog(self, *args):
+        out = StringIO()
+        call_command('import_catalog', *args, stdout=out)
+        return out.getvalue()
+
+    def test_imports_csv(self):
+        path = self.write('catalog.csv', 'title,first_name,last_name\n'
+                                         'Heroes,David,Bowie\n'
+                                         '" Starman ",David,Bowie\n'
+                                         'X,David,Bowie\n')
+        output = self.import_catalog(path)
+
+        self.assertEqual(sorted(Hit.objects.values_list('title', flat=True)), ['Heroes', 'Starman'])
+        self.assertIn('Skipped 1 invalid record(s).', output)
+        self.assertIn('Artists inserted: 1, hits inserted: 2, unchanged: 0.', output)
+
+    def test_imports_ndjson(self):
+        lines = [
+            json.dumps({'first_name': 'David', 'last_name': 'Bowie', 'title': 'Heroes'}),
+            '',
+            json.dumps({'first_name': 'David', 'last_name': 'Bowie'}),
+            'not json',
+            json.dumps(['David', 'Bowie', 'Starman']),
+        ]
+        output = self.import_catalog(self.write('catalog.data', '\n'.join(lines)), '--format', 'ndjson')
+
+        self.assertEqual(list(Hit.objects.values_list('title', flat=True)), ['Heroes'])
+        self.assertIn('Skipped 3 invalid record(s).', output)
+
+    def test_invalidates_caches_once(self):
+        artist = Artist.objects.create(first_name='David', last_name='Bowie')
+        namespaces = ['ArtistListCreateView', 'HitListCreateView', 'ArtistHitsView']
+        generations = [get_cache_generation(namespace) for namespace in namespaces]
+
+        self.import_catalog(self.write('catalog.csv', 'first_name,last_name,title\nDavid,Bowie,Heroes\n'))
+
+        for namespace, generation in zip(namespaces, generations):
+            self.assertGreater(get_cache_generation(namespace), generation)
+
+    def test_rejects_unknown_format_and_missing_columns(self):
+        with self.assertRaisesMessage(CommandError, 'use --format'):
+            self.import_catalog(self.write('catalog.txt', ''))
+        with self.assertRaisesMessage(CommandError, 'missing: title'):
+            self.import_catalog(self.write('catalog.csv', 'first_name,last_name\nDavid,Bowie\n'))
+        with self.assertRaisesMessage(CommandError, 'Cannot open'):
+            self.import_catalog(str(Path(self.directory.name) / 'missing.csv'))
@@ -0,0 +1,127 @@
+# Python imports
+import uuid
+from unittest import mock
+# Django Imports
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+# DRF Imports
+from rest_framework import status
+# Internal imports
+from Hits.validators import (VALIDATION_ERROR_CODE_HIT_WITH_GIVEN_TITLE_ALREADY_EXIST_FOR_ARTIST,
+                             VALIDATION_ERROR_CODE_ARTIST_NOT_FOUND)
+from Hits.views import HitBulkCreateView
+from .base import BaseHitAPITestCase
+from Artists.models import Artist
+from RestHits.Utils.cache_helpers import get_artist_hits_namespace, get_cache_generation
+from RestHits.Utils.local_cache import local_cache
+from RestHits.Utils.test_helpers import get_error_code
+from Hits.models import Hit
+
+
+class HitBulkCreateTests(BaseHitAPITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.url = reverse('hits_bulk_create')
+        self.artist = Artist.objects.create(first_name='John', last_name='Doe')
+        self.other_artist = Artist.objects.create(first_name='Jane', last_name='Smith')
+        self.payload = [
+            {'artist_id': self.artist.pk, 'title': 'First Hit'},
+            {'artist_id': self.artist.pk, 'title': 'Second Hit'},
+            {'artist_id': self.other_artist.pk, 'title': 'First Hit'},
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_returns_201(self):
+        response = self.client.post(self.url, data=self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([hit['title'] for hit in response.data], ['First Hit', 'Second Hit', 'First Hit'])
+        self.assertEqual(Hit.objects.filter(pk__in=[hit['id'] for hit in response.data]).count(), 3)
+        self.artist.refresh_from_db()
+        self.assertEqual(self.artist.hit_count, 2)
+
+    def test_bulk_create_by_not_superuser_returns_403(self):
+        self.client.force_authenticate(user=self.not_admin)
+        response = self.client.post(self.url, data=self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_queries_do_not_depend_on_batch_size(self):
+        payload = [{'artist_id': self.artist.pk, 'title': f'Hit {i}'} for i in range(100)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data=payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statements = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(len(statements), 3)
+
+    def test_errors_are_reported_per_item(self):
+        Hit.objects.create(artist=self.artist, title='Taken')
+        payload = [
+            {'artist_id': self.artist.pk, 'title': 'Fine'},
+            {'artist_id': uuid.uuid4(), 'title': 'No Artist'},
+            {'artist_id': self.artist.pk, 'title': 'Taken'},
+            {'artist_id': self.other_artist.pk, 'title': 'Twice'},
+            {'artist_id': self.other_artist.pk, 'title': 'Twice'},
+        ]
+        response = self.client.post(self.url, data=payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(get_error_code(response.data[1]['artist']), VALIDATION_ERROR_CODE_ARTIST_NOT_FOUND)
+        self.assertEqual(get_error_code(response.data[2]['hit']),
+                         VALIDATION_ERROR_CODE_HIT_WITH_GIVEN_TITLE_ALREADY_EXIST_FOR_ARTIST)
+        self.assertEqual(response.data[3], {})
+        self.assertEqual(get_error_code(response.data[4]['hit']),
+                         VALIDATION_ERROR_CODE_HIT_WITH_GIVEN_TITLE_ALREADY_EXIST_FOR_ARTIST)
+        # nothing of an invalid batch is created
+        self.assertFalse(Hit.objects.filter(title__in=['Fine', 'Twice']).exists())
+
+    def test_field_errors_are_reported_per_item(self):
+        payload = [{'artist_id': self.artist.pk, 'title': 'Fine'}, {'artist_id': 'not-a-uuid', 'title': 'x'}]
+        response = self.client.post(self.url, data=payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(set(response.data[1]), {'artist_id', 'title'})
+
+    def test_payload_must_be_a_list(self):
+        response = self.client.post(self.url, data=self.payload[0], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_size_is_limited(self):
+        with mock.patch.object(HitBulkCreateView, 'max_batch_size', 2):
+            response = self.client.post(self.url, data=self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_error_code(response.data['non_field_errors']), 'max_length')
+
+    def test_caches_are_invalidated_once(self):
+        namespaces = ['HitListCreateView', 'ArtistHitsView']
+        generations = [get_cache_generation(namespace) for namespace in namespaces]
+        with mock.patch('RestHits.Utils.cache_helpers.bump_cache_generations') as bump:
+            self.client.post(self.url, data=self.payload, format='json')
+        bump.assert_called_once()
+        self.assertNotIn(get_artist_hits_namespace(self.artist.pk), bump.call_args.args[0])
+
+        self.client.post(self.url, data=[{'artist_id': self.artist.pk, 'title': 'Third Hit'},
+                                          {'artist_id': self.other_artist.pk, 'title': 'Second Hit'}], format='json')
+        for namespace, generation in zip(namespaces, generations):
+            self.assertGreater(get_cache_generation(namespace), generation)
+
+    def test_artist_hits_show_created_hits(self):
+        url = reverse('artists_hits', kwargs={'pk': self.artist.pk})
+        self.client.get(url)
+        self.client.post(self.url, data=self.payload, format='json')
+        titles = [hit['title'] for hit in self.client.get(url).json()['results']]
+        self.assertIn('Second Hit', titles)
+
+    def test_list_shows_created_hits(self):
+        self.client.get(reverse('hits_list_create'))
+        self.client.post(self.url, data=self.payload, format='json')
+
+        response = self.client.get(reverse('hits_list_create'))
+        self.assertEqual(response.data['count'], 3)
@@ -2,6 +2,8 @@
 import uuid
 from datetime import timedelta
 # Django Imports
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
@@ -69,6 +71,20 @@ class HitCreateTests(BaseHitAPITestCase):
         self.assertEqual(get_error_code(error_detail),
                          VALIDATION_ERROR_CODE_HIT_WITH_GIVEN_TITLE_ALREADY_EXIST_FOR_ARTIST)
 
+    def test_duplicate_check_runs_no_extra_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data=self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # the artist lookup and the INSERT, no existence check of the title
+        hit_queries = [query['sql'] for query in queries if '"Hits_hit"' in query['sql']]
+        self.assertEqual(len(hit_queries), 1)
+        self.assertTrue(hit_queries[0].startswith('INSERT'))
+
+    def test_duplicate_is_rejected_by_database(self):
+        Hit.objects.create(artist=self.artist, title='Hit Title')
+        with self.assertRaises(IntegrityError):
+            Hit.objects.create(artist=self.artist, title='Hit Title')
+
     def test_same_title_different_artist_succeeds(self):
         other_artist = Artist.objects.create(first_name="Jane", last_name="Smith")
         payload_1 = {'artist_id': self.artist.pk, 'title': 'Same Title'}
@@ -1,7 +1,12 @@
 # Python imports
+import csv
+import io
+import json
+from base64 import urlsafe_b64encode
 from datetime import timedelta
 # Django Imports
 from django.core.cache import cache
+from django.db import connection, transaction
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
@@ -10,11 +15,17 @@ from rest_framework import status
 # Internal imports
 from .base import BaseHitAPITestCase
 from Artists.models import Artist
+from Hits.filters import HitFilter
 from Hits.models import Hit
+from RestHits.Utils.cache_helpers import get_artist_hits_namespace, get_cache_generation
+from RestHits.Utils.local_cache import local_cache
+from RestHits.Tests.test_cache_and_signals import cached_entry_keys
 
 
 class HitDetailViewTest(BaseHitAPITestCase):
     def setUp(self):
+        cache.clear()
+        local_cache.clear()
         self.artist = Artist.objects.create(first_name='John', last_name='Doe')
         self.hit = Hit.objects.create(artist=self.artist, title='Test Hit')
         self.url = reverse('hits_detail', args=[self.hit.pk])
@@ -32,6 +43,8 @@ class HitDetailViewTest(BaseHitAPITestCase):
 
 class HitListViewTest(BaseHitAPITestCase):
     def setUp(self):
+        cache.clear()
+        local_cache.clear()
         self.url = reverse('hits_list_create')
         self.artist = Artist.objects.create(first_name="John", last_name="Doe")
         self.hit = Hit.objects.create(title="Sample Hit", artist=self.artist)
@@ -54,6 +67,7 @@ class HitListViewTest(BaseHitAPITestCase):
 class HitsPaginationFilterOrderingTests(BaseHitAPITestCase):
     def setUp(self):
         cache.clear()
+        local_cache.clear()
         self.url = reverse('hits_list_create')
         self._create_bulk_hits()
         self._create_named_hits()
@@ -159,8 +173,82 @@ class HitsPaginationFilterOrderingTests(BaseHitAPITestCase):
         self.assertEqual(returned_last_names[:3], expected)
 
 
+class HitsCursorPaginationTests(BaseHitAPITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.url = reverse('hits_list_create')
+        now = timezone.now()
+        artists = [
+            Artist.objects.create(first_name='Alpha' if n % 2 else 'Beta', last_name=f'Delta {n}') for n in range(7)
+        ]
+        for i in range(33):
+            # equal timestamps, titles (of different artists) and first names force the `id` tiebreaker into play
+            Hit.objects.create(
+                title=f'Title {i % 5}',
+                artist=artists[i // 5],
+                created_at=now - timedelta(minutes=i // 3),
+            )
+
+    def _walk(self, params):
+        ids = []
+        response = self.client.get(self.url, {**params, 'cursor': ''})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.json())
+            ids += [hit['id'] for hit in response.json()['results']]
+            if response.json()['next'] is None:
+                return ids
+            response = self.client.get(response.json()['next'])
+
+    def _expected(self, *ordering):
+        return [str(pk) for pk in Hit.objects.order_by(*ordering).values_list('pk', flat=True)]
+
+    def test_walks_default_ordering_without_gaps_or_duplicates(self):
+        ids = self._walk({'page_size': 7})
+        self.assertEqual(ids, self._expected('created_at', 'pk'))
+
+    def test_walks_descending_and_related_orderings(self):
+        self.assertEqual(self._walk({'page_size': 4, 'ordering': '-title'}), self._expected('-title', '-pk'))
+        self.assertEqual(self._walk({'page_size': 10, 'ordering': 'artist__first_name,-created_at'}),
+                         self._expected('artist__first_name', '-created_at', '-pk'))
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(self.url, {'cursor': '', 'page_size': 5}).json()
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNotNone(back['next'])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_invalid_values_returns_404(self):
+        for position in (['not-a-date', 'x'], ['2020-01-01T00:00:00Z', 'zzz'], [[1], {}],
+                         [None, '1b2c1b2c-0000-4000-8000-000000000000']):
+            with self.subTest(position=position):
+                payload = {'p': position, 'o': ['created_at', 'pk'], 'r': 0}
+                cursor = urlsafe_b64encode(json.dumps(payload).encode()).decode()
+                response = self.client.get(self.url, {'cursor': cursor})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_of_other_ordering_returns_404(self):
+        next_url = self.client.get(self.url, {'cursor': '', 'page_size': 5}).json()['next']
+        response = self.client.get(next_url + '&ordering=title')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 33)
+        self.assertEqual(len(response.data['results']), 20)
+
+
 class HitsByArtistViewTests(BaseHitAPITestCase):
     def setUp(self):
+        cache.clear()
+        local_cache.clear()
         self.artist_most = Artist.objects.create(first_name='Alan', last_name='Smith')
         self.artist_few = Artist.objects.create(first_name='Brian', last_name='Jones')
         self.artist_none = Artist.objects.create(first_name='Charlie', last_name='Adams')
@@ -204,6 +292,7 @@ class HitsByArtistViewTests(BaseHitAPITestCase):
 
     def test_tie_breaker_on_same_hit_count(self):
         cache.clear()
+        local_cache.clear()
         a1 = Artist.objects.create(first_name='Xander', last_name='Blake')
         a2 = Artist.objects.create(first_name='Yvonne', last_name='Adams')
         Hit.objects.create(artist=a1, title='Solo Hit')
@@ -223,3 +312,219 @@ class HitsByArtistViewTests(BaseHitAPITestCase):
             self.assertIn(key, data)
         total_artists = Artist.objects.count()
         self.assertEqual(data['count'], total_artists)
+
+
+class HitsByArtistHitsLimitTests(BaseHitAPITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.url = reverse('hits_by_artist')
+        self.artist = Artist.objects.create(first_name='Freddie', last_name='Mercury')
+        self.other = Artist.objects.create(first_name='Alice', last_name='Cooper')
+        for i in range(15):
+            Hit.objects.create(artist=self.artist, title=f'Track {i:02}')
+        Hit.objects.create(artist=self.other, title='Poison')
+
+    def _hits(self, params=None):
+        return {entry['last_name']: entry['hits'] for entry in self.client.get(self.url, params).json()['results']}
+
+    def test_default_limit(self):
+        hits = self._hits()
+        self.assertEqual(len(hits['Mercury']), 10)
+        self.assertEqual([hit['title'] for hit in hits['Mercury']], [f'Track {i:02}' for i in range(10)])
+        self.assertEqual(len(hits['Cooper']), 1)
+
+    def test_custom_and_capped_limit(self):
+        self.assertEqual(len(self._hits({'hits_limit': 3})['Mercury']), 3)
+        self.assertEqual(len(self._hits({'hits_limit': 0})['Mercury']), 0)
+        self.assertEqual(len(self._hits({'hits_limit': 1000})['Mercury']), 15)
+        self.assertEqual(len(self._hits({'hits_limit': 'abc'})['Mercury']), 10)
+
+    def test_query_count_does_not_depend_on_hits(self):
+        # count of the page, artists, their limited hits
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {'hits_limit': 2})
+
+    def test_hits_url_lists_all_hits_of_the_artist(self):
+        entry = self.client.get(self.url).json()['results'][0]
+        self.assertEqual(entry['hits_url'], f'http://testserver/api/v1/artists/{self.artist.pk}/hits/')
+        response = self.client.get(entry['hits_url'])
+        self.assertEqual(len(response.json()['results']), 15)
+
+    def test_equivalent_limits_share_one_cache_entry(self):
+        for params in ({}, {'hits_limit': 10}, {'hits_limit': 'abc'}, {'hits_limit': ' 10 '}):
+            self.client.get(self.url, params)
+        self.client.get(self.url, {'hits_limit': 500})
+        keys = cached_entry_keys('HitsByArtistView')
+        self.assertEqual(len(keys), 2)
+        self.assertTrue(any(key.endswith(':hits_limit=100') for key in keys))
+
+
+class ArtistHitsViewTests(BaseHitAPITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        now = timezone.now()
+        self.artist = Artist.objects.create(first_name='Freddie', last_name='Mercury')
+        self.other = Artist.objects.create(first_name='Alice', last_name='Cooper')
+        for i in range(25):
+            # equal timestamps force the `id` tiebreaker into play
+            Hit.objects.create(artist=self.artist, title=f'Track {i:02}', created_at=now - timedelta(minutes=i // 4))
+        self.other_hit = Hit.objects.create(artist=self.other, title='Poison')
+        self.url = reverse('artists_hits', kwargs={'pk': self.artist.pk})
+
+    def _walk(self, url, params=None):
+        ids = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [hit['id'] for hit in response.json()['results']]
+            if response.json()['next'] is None:
+                return ids
+            response = self.client.get(response.json()['next'])
+
+    def _generation(self, artist):
+        return get_cache_generation(get_artist_hits_namespace(artist.pk))
+
+    def test_walks_hits_of_the_artist_oldest_first(self):
+        expected = Hit.objects.filter(artist=self.artist).order_by('created_at', 'pk').values_list('pk', flat=True)
+        self.assertEqual(self._walk(self.url, {'page_size': 6}), [str(pk) for pk in expected])
+
+    def test_fields(self):
+        hit = self.client.get(self.url).json()['results'][0]
+        self.assertEqual(set(hit), {'id', 'title', 'title_url', 'created_at'})
+
+    def test_unknown_artist_returns_404(self):
+        response = self.client.get(reverse('artists_hits', kwargs={'pk': '00000000-0000-0000-0000-000000000000'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_artist_without_hits_returns_empty_list(self):
+        artist = Artist.objects.create(first_name='Annie', last_name='Lennox')
+        response = self.client.get(reverse('artists_hits', kwargs={'pk': artist.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_write_to_other_artist_keeps_cache(self):
+        self.client.get(self.url)
+        generation = self._generation(self.artist)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_hit.title = 'Poison (Live)'
+            self.other_hit.save()
+            Hit.objects.create(artist=self.other, title='Bed of Nails')
+        self.assertEqual(self._generation(self.artist), generation)
+        self.assertEqual(len(cached_entry_keys(get_artist_hits_namespace(self.artist.pk))), 1)
+
+    def test_write_to_own_hit_invalidates_cache(self):
+        self.client.get(self.url)
+        hit = Hit.objects.filter(artist=self.artist).order_by('created_at', 'pk').first()
+        hit.title = 'Bohemian Rhapsody'
+        with self.captureOnCommitCallbacks(execute=True):
+            hit.save()
+        self.assertEqual(self.client.get(self.url).json()['results'][0]['title'], 'Bohemian Rhapsody')
+
+    def test_reassigned_hit_invalidates_both_artists(self):
+        hit = Hit.objects.filter(artist=self.artist).first()
+        generations = self._generation(self.artist), self._generation(self.other)
+        hit.artist = self.other
+        with self.captureOnCommitCallbacks(execute=True):
+            hit.save()
+        self.assertGreater(self._generation(self.artist), generations[0])
+        self.assertGreater(self._generation(self.other), generations[1])
+        self.assertIn(str(hit.pk), self._walk(reverse('artists_hits', kwargs={'pk': self.other.pk})))
+
+    def test_deleted_artist_invalidates_cache(self):
+        artist = Artist.objects.create(first_name='Annie', last_name='Lennox')
+        url = reverse('artists_hits', kwargs={'pk': artist.pk})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            artist.delete()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class HitExportViewTests(BaseHitAPITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.url = reverse('hits_export')
+        self.list_url = reverse('hits_list_create')
+        self.artist = Artist.objects.create(first_name='Alice', last_name='Cooper')
+        for title in ('Poison', 'School, Out', 'Bed of "Nails"'):
+            Hit.objects.create(artist=self.artist, title=title)
+
+    def _read_stream(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_rows_match_list_endpoint(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+
+        rows = [json.loads(line) for line in self._read_stream(response).splitlines()]
+        listed = self.client.get(self.list_url).json()['results']
+        self.assertEqual(rows, listed)
+
+    def test_csv_has_header_and_flattened_artist(self):
+        response = self.client.get(self.url, {'format': 'csv', 'ordering': 'title'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+
+        rows = list(csv.reader(io.StringIO(self._read_stream(response))))
+        self.assertEqual(rows[0], ['id', 'title', 'title_url', 'artist.id', 'artist.first_name',
+                                   'artist.last_name', 'artist.artist_url', 'created_at'])
+        self.assertEqual([row[1] for row in rows[1:]], ['Bed of "Nails"', 'Poison', 'School, Out'])
+        self.assertEqual(rows[1][4], 'Alice')
+
+    def test_row_links_do_not_keep_export_format(self):
+        for export_format in ('csv', 'ndjson'):
+            with self.subTest(format=export_format):
+                response = self.client.get(self.url, {'format': export_format})
+                content = self._read_stream(response)
+                self.assertNotIn('format=', content)
+
+                hit = Hit.objects.get(title='Poison')
+                self.assertIn(f'http://testserver{reverse("hits_detail", args=[hit.pk])}', content)
+
+    def test_csv_by_accept_header(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='text/csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+
+    def test_export_applies_filters(self):
+        response = self.client.get(self.url, {'title': 'poison'})
+        rows = self._read_stream(response).splitlines()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(json.loads(rows[0])['title'], 'Poison')
+
+    def test_invalid_filter_fails_before_streaming(self):
+        response = self.client.get(self.url, {'created_at_after': 'not-a-date'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.streaming)
+
+    def test_empty_csv_export_still_has_header(self):
+        response = self.client.get(self.url, {'format': 'csv', 'title': 'missing'})
+        self.assertEqual(len(self._read_stream(response).splitlines()), 1)
+
+
+class HitFilterTrigramIndexTests(BaseHitAPITestCase):
+    def setUp(self):
+        artist = Artist.objects.create(first_name='Freddie', last_name='Mercury')
+        Hit.objects.create(artist=artist, title='Bohemian Rhapsody')
+
+    def _plan(self, data):
+        queryset = HitFilter(data, queryset=Hit.objects.select_related('artist')).qs
+        sql, params = queryset.query.sql_with_params()
+        # the tables are tiny, so leave the planner only bitmap scans, the ones GIN indexes support
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_indexscan = off')
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def test_icontains_filters_use_trigram_indexes(self):
+        cases = {
+            'title': 'Hits_hit_title_trgm_idx',
+            'artist_name': 'Artists_artist_first_trgm_idx',
+            'artist_last_name': 'Artists_artist_last_trgm_idx',
+        }
+        for param, index in cases.items():
+            with self.subTest(param=param):
+                self.assertIn(index, self._plan({param: 'rhapsod'}))
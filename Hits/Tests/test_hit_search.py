@@ -0,0 +1,92 @@
+# Django Imports
+from django.core.cache import cache
+from django.urls import reverse
+# DRF Imports
+from rest_framework import status
+# Internal imports
+from .base import BaseHitAPITestCase
+from Artists.models import Artist
+from Hits.models import Hit
+from RestHits.Utils.local_cache import local_cache
+from RestHits.Tests.test_cache_and_signals import cached_entry_keys
+
+
+class HitSearchViewTests(BaseHitAPITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.url = reverse('search')
+        self.queen = Artist.objects.create(first_name='Freddie', last_name='Mercury')
+        self.cooper = Artist.objects.create(first_name='Alice', last_name='Cooper')
+        self.rhapsody = Hit.objects.create(artist=self.queen, title='Bohemian Rhapsody')
+        self.love = Hit.objects.create(artist=self.queen, title='Somebody to Love')
+        self.poison = Hit.objects.create(artist=self.cooper, title='Poison')
+
+    def _titles(self, response):
+        return [hit['title'] for hit in response.json()['results']]
+
+    def test_search_matches_titles_and_artist_names(self):
+        self.assertEqual(self._titles(self.client.get(self.url, {'q': 'rhapsody'})), ['Bohemian Rhapsody'])
+        self.assertCountEqual(self._titles(self.client.get(self.url, {'q': 'mercury'})),
+                              ['Bohemian Rhapsody', 'Somebody to Love'])
+
+    def test_title_matches_rank_above_artist_matches(self):
+        Hit.objects.create(artist=self.cooper, title='Mercury Rising')
+        response = self.client.get(self.url, {'q': 'mercury'})
+        results = response.json()['results']
+        self.assertEqual(results[0]['title'], 'Mercury Rising')
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+
+    def test_websearch_syntax(self):
+        response = self.client.get(self.url, {'q': 'freddie -love'})
+        self.assertEqual(self._titles(response), ['Bohemian Rhapsody'])
+
+    def test_empty_query_returns_no_results(self):
+        response = self.client.get(self.url, {'q': '  '})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_keyset_pages_cover_all_matches(self):
+        for i in range(5):
+            Hit.objects.create(artist=self.queen, title=f'Live Track {i}')
+        seen = []
+        response = self.client.get(self.url, {'q': 'freddie', 'page_size': 3})
+        while True:
+            data = response.json()
+            seen += [hit['id'] for hit in data['results']]
+            if not data['next']:
+                break
+            response = self.client.get(data['next'])
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_artist_rename_updates_search(self):
+        self.cooper.last_name = 'Furnier'
+        self.cooper.save()
+
+        self.assertEqual(self._titles(self.client.get(self.url, {'q': 'furnier'})), ['Poison'])
+        self.assertEqual(self._titles(self.client.get(self.url, {'q': 'cooper'})), [])
+
+    def test_bulk_artist_rename_updates_search(self):
+        # queryset updates skip Django signals, the database keeps the vector in sync anyway
+        Artist.objects.filter(pk=self.queen.pk).update(last_name='Bulsara')
+        self.assertCountEqual(Hit.objects.filter(search_vector='bulsara').values_list('title', flat=True),
+                              ['Bohemian Rhapsody', 'Somebody to Love'])
+
+    def test_title_change_updates_search(self):
+        self.poison.title = 'Bed of Nails'
+        self.poison.save()
+        self.assertEqual(self._titles(self.client.get(self.url, {'q': 'nails'})), ['Bed of Nails'])
+
+    def test_equivalent_queries_share_one_cache_entry(self):
+        for q in ('Bohemian Rhapsody', 'bohemian   rhapsody', ' BOHEMIAN rhapsody '):
+            self.assertEqual(self._titles(self.client.get(self.url, {'q': q})), ['Bohemian Rhapsody'])
+        [key] = cached_entry_keys('HitSearchView')
+        self.assertTrue(key.endswith(':q=bohemian+rhapsody'))
+
+    def test_write_invalidates_cached_search(self):
+        self.client.get(self.url, {'q': 'poison'})
+        with self.captureOnCommitCallbacks(execute=True):
+            Hit.objects.create(artist=self.queen, title='Poison Ivy')
+        self.assertEqual(len(self._titles(self.client.get(self.url, {'q': 'poison'}))), 2)
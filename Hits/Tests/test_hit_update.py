@@ -1,6 +1,8 @@
 # Python imports
 import uuid
 # Django Imports
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
@@ -79,6 +81,32 @@ class HitUpdateTests(BaseHitAPITestCase):
         self.assertEqual(get_error_code(response.data['hit']),
                          VALIDATION_ERROR_CODE_HIT_WITH_GIVEN_TITLE_ALREADY_EXIST_FOR_ARTIST)
 
+    def test_move_hit_to_artist_with_same_title_returns_400(self):
+        new_artist = Artist.objects.create(first_name='Jane', last_name='Smith')
+        Hit.objects.create(artist=new_artist, title='Original Title')
+        response = self.client.patch(self.url, data={'artist_id': new_artist.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_error_code(response.data['hit']),
+                         VALIDATION_ERROR_CODE_HIT_WITH_GIVEN_TITLE_ALREADY_EXIST_FOR_ARTIST)
+        self.hit.refresh_from_db()
+        self.assertEqual(self.hit.artist_id, self.artist.pk)
+
+    def test_update_keeping_own_title_returns_200(self):
+        payload = {'title': 'Original Title', 'artist_id': self.artist.pk}
+        response = self.client.put(self.url, data=payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_update_runs_no_extra_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, data={'title': 'Updated Title'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # loading the hit (with its artist) and the UPDATE, no existence check of the title
+        sql = [query['sql'] for query in queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(len(sql), 2)
+        self.assertTrue(sql[1].startswith('UPDATE "Hits_hit"'))
+
     def test_update_hit_with_invalid_artist_id_returns_400(self):
         invalid_uuid = uuid.uuid4()
         payload = {'artist_id': invalid_uuid}
@@ -0,0 +1,145 @@
+# Python imports
+from io import StringIO
+from unittest import mock
+# Django Imports
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+# DRF Imports
+from rest_framework import status
+# Internal imports
+from .base import BaseHitAPITestCase
+from Artists.models import Artist
+from Hits.catalog import CatalogUpsertResult, upsert_catalog
+from Hits.models import Hit
+from Hits.views import HitUpsertView
+from RestHits.Utils.cache_helpers import get_cache_generation
+from RestHits.Utils.local_cache import local_cache
+
+
+def record(first_name, last_name, title):
+    return {'first_name': first_name, 'last_name': last_name, 'title': title}
+
+
+class UpsertCatalogTests(TestCase):
+    def setUp(self):
+        self.queen = Artist.objects.create(first_name='Freddie', last_name='Mercury')
+        Hit.objects.create(artist=self.queen, title='Bohemian Rhapsody')
+        self.records = [
+            record('Freddie', 'Mercury', 'Bohemian Rhapsody'),
+            record('Freddie', 'Mercury', 'Love of My Life'),
+            record('David', 'Bowie', 'Heroes'),
+            record('David', 'Bowie', 'Starman'),
+        ]
+
+    def test_inserts_missing_rows(self):
+        result = upsert_catalog(self.records)
+
+        bowie = Artist.objects.get(first_name='David', last_name='Bowie')
+        self.assertEqual(result.artists_inserted, 1)
+        self.assertEqual(result.hits_inserted, 3)
+        self.assertEqual(result.hits_unchanged, 1)
+        self.assertEqual(result.artist_ids, {self.queen.pk, bowie.pk})
+        self.assertEqual(sorted(bowie.hit.values_list('title', flat=True)), ['Heroes', 'Starman'])
+        bowie.refresh_from_db()
+        self.assertEqual(bowie.hit_count, 2)
+
+    def test_is_idempotent(self):
+        upsert_catalog(self.records)
+        result = upsert_catalog(self.records)
+
+        self.assertEqual(result, CatalogUpsertResult(hits_unchanged=4))
+        self.assertEqual(Artist.objects.count(), 2)
+        self.assertEqual(Hit.objects.count(), 4)
+
+    def test_repeated_records_are_inserted_once(self):
+        result = upsert_catalog([record('David', 'Bowie', 'Heroes')] * 3)
+
+        self.assertEqual((result.artists_inserted, result.hits_inserted, result.hits_unchanged), (1, 1, 2))
+
+    def test_name_shared_by_several_artists_resolves_to_oldest(self):
+        Artist.objects.create(first_name='Freddie', last_name='Mercury')
+        upsert_catalog([record('Freddie', 'Mercury', 'Love of My Life')])
+
+        self.assertTrue(self.queen.hit.filter(title='Love of My Life').exists())
+
+    def test_name_parts_are_matched_together(self):
+        Artist.objects.create(first_name='David', last_name='Mercury')
+        result = upsert_catalog([record('Freddie', 'Bowie', 'Heroes')])
+
+        self.assertEqual(result.artists_inserted, 1)
+
+    def test_queries_per_batch_do_not_depend_on_its_size(self):
+        records = [record('Artist', f'Number {i}', f'Hit {i}') for i in range(50)]
+        with CaptureQueriesContext(connection) as queries:
+            result = upsert_catalog(records, batch_size=20)
+
+        self.assertEqual(result.hits_inserted, 50)
+        statements = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        # three batches: lock, artists lookup, artists insert, hits insert
+        self.assertEqual(len(statements), 12)
+
+    def test_seed_data_uses_upsert(self):
+        out = StringIO()
+        with mock.patch.dict('os.environ', {'DJANGO_SUPERUSER_USERNAME': 'admin',
+                                            'DJANGO_SUPERUSER_EMAIL': 'admin@example.com',
+                                            'DJANGO_SUPERUSER_PASSWORD': 'pass',
+                                            'DJANGO_SUPERUSER_TOKEN': 'a' * 40}):
+            call_command('seed_data', stdout=out)
+            hits = Hit.objects.count()
+            call_command('seed_data', stdout=out)
+
+        self.assertGreater(hits, 1)
+        self.assertEqual(Hit.objects.count(), hits)
+        self.assertIn('No new artists or hits were created', out.getvalue())
+
+
+class HitUpsertViewTests(BaseHitAPITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.url = reverse('hits_upsert')
+        self.artist = Artist.objects.create(first_name='Freddie', last_name='Mercury')
+        self.payload = [record('Freddie', 'Mercury', 'Bohemian Rhapsody'), record('David', 'Bowie', 'Heroes')]
+        self.client.force_authenticate(user=self.user)
+
+    def test_upsert_returns_counts(self):
+        response = self.client.post(self.url, data=self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'artists_inserted': 1, 'hits_inserted': 2, 'hits_unchanged': 0})
+
+        response = self.client.post(self.url, data=self.payload, format='json')
+        self.assertEqual(response.data, {'artists_inserted': 0, 'hits_inserted': 0, 'hits_unchanged': 2})
+
+    def test_upsert_by_not_superuser_returns_403(self):
+        self.client.force_authenticate(user=self.not_admin)
+        response = self.client.post(self.url, data=self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_records_are_reported_per_item(self):
+        response = self.client.post(self.url, data=[self.payload[0], record('D', 'Bowie', 'Heroes')], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(list(response.data[1]), ['first_name'])
+        self.assertFalse(Hit.objects.exists())
+
+    def test_batch_size_is_limited(self):
+        with mock.patch.object(HitUpsertView, 'max_batch_size', 1):
+            response = self.client.post(self.url, data=self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_caches_are_invalidated_only_on_insert(self):
+        namespaces = ['ArtistListCreateView', 'HitListCreateView', 'ArtistHitsView']
+        generations = [get_cache_generation(namespace) for namespace in namespaces]
+        self.client.post(self.url, data=self.payload, format='json')
+        for namespace, generation in zip(namespaces, generations):
+            self.assertGreater(get_cache_generation(namespace), generation)
+
+        with mock.patch('RestHits.Utils.cache_helpers.bump_cache_generations') as bump:
+            self.client.post(self.url, data=self.payload, format='json')
+        bump.assert_not_called()
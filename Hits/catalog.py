@@ -0,0 +1,195 @@
+# Python imports
+from dataclasses import dataclass, field
+from itertools import islice
+# Django imports
+from django.db import connection, transaction
+# Internal imports
+from .models import Hit
+from Artists.models import Artist
+
+# Records written per transaction by `upsert_catalog`.
+DEFAULT_UPSERT_BATCH_SIZE = 1000
+# Serializes the artist lookup-or-insert of concurrent upserts (see `upsert_catalog_batch`).
+ARTIST_UPSERT_LOCK = 'Artists_artist:upsert'
+
+INSERT_HITS_SQL = f'''
+    INSERT INTO "{Hit._meta.db_table}" (id, title, artist_id, created_at, updated_at)
+    SELECT gen_random_uuid(), record.title, record.artist_id, now(), now()
+    FROM unnest(%s::uuid[], %s::text[]) AS record(artist_id, title)
+    ON CONFLICT (artist_id, title) DO NOTHING
+    RETURNING artist_id
+'''
+
+# Staging tables of `copy_catalog`, dropped once merged.
+STAGE_RECORDS_SQL = '''
+    CREATE TEMP TABLE catalog_record (first_name text, last_name text, title text)
+'''
+COPY_RECORDS_SQL = 'COPY catalog_record (first_name, last_name, title) FROM STDIN'
+# The oldest artist of every name of the import, like `upsert_catalog_batch`.
+STAGE_ARTISTS_SQL = f'''
+    CREATE TEMP TABLE catalog_artist AS
+    SELECT DISTINCT ON (artist.first_name, artist.last_name) artist.first_name, artist.last_name, artist.id
+    FROM "{Artist._meta.db_table}" artist
+    JOIN (SELECT DISTINCT first_name, last_name FROM catalog_record) name USING (first_name, last_name)
+    ORDER BY artist.first_name, artist.last_name, artist.created_at, artist.id
+'''
+MERGE_ARTISTS_SQL = f'''
+    WITH inserted AS (
+        INSERT INTO "{Artist._meta.db_table}" (id, first_name, last_name, created_at, updated_at, hit_count)
+        SELECT gen_random_uuid(), name.first_name, name.last_name, now(), now(), 0
+        FROM (SELECT DISTINCT first_name, last_name FROM catalog_record) name
+        WHERE NOT EXISTS (
+            SELECT FROM catalog_artist
+            WHERE catalog_artist.first_name = name.first_name AND catalog_artist.last_name = name.last_name
+        )
+        RETURNING first_name, last_name, id
+    )
+    INSERT INTO catalog_artist SELECT first_name, last_name, id FROM inserted
+'''
+# Returns one row per artist that got hits, however many hits were inserted.
+MERGE_HITS_SQL = f'''
+    WITH inserted AS (
+        INSERT INTO "{Hit._meta.db_table}" (id, title, artist_id, created_at, updated_at)
+        SELECT gen_random_uuid(), record.title, catalog_artist.id, now(), now()
+        FROM (SELECT DISTINCT first_name, last_name, title FROM catalog_record) record
+        JOIN catalog_artist USING (first_name, last_name)
+        ON CONFLICT (artist_id, title) DO NOTHING
+        RETURNING artist_id
+    )
+    SELECT artist_id, count(*) FROM inserted GROUP BY artist_id
+'''
+DROP_STAGING_SQL = 'DROP TABLE catalog_record, catalog_artist'
+
+
+@dataclass
+class CatalogUpsertResult:
+    """
+    Counts of an upsert. Records carry only natural keys, so an existing record has nothing
+    to update: every record is either inserted or left unchanged.
+    """
+    artists_inserted: int = 0
+    hits_inserted: int = 0
+    hits_unchanged: int = 0
+    # artists that got new hits, whose cached hit lists are stale
+    artist_ids: set = field(default_factory=set)
+
+    def merge(self, other: 'CatalogUpsertResult') -> None:
+        self.artists_inserted += other.artists_inserted
+        self.hits_inserted += other.hits_inserted
+        self.hits_unchanged += other.hits_unchanged
+        self.artist_ids |= other.artist_ids
+
+
+def upsert_catalog(records, batch_size: int = DEFAULT_UPSERT_BATCH_SIZE) -> CatalogUpsertResult:
+    """
+    Insert the (artist first name, artist last name, hit title) records missing from the catalog.
+
+    The problem:
+        `get_or_create` per artist and per hit costs two queries per record,
+        and two syncs running at once can both miss an artist and insert it twice.
+    The solution:
+        Records are written in batches, each in its own transaction with a fixed number of
+        queries (see `upsert_catalog_batch`). Running the same input again inserts nothing.
+        Caches are left to the caller, see `RestHits.Utils.cache_helpers.invalidate_hit_caches`.
+
+    :param records: Iterable of mappings with `first_name`, `last_name` and `title`, consumed lazily.
+    :param batch_size: Number of records per transaction.
+    :return: Counts of the whole input.
+    """
+    result = CatalogUpsertResult()
+    records = iter(records)
+    while batch := list(islice(records, batch_size)):
+        result.merge(upsert_catalog_batch(batch))
+    return result
+
+
+@transaction.atomic
+def upsert_catalog_batch(records) -> CatalogUpsertResult:
+    """
+    Upsert one batch of records with four queries, whatever its size.
+
+    Artists have no unique name, so they cannot use ON CONFLICT: a transaction-level advisory
+    lock makes the lookup of the named artists and the insert of the missing ones atomic
+    between upserts. A name shared by several artists resolves to the oldest of them.
+    Hits are inserted with `ON CONFLICT (artist_id, title) DO NOTHING` on the unique
+    constraint, which also absorbs repeats within the batch.
+
+    :param records: List of mappings with `first_name`, `last_name` and `title`.
+    :return: Counts of the batch.
+    """
+    result = CatalogUpsertResult()
+    names = {(record['first_name'], record['last_name']) for record in records}
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [ARTIST_UPSERT_LOCK])
+
+    artist_ids = {}
+    # a superset of the named artists, narrowed down below
+    candidates = (
+        Artist.objects
+        .filter(first_name__in={first for first, _ in names}, last_name__in={last for _, last in names})
+        .order_by('created_at', 'id')
+        .values_list('first_name', 'last_name', 'id')
+    )
+    for first_name, last_name, artist_id in candidates:
+        if (first_name, last_name) in names:
+            artist_ids.setdefault((first_name, last_name), artist_id)
+
+    new_artists = [Artist(first_name=first, last_name=last) for first, last in sorted(names - artist_ids.keys())]
+    if new_artists:
+        Artist.objects.bulk_create(new_artists)
+        artist_ids.update({(artist.first_name, artist.last_name): artist.pk for artist in new_artists})
+        result.artists_inserted = len(new_artists)
+
+    record_artist_ids = [artist_ids[record['first_name'], record['last_name']] for record in records]
+    with connection.cursor() as cursor:
+        cursor.execute(INSERT_HITS_SQL, [record_artist_ids, [record['title'] for record in records]])
+        inserted = [artist_id for artist_id, in cursor.fetchall()]
+    result.hits_inserted = len(inserted)
+    result.hits_unchanged = len(records) - len(inserted)
+    result.artist_ids = set(inserted)
+    return result
+
+
+@transaction.atomic
+def copy_catalog(records, on_progress=None, progress_every: int = 100_000) -> CatalogUpsertResult:
+    """
+    Insert the missing artists and hits of a large catalog, with the semantics of `upsert_catalog`.
+
+    The problem:
+        Even in batches, `upsert_catalog` sends every record through query parameters and
+        merges batch by batch, which is too slow for millions of records.
+    The solution:
+        Records are streamed into a temporary table with `COPY`, then merged with three
+        set-based statements: the named artists, the missing artists and the missing hits,
+        deduplicated on (artist, title). Everything runs in one transaction, the advisory
+        lock of `upsert_catalog_batch` is only held for the merge.
+
+    :param records: Iterable of (first_name, last_name, title) tuples, consumed lazily.
+    :param on_progress: Called with the number of records staged so far, every `progress_every` records.
+    :param progress_every: Number of records between two `on_progress` calls.
+    :return: Counts of the whole input.
+    """
+    result = CatalogUpsertResult()
+    staged = 0
+    with connection.cursor() as cursor:
+        cursor.execute(STAGE_RECORDS_SQL)
+        # the driver's COPY bypasses Django's cursor, which maps errors to `django.db` exceptions
+        with connection.wrap_database_errors, cursor.copy(COPY_RECORDS_SQL) as copy:
+            for record in records:
+                copy.write_row(record)
+                staged += 1
+                if on_progress and staged % progress_every == 0:
+                    on_progress(staged)
+        cursor.execute('ANALYZE catalog_record')
+
+        cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [ARTIST_UPSERT_LOCK])
+        cursor.execute(STAGE_ARTISTS_SQL)
+        cursor.execute(MERGE_ARTISTS_SQL)
+        result.artists_inserted = cursor.rowcount
+        cursor.execute(MERGE_HITS_SQL)
+        for artist_id, hits in cursor.fetchall():
+            result.artist_ids.add(artist_id)
+            result.hits_inserted += hits
+        cursor.execute(DROP_STAGING_SQL)
+    result.hits_unchanged = staged - result.hits_inserted
+    return result
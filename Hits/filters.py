@@ -3,6 +3,7 @@ import django_filters
 
 
 class HitFilter(django_filters.FilterSet):
+    # `icontains` filters are served by the trigram indexes of Hit.title, Artist.first_name and Artist.last_name
     title = django_filters.CharFilter(field_name='title', lookup_expr='icontains')
     created_at = django_filters.IsoDateTimeFromToRangeFilter()
     artist_name = django_filters.CharFilter(field_name='artist__first_name', lookup_expr='icontains')
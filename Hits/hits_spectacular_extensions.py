@@ -4,7 +4,8 @@ from drf_spectacular.utils import (
     OpenApiParameter, OpenApiTypes
 )  # Internal imports
 from .serializers import (HitDetailSerializer, HitListSerializer, HitCreateSerializer, HitUpdateSerializer,
-                          ArtistWithHitsSerializer)
+                          ArtistWithHitsSerializer, HitSearchSerializer, HitNestedSerializer,
+                          HitBulkCreateSerializer, CatalogRecordSerializer, CatalogUpsertResultSerializer)
 
 HIT_FILTER_PARAMS = [
     OpenApiParameter(
@@ -37,6 +38,12 @@ HIT_FILTER_PARAMS = [
         required=False,
         type=OpenApiTypes.STR,
     ),
+    OpenApiParameter(
+        name='artist',
+        description='Filter by artist id',
+        required=False,
+        type=OpenApiTypes.UUID,
+    ),
 ]
 
 HIT_ORDERING_PARAM = OpenApiParameter(
@@ -72,6 +79,36 @@ HIT_LIST_CREATE_SCHEMA = extend_schema_view(
     ),
 )
 
+HIT_BULK_CREATE_SCHEMA = extend_schema_view(
+    post=extend_schema(
+        summary="Create hits in bulk",
+        description=(
+            "Creates up to 1000 hits in one request (admin only). "
+            "Request body: a list of `artist_id`, `title` objects. "
+            "If any item is invalid, nothing is created and the 400 response lists "
+            "the errors of every item, in the order of the request (`{}` for valid items)."
+        ),
+        request=HitBulkCreateSerializer(many=True),
+        responses={201: HitBulkCreateSerializer(many=True)},
+        tags=['Hits'],
+    ),
+)
+
+HIT_UPSERT_SCHEMA = extend_schema_view(
+    post=extend_schema(
+        summary="Upsert catalog records",
+        description=(
+            "Adds the missing artists and hits of up to 1000 records (admin only). "
+            "Request body: a list of `first_name`, `last_name`, `title` objects. "
+            "Artists are matched by name, hits by artist and title; existing ones are left unchanged, "
+            "so posting the same records again is safe. Returns the number of inserted and unchanged rows."
+        ),
+        request=CatalogRecordSerializer(many=True),
+        responses={200: CatalogUpsertResultSerializer},
+        tags=['Hits'],
+    ),
+)
+
 HIT_DETAIL_SCHEMA = extend_schema_view(
     get=extend_schema(
         summary="Retrieve hit details",
@@ -100,15 +137,78 @@ HIT_DETAIL_SCHEMA = extend_schema_view(
     ),
 )
 
+HIT_EXPORT_SCHEMA = extend_schema_view(
+    get=extend_schema(
+        summary="Export hits",
+        description=(
+            "Streams every hit matching the filters, without pagination. "
+            "NDJSON (one `HitList` object per line) by default, CSV with `?format=csv` or `Accept: text/csv`. "
+            "CSV flattens the nested artist into `artist.<field>` columns."
+        ),
+        parameters=HIT_FILTER_PARAMS + [HIT_ORDERING_PARAM],
+        responses={
+            (200, 'application/x-ndjson'): HitListSerializer,
+            (200, 'text/csv'): OpenApiTypes.STR,
+        },
+        tags=['Hits'],
+    ),
+)
+
+HIT_SEARCH_SCHEMA = extend_schema_view(
+    get=extend_schema(
+        summary="Search hits",
+        description=(
+            "Full-text search over hit titles and artist names, best matches (`rank`) first. "
+            "Title matches rank above artist name matches. "
+            "Pagination follows the `next`/`previous` cursor links."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name='q',
+                description=(
+                    'Search query (web search syntax: `"exact phrase"`, `or`, `-excluded`). '
+                    'An empty query returns no results.'
+                ),
+                required=False,
+                type=OpenApiTypes.STR,
+            ),
+        ],
+        responses={200: HitSearchSerializer(many=True)},
+        tags=['Hits'],
+    ),
+)
+
 HITS_BY_ARTIST_SCHEMA = extend_schema_view(
     get=extend_schema(
         summary="List artists with their hits",
         description=(
             "Returns artists annotated with `hit_count` and nested `hits`."
-            "Sorted by number of hits"
+            "Sorted by number of hits. "
+            "Each artist embeds its first `hits_limit` hits (oldest first), "
+            "`hits_url` lists all of them."
         ),
+        parameters=[
+            OpenApiParameter(
+                name='hits_limit',
+                description='Number of hits embedded per artist (default 10, max 100)',
+                required=False,
+                type=OpenApiTypes.INT,
+            ),
+        ],
         responses={200: ArtistWithHitsSerializer(many=True)},
         tags=['Hits'],
     ),
 )
 
+ARTIST_HITS_SCHEMA = extend_schema_view(
+    get=extend_schema(
+        summary="List hits of an artist",
+        description=(
+            "Returns all hits of the artist, oldest first. "
+            "Pagination follows the `next`/`previous` cursor links. "
+            "Returns 404 if the artist does not exist."
+        ),
+        responses={200: HitNestedSerializer(many=True)},
+        tags=['Hits'],
+    ),
+)
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:55
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # indexes are built concurrently, so writes are not blocked while big tables are indexed
+    atomic = False
+
+    dependencies = [
+        ('Artists', '0003_artist_artists_art_first_n_595f32_idx_and_more'),
+        ('Hits', '0002_alter_hit_artist'),
+    ]
+
+    operations = [
+        # the new indexes cover the old ones, build them first so the orderings always have one
+        AddIndexConcurrently(
+            model_name='hit',
+            index=models.Index(fields=['title', 'id'], name='Hits_hit_title_043b51_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='hit',
+            index=models.Index(fields=['created_at', 'id'], name='Hits_hit_created_dea4e7_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='hit',
+            name='Hits_hit_title_d16dae_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='hit',
+            name='Hits_hit_created_18bbf6_idx',
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-17 20:03
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # indexes are built concurrently, so writes are not blocked while big tables are indexed
+    atomic = False
+
+    dependencies = [
+        ('Artists', '0004_artist_trigram_indexes'),
+        ('Hits', '0003_hit_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='hit',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('title', output_field=models.TextField())), name='gin_trgm_ops'), name='Hits_hit_title_trgm_idx'),
+        ),
+    ]
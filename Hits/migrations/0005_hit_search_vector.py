@@ -0,0 +1,75 @@
+# Generated by Django 5.2.1 on 2026-10-17 20:07
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# The search vector of a hit: its title (weight A) and the name of its artist (weight B).
+# The 'simple' configuration does no stemming, which suits titles and names, and the query
+# side (see `HitSearchView`) must use the same one.
+CREATE_SEARCH_TRIGGERS = '''
+CREATE FUNCTION hit_search_vector(title text, first_name text, last_name text) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(first_name, '') || ' ' || coalesce(last_name, '')), 'B')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE FUNCTION hit_search_vector_on_hit_write() RETURNS trigger AS $$
+BEGIN
+    SELECT hit_search_vector(NEW.title, artist.first_name, artist.last_name) INTO NEW.search_vector
+    FROM "Artists_artist" artist WHERE artist.id = NEW.artist_id;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION hit_search_vector_on_artist_rename() RETURNS trigger AS $$
+BEGIN
+    UPDATE "Hits_hit" SET search_vector = hit_search_vector(title, NEW.first_name, NEW.last_name)
+    WHERE artist_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- Django saves send every column, so the title is always part of their SET list
+CREATE TRIGGER hit_search_vector_on_hit_write
+    BEFORE INSERT OR UPDATE OF title, artist_id ON "Hits_hit"
+    FOR EACH ROW EXECUTE FUNCTION hit_search_vector_on_hit_write();
+
+CREATE TRIGGER hit_search_vector_on_artist_rename
+    AFTER UPDATE OF first_name, last_name ON "Artists_artist"
+    FOR EACH ROW
+    WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name OR OLD.last_name IS DISTINCT FROM NEW.last_name)
+    EXECUTE FUNCTION hit_search_vector_on_artist_rename();
+
+UPDATE "Hits_hit" hit SET search_vector = hit_search_vector(hit.title, artist.first_name, artist.last_name)
+FROM "Artists_artist" artist WHERE artist.id = hit.artist_id;
+'''
+
+DROP_SEARCH_TRIGGERS = '''
+DROP TRIGGER hit_search_vector_on_artist_rename ON "Artists_artist";
+DROP TRIGGER hit_search_vector_on_hit_write ON "Hits_hit";
+DROP FUNCTION hit_search_vector_on_artist_rename();
+DROP FUNCTION hit_search_vector_on_hit_write();
+DROP FUNCTION hit_search_vector(text, text, text);
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Artists', '0004_artist_trigram_indexes'),
+        ('Hits', '0004_hit_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hit',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # fill the column before indexing it, building the index once is cheaper than maintaining it
+        migrations.RunSQL(CREATE_SEARCH_TRIGGERS, DROP_SEARCH_TRIGGERS),
+        migrations.AddIndex(
+            model_name='hit',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='Hits_hit_search_vector_idx'),
+        ),
+    ]
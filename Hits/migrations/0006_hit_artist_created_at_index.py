@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-17 20:15
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # indexes are built concurrently, so writes are not blocked while big tables are indexed
+    atomic = False
+
+    dependencies = [
+        ('Artists', '0005_artist_hit_count'),
+        ('Hits', '0005_hit_search_vector'),
+    ]
+
+    operations = [
+        # the new index covers the old one, build it first so artist lookups always have one
+        AddIndexConcurrently(
+            model_name='hit',
+            index=models.Index(fields=['artist', 'created_at', 'id'], name='Hits_hit_artist__3f64fd_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='hit',
+            name='Hits_hit_artist__5bec33_idx',
+        ),
+    ]
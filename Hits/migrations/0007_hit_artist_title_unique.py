@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # the unique index is built concurrently, so writes are not blocked while the table is indexed
+    atomic = False
+
+    dependencies = [
+        ('Artists', '0005_artist_hit_count'),
+        ('Hits', '0006_hit_artist_created_at_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                # fails on existing duplicates, which have to be resolved by hand first
+                migrations.RunSQL(
+                    sql='CREATE UNIQUE INDEX CONCURRENTLY "Hits_hit_artist_title_uniq" ON "Hits_hit" (artist_id, title);',
+                    reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS "Hits_hit_artist_title_uniq";',
+                ),
+                # attaching the index only takes a brief lock
+                migrations.RunSQL(
+                    sql='ALTER TABLE "Hits_hit" ADD CONSTRAINT "Hits_hit_artist_title_uniq" '
+                        'UNIQUE USING INDEX "Hits_hit_artist_title_uniq";',
+                    reverse_sql='ALTER TABLE "Hits_hit" DROP CONSTRAINT "Hits_hit_artist_title_uniq";',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='hit',
+                    constraint=models.UniqueConstraint(fields=('artist', 'title'), name='Hits_hit_artist_title_uniq'),
+                ),
+            ],
+        ),
+    ]
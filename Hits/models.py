@@ -1,10 +1,23 @@
 # Python imports
 import uuid
 # Django imports
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.validators import MinLengthValidator, MaxLengthValidator
 # Internal imports
 from Artists.models import Artist
+from RestHits.Utils.index_helpers import icontains_trigram_index
+
+# Name of the unique (artist, title) constraint, its violations are reported as validation errors
+# (see `Hits.validators.unique_hit_title`).
+HIT_ARTIST_TITLE_CONSTRAINT = 'Hits_hit_artist_title_uniq'
+
+
+class HitManager(models.Manager):
+    def get_queryset(self):
+        # only the search filter reads the search vector, no need to send it over the wire on every query
+        return super().get_queryset().defer('search_vector')
 
 
 class Hit(models.Model):
@@ -13,14 +26,34 @@ class Hit(models.Model):
     artist = models.ForeignKey(Artist, on_delete=models.CASCADE, related_name='hit')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Title and artist name, maintained by database triggers (see migration 0005_hit_search_vector)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = HitManager()
 
     class Meta:
         ordering = ['created_at']
+        # `id` closes every index, as the tiebreaker of keyset pagination (see `KeysetPagination`)
         indexes = [
-            models.Index(fields=['title']),
-            models.Index(fields=['created_at']),
-            models.Index(fields=['artist']),
+            models.Index(fields=['title', 'id']),
+            models.Index(fields=['created_at', 'id']),
+            # hits of one artist in list order (see `ArtistHitsView`), also serves plain artist lookups
+            models.Index(fields=['artist', 'created_at', 'id']),
+            # `title` filter of HitFilter
+            icontains_trigram_index('title', name='Hits_hit_title_trgm_idx'),
+            # full-text search (see `HitSearchView`)
+            GinIndex(fields=['search_vector'], name='Hits_hit_search_vector_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['artist', 'title'], name=HIT_ARTIST_TITLE_CONSTRAINT),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the artist as loaded, so a reassignment can also invalidate caches of the previous artist
+        instance._loaded_artist_id = instance.__dict__.get('artist_id')
+        return instance
+
     def __str__(self):
         return self.title
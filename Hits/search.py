@@ -0,0 +1,44 @@
+# Django imports
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+# Internal imports
+from .models import Hit
+
+# Text search configuration of `Hit.search_vector`, see migration 0005_hit_search_vector.
+SEARCH_CONFIG = 'simple'
+SEARCH_QUERY_PARAM = 'q'
+
+
+def normalize_search_query(terms: str) -> str:
+    """
+    Return the canonical form of a search query: lowercase, single spaces.
+
+    The 'simple' configuration lowercases words and websearch operators (`or`, quotes, `-`)
+    are case-insensitive, so the result matches the same hits as the original.
+
+    :param terms: Search query as typed by the user.
+    :return: Normalized query, empty if there is nothing to search for.
+    """
+    return ' '.join(terms.lower().split())
+
+
+def search_hits(terms: str):
+    """
+    Return hits matching a web-search style query, annotated with `rank` and best matches first.
+
+    :param terms: Normalized search query (see `normalize_search_query`).
+    :return: Hit queryset, empty for an empty query.
+    """
+    if not terms:
+        return Hit.objects.none()
+    query = SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+    return (
+        Hit.objects
+        .select_related('artist')
+        .filter(search_vector=query)
+        # ts_rank returns a real, which the driver rounds to its shortest text form: as a double
+        # the value survives the round trip through keyset cursors exactly
+        .annotate(rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+        .order_by('-rank')
+    )
@@ -1,11 +1,17 @@
-import uuid
+# Django imports
+from django.db import IntegrityError, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 # DRF Imports
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 # Internal imports
 from .models import Hit
 from Artists.serializers import ArtistListSerializer, ArtistDetailSerializer
-from .validators import validate_hit_ownership, validate_artist_exists
+from .validators import (artist_not_found_error, hit_title_taken_error, is_hit_title_conflict, unique_hit_title,
+                         validate_artist_exists, VALIDATION_ERROR_CODE_HIT_WITH_GIVEN_TITLE_ALREADY_EXIST_FOR_ARTIST)
 from Artists.models import Artist
+from RestHits.Utils.row_serializers import RowSerializer
 
 
 class HitDetailSerializer(serializers.ModelSerializer):
@@ -16,14 +22,6 @@ class HitDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'artist', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
-    def validate(self, data):
-        data = super().validate(data)
-        title = data.get('title')
-        artist = data.get('artist')
-        if title and artist:
-            validate_hit_ownership(title, artist)
-        return data
-
 
 class HitCreateSerializer(serializers.ModelSerializer):
     artist_id = serializers.UUIDField(write_only=True)
@@ -33,10 +31,95 @@ class HitCreateSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'artist_id']
 
     def validate(self, data):
-        artist = validate_artist_exists(data['artist_id'])
-        validate_hit_ownership(data['title'], artist)
+        # a duplicate title is rejected by the unique constraint on save, see `unique_hit_title`
+        data['artist'] = validate_artist_exists(data.pop('artist_id'))
         return data
 
+    def create(self, validated_data):
+        with unique_hit_title(validated_data['title']):
+            return super().create(validated_data)
+
+
+class HitBulkCreateListSerializer(serializers.ListSerializer):
+    """
+    Validate and insert a batch of hits with a fixed number of queries.
+
+    The problem:
+        `HitCreateSerializer` looks up the artist of every hit and inserts it on its own,
+        so a batch of N hits costs 2N queries.
+    The solution:
+        Once the fields of every item are valid, the artists of the batch are resolved in one query
+        and the (artist, title) pairs they already have in another. Items are rejected one by one,
+        with the errors of the single create, aligned with the input list. A valid batch is
+        inserted with one `bulk_create`; a batch with any invalid item inserts nothing.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+
+        artist_ids = set(Artist.objects.filter(pk__in={item['artist_id'] for item in items})
+                         .values_list('pk', flat=True))
+        # a superset of the pairs of the batch, narrowed down below
+        taken = set(
+            Hit.objects
+            .filter(artist_id__in=artist_ids, title__in={item['title'] for item in items})
+            .values_list('artist_id', 'title')
+        )
+        errors = []
+        for item in items:
+            pair = (item['artist_id'], item['title'])
+            if item['artist_id'] not in artist_ids:
+                errors.append(artist_not_found_error(item['artist_id']).detail)
+            elif pair in taken:
+                # also catches a title repeated within the batch
+                errors.append(hit_title_taken_error(item['title']).detail)
+            else:
+                errors.append({})
+                taken.add(pair)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return Hit.objects.bulk_create([Hit(**item) for item in validated_data])
+        except IntegrityError as error:
+            if not is_hit_title_conflict(error):
+                raise
+            # another request has inserted one of the titles since the validation
+            raise serializers.ValidationError(
+                detail={'hit': 'A hit of this batch has been created in the meantime, retry the batch.'},
+                code=VALIDATION_ERROR_CODE_HIT_WITH_GIVEN_TITLE_ALREADY_EXIST_FOR_ARTIST
+            ) from error
+
+
+class HitBulkCreateSerializer(serializers.ModelSerializer):
+    """
+    Item of a bulk create, validated by `HitBulkCreateListSerializer` (use with `many=True`).
+    """
+    artist_id = serializers.UUIDField(write_only=True)
+
+    class Meta:
+        model = Hit
+        fields = ['id', 'title', 'artist_id']
+        list_serializer_class = HitBulkCreateListSerializer
+
+
+class CatalogRecordSerializer(serializers.Serializer):
+    """
+    Record of a catalog upsert (see `Hits.catalog.upsert_catalog`), validated like the models.
+    """
+    first_name = serializers.CharField(min_length=2, max_length=255)
+    last_name = serializers.CharField(min_length=2, max_length=255)
+    title = serializers.CharField(min_length=2, max_length=255)
+
+
+class CatalogUpsertResultSerializer(serializers.Serializer):
+    artists_inserted = serializers.IntegerField()
+    hits_inserted = serializers.IntegerField()
+    hits_unchanged = serializers.IntegerField()
+
 
 class HitListSerializer(serializers.ModelSerializer):
     artist = ArtistListSerializer(read_only=True)
@@ -47,6 +130,36 @@ class HitListSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'title_url', 'artist', 'created_at']
 
 
+class HitListRowSerializer(RowSerializer):
+    """
+    `HitListSerializer` output built from `.values()` rows, the artist read through the join.
+    """
+    # the artist names are also ordering fields of `HitListCreateView`
+    values_fields = ['id', 'title', 'created_at', 'artist_id', 'artist__first_name', 'artist__last_name']
+    url_templates = {'title_url': 'hits_detail', 'artist_url': 'artists_detail'}
+
+    def to_representation(self, row):
+        return {
+            'id': str(row['id']),
+            'title': row['title'],
+            'title_url': self.urls['title_url'](row['id']),
+            'artist': {
+                'id': str(row['artist_id']),
+                'first_name': row['artist__first_name'],
+                'last_name': row['artist__last_name'],
+                'artist_url': self.urls['artist_url'](row['artist_id']),
+            },
+            'created_at': self.format_datetime(row['created_at']),
+        }
+
+
+class HitSearchSerializer(HitListSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(HitListSerializer.Meta):
+        fields = HitListSerializer.Meta.fields + ['rank']
+
+
 class HitUpdateSerializer(serializers.ModelSerializer):
     artist_id = serializers.UUIDField(write_only=True, required=False)
     artist = ArtistDetailSerializer(read_only=True)
@@ -56,16 +169,20 @@ class HitUpdateSerializer(serializers.ModelSerializer):
         fields = ['title', 'artist_id', 'artist']
 
     def validate(self, data):
-        title = data.get('title', self.instance.title)
-        artist = data.get('artist_id', self.instance.artist)
-
-        if isinstance(artist, uuid.UUID):
-            artist = validate_artist_exists(artist)
-
-        validate_hit_ownership(title, artist)
+        # a duplicate title is rejected by the unique constraint on save, see `unique_hit_title`
+        if 'artist_id' in data:
+            artist_id = data.pop('artist_id')
+            if artist_id == self.instance.artist_id:
+                data['artist'] = self.instance.artist
+            else:
+                data['artist'] = validate_artist_exists(artist_id)
 
         return data
 
+    def update(self, instance, validated_data):
+        with unique_hit_title(validated_data.get('title', instance.title)):
+            return super().update(instance, validated_data)
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         artist_data = ArtistDetailSerializer(instance.artist).data
@@ -84,8 +201,80 @@ class HitNestedSerializer(serializers.ModelSerializer):
 
 class ArtistWithHitsSerializer(serializers.ModelSerializer):
     hit_count = serializers.IntegerField(read_only=True)
-    hits = HitNestedSerializer(source='hit', many=True)
+    # first hits of the artist, prefetched by the view (see `HitsByArtistView`)
+    hits = HitNestedSerializer(source='top_hits', many=True)
+    hits_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Artist
-        fields = ['id','first_name','last_name','hit_count','hits',]
\ No newline at end of file
+        fields = ['id','first_name','last_name','hit_count','hits','hits_url',]
+
+    def get_hits_url(self, artist) -> str:
+        return reverse('artists_hits', kwargs={'pk': artist.pk}, request=self.context.get('request'))
+
+
+class HitNestedRowSerializer(RowSerializer):
+    """
+    `HitNestedSerializer` output built from `.values()` rows.
+    """
+    values_fields = ['id', 'title', 'created_at']
+    url_templates = {'title_url': 'hits_detail'}
+
+    def to_representation(self, row):
+        return {
+            'id': str(row['id']),
+            'title': row['title'],
+            'title_url': self.urls['title_url'](row['id']),
+            'created_at': self.format_datetime(row['created_at']),
+        }
+
+
+class ArtistWithHitsRowSerializer(RowSerializer):
+    """
+    `ArtistWithHitsSerializer` output built from `.values()` rows.
+
+    The first hits of all artists of the page are fetched in one query, numbered per
+    artist with `ROW_NUMBER()` - the same query the sliced prefetch of `HitsByArtistView` runs.
+    """
+    values_fields = ['id', 'first_name', 'last_name', 'hit_count']
+    url_templates = {'hits_url': 'artists_hits'}
+
+    def __init__(self, context):
+        super().__init__(context)
+        self.hit_rows = HitNestedRowSerializer(context)
+
+    def get_top_hits(self, artist_ids):
+        """
+        Return the first hits of each artist, as lists of rows by artist id.
+        """
+        top_hits = {artist_id: [] for artist_id in artist_ids}
+        hits_limit = self.context['view'].get_hits_limit(self.context['request'])
+        if not artist_ids or not hits_limit:
+            return top_hits
+        hits = (
+            Hit.objects
+            .filter(artist_id__in=artist_ids)
+            .annotate(position=Window(RowNumber(), partition_by=F('artist_id'),
+                                      order_by=[F('created_at').asc(), F('id').asc()]))
+            .filter(position__lte=hits_limit)
+            .order_by('created_at', 'id')
+            .values(*self.hit_rows.values_fields, 'artist_id')
+        )
+        for hit in hits:
+            top_hits[hit['artist_id']].append(hit)
+        return top_hits
+
+    def to_representation_many(self, rows):
+        rows = list(rows)
+        self.top_hits = self.get_top_hits([row['id'] for row in rows])
+        return super().to_representation_many(rows)
+
+    def to_representation(self, row):
+        return {
+            'id': str(row['id']),
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'hit_count': row['hit_count'],
+            'hits': self.hit_rows.to_representation_many(self.top_hits[row['id']]),
+            'hits_url': self.urls['hits_url'](row['id']),
+        }
@@ -1,10 +1,14 @@
 # Django imports
 from django.urls import path
 # Internal imports
-from .views import (HitListCreateView, HitDetailView, HitsByArtistView)
+from .views import (HitListCreateView, HitDetailView, HitsByArtistView, HitExportView, HitBulkCreateView,
+                    HitUpsertView)
 
 urlpatterns = [
     path('', HitListCreateView.as_view(), name='hits_list_create'),
+    path('bulk/', HitBulkCreateView.as_view(), name='hits_bulk_create'),
+    path('upsert/', HitUpsertView.as_view(), name='hits_upsert'),
+    path('export/', HitExportView.as_view(), name='hits_export'),
     path('<uuid:pk>/', HitDetailView.as_view(), name='hits_detail'),
     path('by-artist/', HitsByArtistView.as_view(), name='hits_by_artist')
 ]
\ No newline at end of file
@@ -1,13 +1,16 @@
 # Python imports
 import uuid
+from contextlib import contextmanager
 
 # Validation error codes
 VALIDATION_ERROR_CODE_HIT_WITH_GIVEN_TITLE_ALREADY_EXIST_FOR_ARTIST = 'hit_with_given_title_already_exist_for_artist'
 VALIDATION_ERROR_CODE_ARTIST_NOT_FOUND = 'artist_not_found'
+# Django imports
+from django.db import IntegrityError, transaction
 # DRF imports
 from rest_framework import serializers
 # Internal imports
-from .models import Hit
+from .models import HIT_ARTIST_TITLE_CONSTRAINT
 from Artists.models import Artist
 
 
@@ -18,17 +21,51 @@ def validate_artist_exists(artist):
     try:
         return Artist.objects.get(pk=artist)
     except Artist.DoesNotExist:
-        raise serializers.ValidationError(
-            detail={'artist': f'Artist with id {str(artist)} does not exist.'},
-            code=VALIDATION_ERROR_CODE_ARTIST_NOT_FOUND
-        )
+        raise artist_not_found_error(artist)
 
 
-def validate_hit_ownership(hit_title: str, artist):
-    artist = validate_artist_exists(artist)
+def artist_not_found_error(artist_id) -> serializers.ValidationError:
+    return serializers.ValidationError(
+        detail={'artist': f'Artist with id {str(artist_id)} does not exist.'},
+        code=VALIDATION_ERROR_CODE_ARTIST_NOT_FOUND
+    )
 
-    if Hit.objects.filter(artist=artist, title=hit_title).exists():
-        raise serializers.ValidationError(
-            detail={'hit': f'Hit with title {hit_title} already exists for this artist.'},
-            code=VALIDATION_ERROR_CODE_HIT_WITH_GIVEN_TITLE_ALREADY_EXIST_FOR_ARTIST
-        )
+
+def hit_title_taken_error(hit_title: str) -> serializers.ValidationError:
+    return serializers.ValidationError(
+        detail={'hit': f'Hit with title {hit_title} already exists for this artist.'},
+        code=VALIDATION_ERROR_CODE_HIT_WITH_GIVEN_TITLE_ALREADY_EXIST_FOR_ARTIST
+    )
+
+
+def is_hit_title_conflict(error: IntegrityError) -> bool:
+    """
+    Tell whether an IntegrityError is a violation of the unique (artist, title) constraint.
+    """
+    diag = getattr(error.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None) == HIT_ARTIST_TITLE_CONSTRAINT
+
+
+@contextmanager
+def unique_hit_title(hit_title: str):
+    """
+    Run a hit write in a savepoint and report a duplicate title of the artist as a validation error.
+
+    The problem:
+        Checking `Hit.objects.filter(artist=..., title=...).exists()` before the write costs
+        an extra query, and two concurrent requests can both pass it and insert duplicates.
+    The solution:
+        The unique (artist, title) constraint rejects the duplicate within the INSERT/UPDATE
+        itself. Its IntegrityError is turned into the same validation error as before;
+        the savepoint keeps an outer transaction usable after the failed statement.
+
+    :param hit_title: Title being written, used in the error message.
+    :raises serializers.ValidationError: If the artist already has a hit with this title.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as error:
+        if not is_hit_title_conflict(error):
+            raise
+        raise hit_title_taken_error(hit_title) from error
@@ -1,34 +1,50 @@
 # Django imports
-from django.db.models import Count
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 # DRF imports
 from rest_framework import generics
+from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
 from rest_framework.filters import OrderingFilter
 # Internal imports
 from .models import Hit
 from .serializers import (HitDetailSerializer, HitListSerializer, HitCreateSerializer, HitUpdateSerializer,
-                          ArtistWithHitsSerializer)
+                          ArtistWithHitsSerializer, HitSearchSerializer, HitNestedSerializer,
+                          HitListRowSerializer, ArtistWithHitsRowSerializer, HitBulkCreateSerializer,
+                          CatalogRecordSerializer, CatalogUpsertResultSerializer)
 from .filters import HitFilter
-from .hits_spectacular_extensions import (HIT_LIST_CREATE_SCHEMA, HIT_DETAIL_SCHEMA, HITS_BY_ARTIST_SCHEMA)
+from .search import SEARCH_QUERY_PARAM, normalize_search_query, search_hits
+from .catalog import DEFAULT_UPSERT_BATCH_SIZE, upsert_catalog
+from .hits_spectacular_extensions import (HIT_LIST_CREATE_SCHEMA, HIT_DETAIL_SCHEMA, HITS_BY_ARTIST_SCHEMA,
+                                          HIT_EXPORT_SCHEMA, HIT_SEARCH_SCHEMA, ARTIST_HITS_SCHEMA,
+                                          HIT_BULK_CREATE_SCHEMA, HIT_UPSERT_SCHEMA)
 from RestHits.Utils.mixins import PermitGetAdminModifyMixin
-from RestHits.Utils.pagination import DefaultPagination
-from RestHits.Utils.mixins import CacheListMixin
+from RestHits.Utils.pagination import DefaultPagination, OptInKeysetPagination, KeysetPagination
+from RestHits.Utils.renderers import NDJSONRenderer, CSVRenderer, get_flat_field_names
+from RestHits.Utils.mixins import CacheListMixin, CacheDetailMixin, ValuesListMixin
 from Artists.models import Artist
-from RestHits.Utils.view_helpers import swagger_safe_queryset
+from RestHits.Utils.view_helpers import swagger_safe_queryset, without_format_override
+from RestHits.Utils.cache_helpers import (ARTIST_HITS_NAMESPACE, get_artist_hits_namespace, get_cache_generations,
+                                          invalidate_hit_caches)
 
 
 @HIT_LIST_CREATE_SCHEMA
-class HitListCreateView(CacheListMixin, PermitGetAdminModifyMixin, generics.ListCreateAPIView):
+class HitListCreateView(CacheListMixin, ValuesListMixin, PermitGetAdminModifyMixin, generics.ListCreateAPIView):
     """
-    GET: List 20 hits with filtering and ordering.
+    GET: List 20 hits with filtering and ordering. `?cursor=` switches to keyset pagination.
     POST: Create a new hit (admin only).
     """
     queryset = Artist.objects.none()
-    pagination_class = DefaultPagination
+    row_serializer_class = HitListRowSerializer
+    pagination_class = OptInKeysetPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = HitFilter
     ordering_fields = ['created_at', 'title', 'artist__first_name', 'artist__last_name']
     ordering = ['created_at']
+    cache_dependencies = [Hit, Artist]
+    # count (or estimate) and page; POST: artist lookup and INSERT
+    query_budget = {'GET': 2, 'POST': 2}
 
     @swagger_safe_queryset
     def get_queryset(self):
@@ -40,14 +56,117 @@ class HitListCreateView(CacheListMixin, PermitGetAdminModifyMixin, generics.List
         return HitListSerializer
 
 
+@HIT_BULK_CREATE_SCHEMA
+class HitBulkCreateView(PermitGetAdminModifyMixin, generics.CreateAPIView):
+    """
+    POST: Create a batch of up to `max_batch_size` hits (admin only), all or nothing.
+
+    The problem:
+        Ingesting a catalog hit by hit costs two queries and a cache invalidation per hit,
+        the invalidation also wiping the entries the other hits had just refilled.
+    The solution:
+        The batch is validated and inserted with three queries (see `HitBulkCreateListSerializer`).
+        `bulk_create` sends no `post_save`, so the caches are invalidated here, once per batch:
+        the views reading hits and the hit lists of the artists.
+    """
+    queryset = Artist.objects.none()
+    serializer_class = HitBulkCreateSerializer
+    max_batch_size = 1000
+    # artists, taken titles and the INSERT
+    query_budget = {'POST': 3}
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(many=True, max_length=self.max_batch_size)
+        return super().get_serializer(*args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save()
+        invalidate_hit_caches()
+
+
+@HIT_UPSERT_SCHEMA
+class HitUpsertView(PermitGetAdminModifyMixin, generics.GenericAPIView):
+    """
+    POST: Add the missing artists and hits of a batch of catalog records (admin only).
+
+    Idempotent: posting the same records again inserts nothing. Records are written with
+    a fixed number of queries per batch (see `Hits.catalog.upsert_catalog`), and the caches
+    are invalidated once, only if something was inserted.
+    """
+    queryset = Artist.objects.none()
+    serializer_class = CatalogRecordSerializer
+    max_batch_size = DEFAULT_UPSERT_BATCH_SIZE
+    # advisory lock, artists lookup and INSERT, hits INSERT
+    query_budget = {'POST': 4}
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True, max_length=self.max_batch_size)
+        serializer.is_valid(raise_exception=True)
+        result = upsert_catalog(serializer.validated_data, batch_size=self.max_batch_size)
+        if result.artist_ids:
+            invalidate_hit_caches(models=(Hit, Artist) if result.artists_inserted else (Hit,))
+        return Response(CatalogUpsertResultSerializer(result).data)
+
+
+@HIT_EXPORT_SCHEMA
+class HitExportView(generics.GenericAPIView):
+    """
+    GET: Stream every hit matching the filters as NDJSON (default) or CSV (`?format=csv`).
+
+    The problem:
+        Walking the paginated list to pull the whole catalog takes thousands of requests,
+        each paying for OFFSET and COUNT, and building a full response in memory is not an option.
+    The solution:
+        Rows are read through a server-side cursor in chunks and written to a streaming
+        response as they come, so memory use does not depend on the catalog size.
+        One serializer instance renders every row with the `HitListSerializer` field set.
+    """
+    queryset = Artist.objects.none()
+    serializer_class = HitListSerializer
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = HitFilter
+    ordering_fields = HitListCreateView.ordering_fields
+    ordering = HitListCreateView.ordering
+    export_chunk_size = 2000
+
+    @swagger_safe_queryset
+    def get_queryset(self):
+        return Hit.objects.select_related('artist').all()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # `?format=csv` picks the renderer, the detail views linked from rows cannot render it
+        context['request'] = without_format_override(self.request)
+        return context
+
+    def get(self, request, *args, **kwargs):
+        # filters are validated here, before the response starts
+        queryset = self.filter_queryset(self.get_queryset())
+        # rows are read after the view returns, on the database routed for this request
+        queryset = queryset.using(queryset.db)
+        serializer = self.get_serializer()
+        rows = (serializer.to_representation(hit) for hit in queryset.iterator(chunk_size=self.export_chunk_size))
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(rows, get_flat_field_names(serializer)),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="hits.{renderer.format}"'
+        return response
+
+
 @HIT_DETAIL_SCHEMA
-class HitDetailView(PermitGetAdminModifyMixin, generics.RetrieveUpdateDestroyAPIView):
+class HitDetailView(CacheDetailMixin, PermitGetAdminModifyMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET: Retrieve artist details.
     PUT/PATCH: Update artist (admin only).
     DELETE: Remove artist (admin only).
     """
     queryset = Artist.objects.none()
+    # writes: the hit (with its artist), the new artist when it changes, and the UPDATE/DELETE
+    query_budget = {'GET': 1, 'PUT': 3, 'PATCH': 3, 'DELETE': 2}
 
     @swagger_safe_queryset
     def get_queryset(self):
@@ -60,19 +179,132 @@ class HitDetailView(PermitGetAdminModifyMixin, generics.RetrieveUpdateDestroyAPI
 
 
 @HITS_BY_ARTIST_SCHEMA
-class HitsByArtistView(CacheListMixin, generics.ListAPIView):
+class HitsByArtistView(CacheListMixin, ValuesListMixin, generics.ListAPIView):
     """
-    GET: List artists with their hits, ordered by number of hits descending.
+    GET: List artists with their first hits, ordered by number of hits descending.
+
+    The problem:
+        Prefetching all hits of every artist on the page makes the response size and
+        memory use grow with the biggest catalog on the page.
+    The solution:
+        The prefetch is sliced to `?hits_limit=` hits per artist, which Django runs as a
+        single `ROW_NUMBER() OVER (PARTITION BY artist_id ...)` query, reading only the
+        columns of `HitNestedSerializer`. Every artist links to the full list of its hits.
+        GET responses are built from `.values()` rows by `ArtistWithHitsRowSerializer`,
+        which runs the same hits query.
     """
     queryset = Artist.objects.none()
     serializer_class = ArtistWithHitsSerializer
+    row_serializer_class = ArtistWithHitsRowSerializer
     pagination_class = DefaultPagination
+    cache_dependencies = [Hit, Artist]
+    hits_limit_query_param = 'hits_limit'
+    default_hits_limit = 10
+    max_hits_limit = 100
+    cache_extra_params = [hits_limit_query_param]
+    # count, artists and their first hits
+    query_budget = {'GET': 3}
 
     @swagger_safe_queryset
     def get_queryset(self):
+        hits = (
+            Hit.objects
+            .only('id', 'title', 'created_at', 'artist')
+            .order_by('created_at', 'id')[:self.get_hits_limit(self.request)]
+        )
+        # `hit_count` is a column kept up to date by the database, the ordering is an index scan
         return (
             Artist.objects
-            .prefetch_related('hit')
-            .annotate(hit_count=Count('hit'))
+            .prefetch_related(Prefetch('hit', queryset=hits, to_attr='top_hits'))
             .order_by('-hit_count', 'last_name', 'first_name')
         )
+
+    def get_hits_limit(self, request):
+        """
+        Return the number of hits to embed per artist: `?hits_limit=` capped at `max_hits_limit`,
+        or `default_hits_limit` when missing or invalid.
+        """
+        try:
+            hits_limit = int(request.query_params[self.hits_limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_hits_limit
+        if hits_limit < 0:
+            return self.default_hits_limit
+        return min(hits_limit, self.max_hits_limit)
+
+    def normalize_cache_param(self, name, value):
+        if name == self.hits_limit_query_param:
+            hits_limit = self.get_hits_limit(self.request)
+            return '' if hits_limit == self.default_hits_limit else str(hits_limit)
+        return super().normalize_cache_param(name, value)
+
+
+@ARTIST_HITS_SCHEMA
+class ArtistHitsView(CacheListMixin, generics.ListAPIView):
+    """
+    GET: List hits of one artist, oldest first, keyset paginated on (created_at, id).
+
+    The problem:
+        Paging through the hits of a prolific artist in the hit list pays for OFFSET
+        and COUNT on every page, and any write to any hit invalidates its cache.
+    The solution:
+        Pages are seeks on the (artist, created_at, id) index. Every artist has its own
+        cache namespace, bumped by the signals only when a hit of that artist changes
+        (see `get_artist_hits_namespace`), so other artists' entries stay warm. Set-based writes,
+        which touch any number of artists, bump one generation shared by every artist instead.
+    """
+    queryset = Artist.objects.none()
+    serializer_class = HitNestedSerializer
+    pagination_class = KeysetPagination
+    # invalidated per artist by the signals, not through the dependency registry
+    cache_dependencies = []
+    # hits, and the artist when there are none
+    query_budget = {'GET': 2}
+
+    def get_cache_namespace(self):
+        return get_artist_hits_namespace(self.kwargs['pk'])
+
+    def get_cache_generations(self):
+        return get_cache_generations([ARTIST_HITS_NAMESPACE, self.get_cache_namespace()])
+
+    @swagger_safe_queryset
+    def get_queryset(self):
+        return (
+            Hit.objects
+            .filter(artist_id=self.kwargs['pk'])
+            .only('id', 'title', 'created_at', 'artist')
+            .order_by('created_at', 'id')
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # the artist lookup is only needed when there is nothing to show
+        if not page and not Artist.objects.filter(pk=self.kwargs['pk']).exists():
+            raise NotFound()
+        return page
+
+
+@HIT_SEARCH_SCHEMA
+class HitSearchView(CacheListMixin, generics.ListAPIView):
+    """
+    GET: Full-text search over hit titles and artist names (`?q=`), best matches first.
+
+    Matches come from the stored `Hit.search_vector` (GIN indexed, kept in sync by database
+    triggers), ranked with `ts_rank`. Pages are keyset paginated on (rank, id).
+    """
+    queryset = Artist.objects.none()
+    serializer_class = HitSearchSerializer
+    pagination_class = KeysetPagination
+    cache_dependencies = [Hit, Artist]
+    cache_extra_params = [SEARCH_QUERY_PARAM]
+    query_budget = {'GET': 1}
+
+    @swagger_safe_queryset
+    def get_queryset(self):
+        terms = self.request.query_params.get(SEARCH_QUERY_PARAM, '')
+        return search_hits(normalize_search_query(terms))
+
+    def normalize_cache_param(self, name, value):
+        if name == SEARCH_QUERY_PARAM:
+            return normalize_search_query(value)
+        return super().normalize_cache_param(name, value)
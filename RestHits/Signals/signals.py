@@ -1,33 +1,65 @@
 # Django imports
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
 # Internal imports
 from Artists.models import Artist
 from Hits.models import Hit
+from RestHits.Utils.cache_helpers import (bump_cache_generation, get_artist_hits_namespace, invalidate_artist_caches,
+                                          invalidate_detail_caches, invalidate_hit_caches)
 
 
 def invalidate_view_cache(view_name: str):
     """
     Invalidate all cache entries for a given list view.
 
+    Bumps the generation counter of the view namespace - one run of `BUMP_GENERATION_SCRIPT`,
+    which sets it to max(current + 1, now in ms) with a `GENERATION_TIMEOUT` TTL,
+    regardless of how many entries are cached. Old entries expire through their TTL.
+
     :param view_name: Unique cache key prefix (class name of the view).
     """
-    # pattern matches e.g. "HitListCreateView:*" or "ArtistListCreateView:*"
-    pattern = f"{view_name}:*"
-    cache.delete_pattern(pattern)
+    bump_cache_generation(view_name)
 
 
 @receiver([post_save, post_delete], sender=Hit)
 def on_hit_change(sender, instance, **kwargs):
     """
-    Clear cache when a Hit is created, updated or deleted.
+    Clear cache of every view reading hits when a Hit is created, updated or deleted.
+    Hit lists of a single artist are only cleared for the artist(s) the hit belongs (belonged) to.
+
+    Caches are cleared once the transaction commits: a read in between would cache
+    the old rows again under the new generation.
     """
-    invalidate_view_cache("HitListCreateView")
+    artist_pks = {instance.artist_id, getattr(instance, '_loaded_artist_id', None)} - {None}
+    pk = instance.pk
+
+    def invalidate():
+        invalidate_hit_caches(artist_pks)
+        invalidate_detail_caches("HitDetailView", [pk])
+
+    transaction.on_commit(invalidate, using=kwargs.get('using'))
+    # a later save of the same instance only concerns its current artist
+    instance._loaded_artist_id = instance.artist_id
+
 
 @receiver([post_save, post_delete], sender=Artist)
 def on_artist_change(sender, instance, **kwargs):
     """
-    Clear cache when an Artist is created, updated or deleted.
+    Clear cache of every view reading artists when an Artist is created, updated or deleted.
+    Hit lists embed artist names, so they are invalidated as well.
+    Like `on_hit_change`, caches are cleared once the transaction commits.
     """
-    invalidate_view_cache("ArtistListCreateView")
\ No newline at end of file
+    pk = instance.pk
+    # on delete, the hits are cascaded and evict themselves,
+    # and a freshly created artist has no hits yet (`created` is only sent by post_save)
+    updated = kwargs.get('created') is False
+    deleted = kwargs.get('signal') is post_delete
+
+    def invalidate():
+        invalidate_artist_caches([pk], updated=updated)
+        if deleted:
+            # its hit list now answers 404
+            bump_cache_generation(get_artist_hits_namespace(pk))
+
+    transaction.on_commit(invalidate, using=kwargs.get('using'))
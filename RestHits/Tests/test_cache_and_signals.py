@@ -1,21 +1,45 @@
+# Python imports
+import json
+import threading
+import time
+import unittest
+import uuid
+from unittest import mock
 # Django imports
+from django.db import connection, transaction
 from django.urls import reverse
 from django.core.cache import cache
 from django.contrib.auth import get_user_model
+from django_redis import get_redis_connection
 # DRF imports
 from rest_framework import status
 from rest_framework.test import APITestCase
 # Internal imports
 from Artists.models import Artist
 from Hits.models import Hit
+from Artists.views import ArtistListCreateView
+from Hits.views import HitDetailView
 from RestHits.Signals.signals import invalidate_view_cache
+from RestHits.Utils.cache_helpers import (DETAIL_EVICTED_MARKER, get_cache_generation, get_dependent_namespaces,
+                                          get_detail_cache_key, get_generation_key, invalidate_detail_caches)
+from RestHits.Utils.local_cache import LocalCache, local_cache, invalidation_listener, INVALIDATION_CHANNEL
+from RestHits.Utils.pagination import OptInKeysetPagination
 
 User = get_user_model()
 
 
+def cached_entry_keys(namespace):
+    """
+    Return cached response keys of a namespace, skipping its generation counter and cached counts.
+    """
+    return [k for k in cache.iter_keys(f'{namespace}:*')
+            if not k.endswith(':generation') and ':count:' not in k]
+
+
 class ArtistCacheSignalTests(APITestCase):
     def setUp(self):
         cache.clear()
+        local_cache.clear()
 
         self.user = User.objects.create_user(
             username='user1', password='pass1', email='user1@example.com'
@@ -30,7 +54,7 @@ class ArtistCacheSignalTests(APITestCase):
         self.detail_url = lambda pk: reverse('artists_detail', args=[pk])
 
     def test_get_list_caches_response(self):
-        self.assertFalse(list(cache.iter_keys('*')))
+        self.assertFalse(cached_entry_keys('ArtistListCreateView'))
         resp = self.client.get(self.list_url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         keys = list(cache.iter_keys('*'))
@@ -38,34 +62,45 @@ class ArtistCacheSignalTests(APITestCase):
 
     def test_post_invalidates_and_sets_new_cache(self):
         self.client.get(self.list_url)
-        self.assertTrue(list(cache.iter_keys('*')))
+        old_keys = cached_entry_keys('ArtistListCreateView')
+        self.assertTrue(old_keys)
+        generation = get_cache_generation('ArtistListCreateView')
         data = {'first_name': 'John', 'last_name': 'Smith'}
-        resp = self.client.post(self.list_url, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(self.list_url, data)
         self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
-        self.assertFalse(list(cache.iter_keys('*')))
+        self.assertGreater(get_cache_generation('ArtistListCreateView'), generation)
         resp2 = self.client.get(self.list_url)
         self.assertEqual(resp2.status_code, status.HTTP_200_OK)
-        keys2 = list(cache.iter_keys('*'))
-        self.assertTrue(any(k.startswith('ArtistListCreateView:') for k in keys2))
+        self.assertEqual(resp2.data['count'], 2)
+        new_keys = set(cached_entry_keys('ArtistListCreateView')) - set(old_keys)
+        self.assertEqual(len(new_keys), 1)
 
     def test_patch_invalidates_cache(self):
         self.client.get(self.list_url)
-        self.assertTrue(list(cache.iter_keys('*')))
-        resp = self.client.patch(self.detail_url(self.artist.id), {'last_name': 'Updated'})
+        generation = get_cache_generation('ArtistListCreateView')
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.patch(self.detail_url(self.artist.id), {'last_name': 'Updated'})
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
-        self.assertFalse(list(cache.iter_keys('*')))
+        self.assertGreater(get_cache_generation('ArtistListCreateView'), generation)
+        resp2 = self.client.get(self.list_url)
+        self.assertEqual(resp2.data['results'][0]['last_name'], 'Updated')
 
     def test_delete_invalidates_cache(self):
         self.client.get(self.list_url)
-        self.assertTrue(list(cache.iter_keys('*')))
-        resp = self.client.delete(self.detail_url(self.artist.id))
+        generation = get_cache_generation('ArtistListCreateView')
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.delete(self.detail_url(self.artist.id))
         self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertFalse(list(cache.iter_keys('*')))
+        self.assertGreater(get_cache_generation('ArtistListCreateView'), generation)
+        resp2 = self.client.get(self.list_url)
+        self.assertEqual(resp2.data['count'], 0)
 
 
 class HitCacheSignalTests(APITestCase):
     def setUp(self):
         cache.clear()
+        local_cache.clear()
 
         self.user = User.objects.create_user(
             username='user1', password='pass1', email='user1@example.com'
@@ -90,37 +125,635 @@ class HitCacheSignalTests(APITestCase):
 
     def test_post_invalidates_and_sets_new_cache(self):
         self.client.get(self.list_url)
-        self.assertTrue(list(cache.iter_keys('*')))
+        generation = get_cache_generation('HitListCreateView')
         data = {'artist_id': str(self.artist.id), 'title': 'Another Hit'}
-        resp = self.client.post(self.list_url, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(self.list_url, data)
         self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
-        self.assertFalse(list(cache.iter_keys('*')))
-        self.client.get(self.list_url)
-        self.assertTrue(any(k.startswith('HitListCreateView:') for k in list(cache.iter_keys('*'))))
+        self.assertGreater(get_cache_generation('HitListCreateView'), generation)
+        resp2 = self.client.get(self.list_url)
+        self.assertEqual(resp2.data['count'], 2)
 
     def test_put_patch_delete_invalidates_cache(self):
         self.client.get(self.list_url)
-        self.assertTrue(list(cache.iter_keys('*')))
-        resp_patch = self.client.patch(self.detail_url(self.hit.id), {'title': 'Updated Title'})
+        generation = get_cache_generation('HitListCreateView')
+        with self.captureOnCommitCallbacks(execute=True):
+            resp_patch = self.client.patch(self.detail_url(self.hit.id), {'title': 'Updated Title'})
         self.assertEqual(resp_patch.status_code, status.HTTP_200_OK)
-        self.assertFalse(list(cache.iter_keys('*')))
-        self.client.get(self.list_url)
-        self.assertTrue(list(cache.iter_keys('*')))
-        resp_del = self.client.delete(self.detail_url(self.hit.id))
+        self.assertGreater(get_cache_generation('HitListCreateView'), generation)
+        generation = get_cache_generation('HitListCreateView')
+        resp_list = self.client.get(self.list_url)
+        self.assertEqual(resp_list.data['results'][0]['title'], 'Updated Title')
+        with self.captureOnCommitCallbacks(execute=True):
+            resp_del = self.client.delete(self.detail_url(self.hit.id))
         self.assertEqual(resp_del.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertFalse(list(cache.iter_keys('*')))
+        self.assertGreater(get_cache_generation('HitListCreateView'), generation)
+        resp_list = self.client.get(self.list_url)
+        self.assertEqual(resp_list.data['count'], 0)
+
+    def test_invalidation_waits_for_commit(self):
+        generation = get_cache_generation('HitListCreateView')
+        with self.captureOnCommitCallbacks() as callbacks:
+            Hit.objects.create(artist=self.artist, title='Another Hit')
+        self.assertEqual(get_cache_generation('HitListCreateView'), generation)
+
+        for callback in callbacks:
+            callback()
+        self.assertGreater(get_cache_generation('HitListCreateView'), generation)
+
+    def test_rolled_back_write_does_not_invalidate(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                Hit.objects.create(artist=self.artist, title='Another Hit')
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+
+    def test_cache_key_embeds_generation(self):
+        self.client.get(self.list_url)
+        generation = get_cache_generation('HitListCreateView')
+        self.assertEqual(cached_entry_keys('HitListCreateView'), [f'HitListCreateView:v{generation}:no-params'])
+
+
+class DependencyInvalidationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+        self.admin = User.objects.create_user(
+            username='admin1', password='pass2', email='admin@example.com',
+            is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        self.artist = Artist.objects.create(first_name='Alice', last_name='Cooper')
+        self.hit = Hit.objects.create(artist=self.artist, title='My Song')
+
+    def test_registry_maps_models_to_dependent_views(self):
+        self.assertEqual(get_dependent_namespaces(Hit), ['HitListCreateView', 'HitSearchView', 'HitsByArtistView'])
+        self.assertEqual(get_dependent_namespaces(Artist),
+                         ['ArtistListCreateView', 'HitListCreateView', 'HitSearchView', 'HitsByArtistView'])
+
+    def test_hit_change_invalidates_hits_by_artist(self):
+        resp = self.client.get(reverse('hits_by_artist'))
+        self.assertEqual(resp.data['results'][0]['hit_count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Hit.objects.create(artist=self.artist, title='Second Song')
+
+        resp = self.client.get(reverse('hits_by_artist'))
+        self.assertEqual(resp.data['results'][0]['hit_count'], 2)
+
+    def test_artist_rename_invalidates_hit_list(self):
+        resp = self.client.get(reverse('hits_list_create'))
+        self.assertEqual(resp.data['results'][0]['artist']['last_name'], 'Cooper')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.patch(reverse('artists_detail', args=[self.artist.pk]), {'last_name': 'Renamed'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        resp = self.client.get(reverse('hits_list_create'))
+        self.assertEqual(resp.data['results'][0]['artist']['last_name'], 'Renamed')
+        resp = self.client.get(reverse('hits_by_artist'))
+        self.assertEqual(resp.data['results'][0]['last_name'], 'Renamed')
+
+
+class CacheKeyNormalizationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        artist = Artist.objects.create(first_name='Alice', last_name='Cooper')
+        Hit.objects.create(artist=artist, title='My Song')
+        self.url = reverse('hits_list_create')
+
+    def test_equivalent_queries_share_one_entry(self):
+        for params in ({}, {'page': 1}, {'ordering': 'created_at'}, {'page_size': 20},
+                       {'_': '1718000000'}, {'title': ''}, {'ordering': 'not_a_field'}):
+            resp = self.client.get(self.url, params)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(len(cached_entry_keys('HitListCreateView')), 1)
+
+    def test_param_order_does_not_matter(self):
+        self.client.get(f'{self.url}?title=Song&ordering=-title&page_size=5')
+        self.client.get(f'{self.url}?page_size=5&ordering=-title&title=Song')
+
+        [key] = cached_entry_keys('HitListCreateView')
+        self.assertTrue(key.endswith(':ordering=-title&page_size=5&title=Song'))
+
+    def test_range_filter_params_are_recognized(self):
+        self.client.get(self.url, {'created_at_after': '2020-01-01T00:00:00Z'})
+        self.client.get(self.url, {'created_at_before': '2020-01-01T00:00:00Z'})
+        self.assertEqual(len(cached_entry_keys('HitListCreateView')), 2)
+
+    def test_page_size_is_clamped_like_paginator(self):
+        self.client.get(self.url, {'page_size': 100})
+        self.client.get(self.url, {'page_size': 1000})
+        [key] = cached_entry_keys('HitListCreateView')
+        self.assertTrue(key.endswith(':page_size=100'))
+
+    def test_long_params_are_hashed(self):
+        self.client.get(self.url, {'title': 'x' * 300})
+        [key] = cached_entry_keys('HitListCreateView')
+        self.assertIn(':sha1-', key)
+        self.assertLess(len(key), 100)
+
+    def test_format_override_is_part_of_key(self):
+        resp = self.client.get(self.url, {'format': 'json'})
+        self.assertTrue(resp.data['results'][0]['title_url'].endswith('?format=json'))
+
+        resp = self.client.get(self.url)
+        self.assertNotIn('format=', resp.json()['results'][0]['title_url'])
+        self.assertEqual(len(cached_entry_keys('HitListCreateView')), 2)
+
+    def test_links_are_built_from_canonical_params(self):
+        Hit.objects.create(artist=Artist.objects.get(), title='Another Song')
+        resp = self.client.get(self.url, {'_': '12345', 'foo': 'bar', 'page_size': '1', 'ordering': 'title,nope'})
+        self.assertEqual(resp.json()['next'], 'http://testserver/api/v1/hits/?ordering=title&page=2&page_size=1')
+
+        resp = self.client.get(self.url, {'page_size': '1', 'ordering': 'title'})
+        self.assertNotIn('_=', resp.json()['next'])
+
+
+class RenderedCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        artist = Artist.objects.create(first_name='Alice', last_name='Cooper')
+        Hit.objects.create(artist=artist, title='My Song')
+        self.url = reverse('hits_list_create')
+
+    def test_hit_serves_cached_bytes_identical_to_miss(self):
+        miss = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            hit = self.client.get(self.url)
+
+        self.assertEqual(hit.status_code, status.HTTP_200_OK)
+        self.assertEqual(hit.content, miss.content)
+        self.assertEqual(hit['Content-Type'], miss['Content-Type'])
+        [key] = cached_entry_keys('HitListCreateView')
+        self.assertEqual(cache.get(key)['content'], miss.content)
+
+    def test_browsable_api_bypasses_cache(self):
+        resp = self.client.get(self.url, HTTP_ACCEPT='text/html')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertFalse(cached_entry_keys('HitListCreateView'))
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.artist = Artist.objects.create(first_name='Jane', last_name='Doe')
+        self.url = reverse('artists_list_create')
+
+    def test_list_sends_validators(self):
+        for resp in (self.client.get(self.url), self.client.get(self.url)):
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertTrue(resp['ETag'].startswith('"'))
+            self.assertIn('Last-Modified', resp)
+
+    def test_matching_etag_returns_304_without_queries(self):
+        etag = self.client.get(self.url)['ETag']
+        # drop cached bodies, keep the namespace generation
+        cache.delete_many(cached_entry_keys('ArtistListCreateView'))
+        local_cache.clear()
+
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp['ETag'], etag)
+        self.assertFalse(resp.content)
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, {'page': 1})['ETag'], etag)
+        resp = self.client.get(self.url, {'ordering': '-created_at'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp['ETag'], etag)
+
+    def test_write_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Artist.objects.create(first_name='John', last_name='Smith')
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.json()['count'], 2)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+        resp = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        resp = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2001 00:00:00 GMT')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+
+class StampedeProtectionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        # these tests drive the Redis tier directly
+        patcher = mock.patch.object(ArtistListCreateView, 'cache_local_timeout', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.artist = Artist.objects.create(first_name='Jane', last_name='Doe')
+        self.list_url = reverse('artists_list_create')
+        self.client.get(self.list_url)
+        [self.key] = cached_entry_keys('ArtistListCreateView')
+
+    def _store_entry(self, data, fresh_until):
+        entry = {'content': json.dumps(data).encode(), 'content_type': 'application/json',
+                 'etag': '"test"', 'last_modified': 0, 'fresh_until': fresh_until}
+        cache.set(self.key, entry, 60)
+
+    def test_entry_has_jittered_soft_expiry(self):
+        entry = cache.get(self.key)
+        fresh_for = entry['fresh_until'] - time.time()
+        view = ArtistListCreateView
+        self.assertLessEqual(fresh_for, view.cache_timeout)
+        self.assertGreater(fresh_for, view.cache_timeout * (1 - view.cache_jitter) - 5)
+        self.assertGreater(cache.ttl(self.key), fresh_for)
+
+    def test_stale_entry_is_rebuilt_by_lock_holder(self):
+        self._store_entry({'stale': True}, time.time() - 1)
+        resp = self.client.get(self.list_url)
+        self.assertEqual(resp.data['count'], 1)
+        self.assertGreater(cache.get(self.key)['fresh_until'], time.time())
+
+    def test_stale_entry_is_served_while_another_worker_rebuilds(self):
+        self._store_entry({'stale': True}, time.time() - 1)
+        lock = cache.lock(f'{self.key}:lock', timeout=5)
+        self.assertTrue(lock.acquire(blocking=False))
+        try:
+            with self.assertNumQueries(0):
+                resp = self.client.get(self.list_url)
+        finally:
+            lock.release()
+        self.assertEqual(resp.json(), {'stale': True})
+
+    def test_miss_waits_for_another_worker_rebuild(self):
+        cache.delete(self.key)
+        lock = cache.lock(f'{self.key}:lock', timeout=5)
+        self.assertTrue(lock.acquire(blocking=False))
+        timer = threading.Timer(0.1, self._store_entry, args=({'rebuilt': True}, time.time() + 60))
+        timer.start()
+        try:
+            with self.assertNumQueries(0):
+                resp = self.client.get(self.list_url)
+        finally:
+            timer.join()
+            lock.release()
+        self.assertEqual(resp.json(), {'rebuilt': True})
+
+    def test_miss_rebuilds_itself_when_wait_times_out(self):
+        cache.delete(self.key)
+        lock = cache.lock(f'{self.key}:lock', timeout=5)
+        self.assertTrue(lock.acquire(blocking=False))
+        try:
+            with mock.patch.object(ArtistListCreateView, 'cache_lock_wait', 0.1):
+                resp = self.client.get(self.list_url)
+        finally:
+            lock.release()
+        self.assertEqual(resp.data['count'], 1)
+
+    def test_miss_stops_waiting_when_rebuild_caches_nothing(self):
+        cache.delete(self.key)
+        lock = cache.lock(f'{self.key}:lock', timeout=5)
+        self.assertTrue(lock.acquire(blocking=False))
+        # the other worker's response was not cacheable, e.g. an invalid page
+        timer = threading.Timer(0.1, cache.delete, args=(f'{self.key}:lock',))
+        timer.start()
+        start = time.monotonic()
+        try:
+            resp = self.client.get(self.list_url)
+        finally:
+            timer.join()
+        self.assertLess(time.monotonic() - start, ArtistListCreateView.cache_lock_wait / 2)
+        self.assertEqual(resp.data['count'], 1)
+
+
+class LocalCacheTests(unittest.TestCase):
+    def test_evicts_least_recently_used_to_stay_within_max_bytes(self):
+        local = LocalCache(max_bytes=3000)
+        local.set('ns', 'a', 'A', 700, 60, epoch=0)
+        local.set('ns', 'b', 'B', 700, 60, epoch=0)
+        local.get('a')
+        local.set('ns', 'c', 'C', 700, 60, epoch=0)
+        local.set('ns', 'd', 'D', 700, 60, epoch=0)
+
+        self.assertIsNone(local.get('b'))
+        self.assertEqual([local.get(k) for k in 'acd'], ['A', 'C', 'D'])
+        self.assertLessEqual(local.size, local.max_bytes)
+
+    def test_skips_values_larger_than_max_bytes(self):
+        local = LocalCache(max_bytes=1000)
+        local.set('ns', 'a', 'A', 5000, 60, epoch=0)
+        self.assertIsNone(local.get('a'))
+        self.assertEqual(local.size, 0)
+
+    def test_entries_expire(self):
+        local = LocalCache()
+        local.set('ns', 'a', 'A', 10, 0.01, epoch=0)
+        time.sleep(0.02)
+        self.assertIsNone(local.get('a'))
+
+    def test_drop_namespace_keeps_other_namespaces(self):
+        local = LocalCache()
+        local.set('ns1', 'a', 'A', 10, 60, epoch=0)
+        local.set('ns2', 'b', 'B', 10, 60, epoch=0)
+        local.drop_namespace('ns1')
+        self.assertIsNone(local.get('a'))
+        self.assertEqual(local.get('b'), 'B')
+
+    def test_drop_namespace_drops_nested_namespaces(self):
+        local = LocalCache()
+        epoch = local.get_epoch('ns:1')
+        local.set('ns:1', 'a', 'A', 10, 60, epoch=epoch)
+        local.set('ns1', 'b', 'B', 10, 60, epoch=0)
+        local.drop_namespace('ns')
+        self.assertIsNone(local.get('a'))
+        self.assertEqual(local.get('b'), 'B')
+        local.set('ns:1', 'a', 'A', 10, 60, epoch=epoch)
+        self.assertIsNone(local.get('a'))
+
+    def test_set_is_ignored_after_concurrent_invalidation(self):
+        local = LocalCache()
+        epoch = local.get_epoch('ns')
+        local.drop_namespace('ns')
+        local.set('ns', 'a', 'A', 10, 60, epoch=epoch)
+        self.assertIsNone(local.get('a'))
+
+
+class LocalTierTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        Artist.objects.create(first_name='Jane', last_name='Doe')
+        self.list_url = reverse('artists_list_create')
+        invalidation_listener.ensure_started()
+        self._wait_for(lambda: invalidation_listener.ready)
+
+    def _wait_for(self, condition, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, 'condition not met in time')
+            time.sleep(0.01)
+
+    def test_local_tier_serves_without_redis(self):
+        self.client.get(self.list_url)
+        cache.clear()
+        resp = self.client.get(self.list_url)
+        self.assertEqual(resp.json()['count'], 1)
+        self.assertFalse(cached_entry_keys('ArtistListCreateView'))
+
+    def test_local_write_drops_local_entries_immediately(self):
+        self.client.get(self.list_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Artist.objects.create(first_name='John', last_name='Smith')
+        self.assertEqual(self.client.get(self.list_url).json()['count'], 2)
+
+    def test_broadcast_from_other_worker_drops_local_entries(self):
+        self.client.get(self.list_url)
+        self.assertIsNotNone(local_cache.get('ArtistListCreateView:no-params'))
+
+        get_redis_connection('default').publish(INVALIDATION_CHANNEL, 'ArtistListCreateView')
+
+        self._wait_for(lambda: local_cache.get('ArtistListCreateView:no-params') is None)
+
+    def test_listener_survives_bad_message(self):
+        redis = get_redis_connection('default')
+        redis.publish(INVALIDATION_CHANNEL, b'\xff')
+        self._wait_for(lambda: not invalidation_listener.ready)
+        self._wait_for(lambda: invalidation_listener.ready)
+
+        self.client.get(self.list_url)
+        self.assertIsNotNone(local_cache.get('ArtistListCreateView:no-params'))
+        redis.publish(INVALIDATION_CHANNEL, 'ArtistListCreateView')
+        self._wait_for(lambda: local_cache.get('ArtistListCreateView:no-params') is None)
+
+
+class DetailCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+        self.admin = User.objects.create_user(
+            username='admin1', password='pass2', email='admin@example.com',
+            is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        self.artist = Artist.objects.create(first_name='Alice', last_name='Cooper')
+        self.hit = Hit.objects.create(artist=self.artist, title='My Song')
+        self.other_hit = Hit.objects.create(artist=self.artist, title='Other Song')
+        self.hit_url = reverse('hits_detail', args=[self.hit.pk])
+        self.artist_url = reverse('artists_detail', args=[self.artist.pk])
+
+    def test_get_detail_caches_response(self):
+        resp = self.client.get(self.hit_url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(cache.get(get_detail_cache_key('HitDetailView', self.hit.pk)))
+
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.hit_url)
+        self.assertEqual(resp.json()['title'], 'My Song')
+
+    def test_hit_change_evicts_only_that_hit(self):
+        self.client.get(self.hit_url)
+        self.client.get(reverse('hits_detail', args=[self.other_hit.pk]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.patch(self.hit_url, {'title': 'Updated Title'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(cache.get(get_detail_cache_key('HitDetailView', self.hit.pk))[0], DETAIL_EVICTED_MARKER)
+        self.assertIsNotNone(cache.get(get_detail_cache_key('HitDetailView', self.other_hit.pk)))
+        self.assertEqual(self.client.get(self.hit_url).data['title'], 'Updated Title')
+
+    def test_artist_rename_evicts_artist_and_its_hits(self):
+        self.client.get(self.artist_url)
+        self.client.get(self.hit_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.patch(self.artist_url, {'last_name': 'Renamed'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get(self.artist_url).data['last_name'], 'Renamed')
+        self.assertEqual(self.client.get(self.hit_url).data['artist']['last_name'], 'Renamed')
+
+    def test_eviction_during_rebuild_is_kept(self):
+        get_object = HitDetailView.get_object
+
+        def get_object_then_write(view):
+            hit = get_object(view)
+            # a write commits and evicts while the old row is being rendered
+            invalidate_detail_caches('HitDetailView', [hit.pk])
+            return hit
+
+        with mock.patch.object(HitDetailView, 'get_object', get_object_then_write):
+            self.client.get(self.hit_url)
+        self.assertEqual(cache.get(get_detail_cache_key('HitDetailView', self.hit.pk))[0], DETAIL_EVICTED_MARKER)
+
+    def test_format_override_is_not_kept_in_cached_links(self):
+        self.client.get(self.hit_url, {'format': 'json'})
+        resp = self.client.get(self.hit_url)
+        self.assertEqual(resp.json()['artist']['artist_url'], f'http://testserver{self.artist_url}')
+
+    def test_not_found_is_cached(self):
+        missing_url = reverse('hits_detail', args=[uuid.uuid4()])
+        resp = self.client.get(missing_url)
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+        with self.assertNumQueries(0):
+            resp = self.client.get(missing_url)
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_delete_evicts_detail(self):
+        self.client.get(self.hit_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.delete(self.hit_url)
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get(self.hit_url).status_code, status.HTTP_404_NOT_FOUND)
 
 
 class ManualInvalidateTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
     def test_manual_invalidate_view_cache(self):
-        cache.set('HitListCreateView:foo', 1, 60)
-        cache.set('HitListCreateView:bar', 2, 60)
-        cache.set('ArtistListCreateView:baz', 3, 60)
+        hit_generation = get_cache_generation('HitListCreateView')
+        artist_generation = get_cache_generation('ArtistListCreateView')
 
-        keys = list(cache.iter_keys('*'))
-        self.assertTrue(any(k.startswith('HitListCreateView:') for k in keys))
+        invalidate_view_cache('HitListCreateView')
+        first = get_cache_generation('HitListCreateView')
+        invalidate_view_cache('HitListCreateView')
+        second = get_cache_generation('HitListCreateView')
+
+        self.assertLess(hit_generation, first)
+        self.assertLess(first, second)
+        self.assertEqual(get_cache_generation('ArtistListCreateView'), artist_generation)
 
+    def test_generation_is_seeded_with_current_time(self):
+        before = int(time.time() * 1000)
+        generation = get_cache_generation('HitListCreateView')
+        self.assertGreaterEqual(generation, before)
+        self.assertEqual(get_cache_generation('HitListCreateView'), generation)
+
+    def test_generation_keys_expire(self):
+        get_cache_generation('HitListCreateView')
+        self.assertGreater(cache.ttl(get_generation_key('HitListCreateView')), 0)
+        invalidate_view_cache('ArtistListCreateView')
+        ttl = cache.ttl(get_generation_key('ArtistListCreateView'))
+        self.assertGreater(ttl, ArtistListCreateView.cache_timeout + ArtistListCreateView.cache_stale_timeout)
+
+    def test_invalidate_does_not_scan_keyspace(self):
+        generation = get_cache_generation('HitListCreateView')
+        cache.set(f'HitListCreateView:v{generation}:foo', 1, 60)
         invalidate_view_cache('HitListCreateView')
-        keys_after = list(cache.iter_keys('*'))
-        self.assertFalse(any(k.startswith('HitListCreateView:') for k in keys_after))
-        self.assertTrue(any(k.startswith('ArtistListCreateView:') for k in keys_after))
+        # old entries are left for their TTL, but no longer reachable through the new generation
+        self.assertEqual(cache.get(f'HitListCreateView:v{generation}:foo'), 1)
+        self.assertGreater(get_cache_generation('HitListCreateView'), generation)
+
+
+class CachedCountTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        artist = Artist.objects.create(first_name='Alice', last_name='Cooper')
+        for title in ('Poison', 'School', 'Feed My Frankenstein'):
+            Hit.objects.create(artist=artist, title=title)
+        self.url = reverse('hits_list_create')
+
+    def test_pages_of_one_filter_share_the_count(self):
+        first = self.client.get(self.url, {'page_size': 1})
+        self.assertEqual(first.json()['count'], 3)
+
+        # page and ordering do not change the number of results: only the rows are fetched
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, {'page_size': 1, 'page': 2, 'ordering': '-title'})
+        self.assertEqual(second.json()['count'], 3)
+
+    def test_count_is_cached_per_filter(self):
+        self.assertEqual(self.client.get(self.url, {'title': 'o'}).json()['count'], 2)
+        self.assertEqual(self.client.get(self.url, {'title': 'Poison'}).json()['count'], 1)
+
+    def test_write_invalidates_cached_count(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Hit.objects.create(artist=Artist.objects.get(), title='Bed of Nails')
+        self.assertEqual(self.client.get(self.url, {'page': 2, 'page_size': 1}).json()['count'], 4)
+
+    def test_count_false_skips_count_query(self):
+        with self.assertNumQueries(1):
+            resp = self.client.get(self.url, {'page_size': 2, 'count': 'false'})
+        data = resp.json()
+        self.assertIsNone(data['count'])
+        self.assertEqual(len(data['results']), 2)
+        self.assertIn('page=2', data['next'])
+
+        last = self.client.get(data['next']).json()
+        self.assertIsNone(last['count'])
+        self.assertEqual(len(last['results']), 1)
+        self.assertIsNone(last['next'])
+        self.assertIsNotNone(last['previous'])
+
+    def test_count_false_past_last_page_is_not_found(self):
+        resp = self.client.get(self.url, {'page': 5, 'count': 'false'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_count_param_is_part_of_cache_key(self):
+        self.client.get(self.url, {'count': 'true'})
+        self.client.get(self.url, {'count': 'False'})
+        self.client.get(self.url, {'count': '0'})
+        keys = cached_entry_keys('HitListCreateView')
+        self.assertEqual(len(keys), 2)
+        self.assertTrue(any(key.endswith(':count=false') for key in keys))
+
+    def test_unfiltered_big_table_uses_planner_estimate(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE "Hits_hit"')
+        Hit.objects.create(artist=Artist.objects.get(), title='Bed of Nails')
+
+        with mock.patch.object(OptInKeysetPagination, 'count_estimate_threshold', 1):
+            unfiltered = self.client.get(self.url).json()
+            filtered = self.client.get(self.url, {'title': 'Nails'}).json()
+
+        # the estimate is as of the last ANALYZE, filtered lists are always counted
+        self.assertEqual(unfiltered['count'], 3)
+        self.assertEqual(filtered['count'], 1)
+
+    def test_estimate_does_not_decide_pages(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE "Hits_hit"')
+        artist = Artist.objects.get()
+        for title in ('Bed of Nails', 'Hey Stoopid'):
+            Hit.objects.create(artist=artist, title=title)
+
+        with mock.patch.object(OptInKeysetPagination, 'count_estimate_threshold', 1):
+            # 5 rows, estimated 3: the rows past the estimate are still reachable
+            second = self.client.get(self.url, {'page_size': 2, 'page': 2}).json()
+            self.assertEqual(second['count'], 3)
+            self.assertIn('page=3', second['next'])
+            third = self.client.get(second['next']).json()
+            self.assertEqual(len(third['results']), 1)
+            self.assertIsNone(third['next'])
+
+            # 1 row, estimated 3: pages past the last row do not exist
+            with self.captureOnCommitCallbacks(execute=True):
+                Hit.objects.exclude(title='Poison').delete()
+            self.assertEqual(self.client.get(self.url, {'page_size': 2, 'page': 2}).status_code,
+                             status.HTTP_404_NOT_FOUND)
+
+    def test_last_page_uses_exact_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE "Hits_hit"')
+        artist = Artist.objects.get()
+        for title in ('Bed of Nails', 'Hey Stoopid'):
+            Hit.objects.create(artist=artist, title=title)
+
+        with mock.patch.object(OptInKeysetPagination, 'count_estimate_threshold', 1):
+            last = self.client.get(self.url, {'page_size': 2, 'page': 'last'}).json()
+        self.assertEqual(last['count'], 5)
+        self.assertEqual(len(last['results']), 1)
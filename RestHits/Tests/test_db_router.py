@@ -0,0 +1,166 @@
+# Python imports
+import json
+import unittest
+# Django imports
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+# DRF imports
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+# Internal imports
+from Artists.models import Artist
+from Hits.models import Hit
+from RestHits.middleware import ReplicaRoutingMiddleware, get_primary_pin_keys
+from RestHits.Utils.cache_helpers import invalidate_detail_caches
+from RestHits.Utils.db_router import PrimaryReplicaRouter, read_alias, read_from_primary, read_from_replica
+from RestHits.Utils.local_cache import local_cache
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica_a', 'replica_b'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_use_default_routing_outside_requests(self):
+        self.assertIsNone(self.router.db_for_read(Hit))
+
+    def test_replica_block_reads_from_one_replica(self):
+        with read_from_replica():
+            alias = self.router.db_for_read(Hit)
+            self.assertIn(alias, ['replica_a', 'replica_b'])
+            self.assertEqual(self.router.db_for_read(Artist), alias)
+            with read_from_primary():
+                self.assertEqual(self.router.db_for_read(Hit), 'default')
+            self.assertEqual(self.router.db_for_read(Hit), alias)
+        self.assertIsNone(self.router.db_for_read(Hit))
+
+    def test_writes_and_migrations_use_primary(self):
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_write(Hit), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'Hits'))
+        self.assertFalse(self.router.allow_migrate('replica_a', 'Hits'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        with read_from_replica():
+            self.assertIsNone(self.router.db_for_read(Hit))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_a'], DATABASE_REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.factory = RequestFactory()
+        self.status_code = 200
+        self.middleware = ReplicaRoutingMiddleware(self.get_response)
+
+    def get_response(self, request):
+        # the database reads of the request would go to
+        response = HttpResponse(status=self.status_code)
+        response['X-Read-Alias'] = read_alias.get() or 'default'
+        if request.path == '/login/':
+            response.set_cookie(settings.SESSION_COOKIE_NAME, 'new-session')
+        return response
+
+    def read_alias_of(self, method, path='/', **headers):
+        return self.middleware(getattr(self.factory, method)(path, **headers))['X-Read-Alias']
+
+    def test_anonymous_reads_go_to_replica(self):
+        self.assertEqual(self.read_alias_of('get'), 'replica_a')
+        self.assertEqual(self.read_alias_of('head'), 'replica_a')
+
+    def test_writes_read_from_primary(self):
+        self.assertEqual(self.read_alias_of('post', HTTP_AUTHORIZATION='Token abc'), 'default')
+
+    def test_client_reads_from_primary_after_its_write(self):
+        self.read_alias_of('patch', HTTP_AUTHORIZATION='Token abc')
+        self.assertEqual(self.read_alias_of('get', HTTP_AUTHORIZATION='Token abc'), 'default')
+        # other clients are not affected
+        self.assertEqual(self.read_alias_of('get', HTTP_AUTHORIZATION='Token xyz'), 'replica_a')
+        self.assertEqual(self.read_alias_of('get'), 'replica_a')
+
+    def test_pin_lasts_configured_window(self):
+        request = self.factory.delete('/', HTTP_AUTHORIZATION='Token abc')
+        self.middleware(request)
+        [key] = get_primary_pin_keys(request)
+        self.assertTrue(0 < cache.ttl(key) <= 5)
+
+    def test_failed_write_does_not_pin(self):
+        self.status_code = 400
+        self.read_alias_of('post', HTTP_AUTHORIZATION='Token abc')
+        self.status_code = 200
+        self.assertEqual(self.read_alias_of('get', HTTP_AUTHORIZATION='Token abc'), 'replica_a')
+
+    def test_session_set_by_write_is_pinned(self):
+        self.read_alias_of('post', '/login/')
+        self.factory.cookies[settings.SESSION_COOKIE_NAME] = 'new-session'
+        self.assertEqual(self.read_alias_of('get'), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_not_used_without_replicas(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaRoutingMiddleware(self.get_response)
+
+
+# Replica aliases, which mirror `default` in tests; the test runner routes no reads to them.
+REPLICA_STAND_INS = [alias for alias, database in settings.DATABASES.items()
+                     if database.get('TEST', {}).get('MIRROR') == DEFAULT_DB_ALIAS]
+
+
+@unittest.skipUnless(REPLICA_STAND_INS, 'needs a replica stand-in, e.g. POSTGRES_REPLICA_HOSTS=<primary host>')
+@override_settings(DATABASE_REPLICAS=REPLICA_STAND_INS)
+class ReplicaStandInTests(APITestCase):
+    """
+    The replica alias is a second connection to the test database, which does not see
+    the uncommitted writes of the test transaction - like a replica that has not caught up yet.
+    """
+    databases = {DEFAULT_DB_ALIAS, *REPLICA_STAND_INS}
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass')
+        self.token = Token.objects.create(user=self.admin)
+        self.artist = Artist.objects.create(first_name='Freddie', last_name='Mercury')
+
+    def exported_titles(self, **headers):
+        response = self.client.get(reverse('hits_export'), **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [json.loads(line)['title'] for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_reads_your_writes(self):
+        auth = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+        response = self.client.post(reverse('hits_list_create'),
+                                    {'artist_id': self.artist.pk, 'title': 'Bohemian Rhapsody'}, format='json', **auth)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.exported_titles(**auth), ['Bohemian Rhapsody'])
+        # anonymous reads go to the replica, which does not have the write yet
+        self.assertEqual(self.exported_titles(), [])
+
+    def test_cache_fills_read_from_primary_after_invalidation(self):
+        Hit.objects.create(artist=self.artist, title='Bohemian Rhapsody')
+        response = self.client.get(reverse('hits_list_create'))
+        self.assertEqual([hit['title'] for hit in response.json()['results']], ['Bohemian Rhapsody'])
+
+    def test_detail_fill_reads_from_primary_after_eviction(self):
+        hit = Hit.objects.create(artist=self.artist, title='Bohemian Rhapsody')
+        invalidate_detail_caches('HitDetailView', [hit.pk])
+        response = self.client.get(reverse('hits_detail', args=[hit.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_miss_uses_default_routing(self):
+        hit = Hit.objects.create(artist=self.artist, title='Bohemian Rhapsody')
+        # nothing was evicted, so a lookup of an unknown pk does not load the primary
+        response = self.client.get(reverse('hits_detail', args=[hit.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
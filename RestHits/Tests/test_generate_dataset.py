@@ -0,0 +1,53 @@
+# Python imports
+from io import StringIO
+# Django imports
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+# Internal imports
+from Artists.models import Artist
+from Hits.models import Hit
+from RestHits.management.commands.generate_dataset import get_zipf_counts
+
+
+class ZipfCountsTests(SimpleTestCase):
+    def test_counts_sum_up_to_total(self):
+        for total, buckets, skew in [(1000, 7, 1.0), (10, 20, 1.2), (999, 3, 0)]:
+            with self.subTest(total=total, buckets=buckets, skew=skew):
+                counts = get_zipf_counts(total, buckets, skew)
+                self.assertEqual(len(counts), buckets)
+                self.assertEqual(sum(counts), total)
+
+    def test_counts_follow_rank(self):
+        self.assertEqual(get_zipf_counts(120, 3, 1.0), [65, 33, 22])
+        self.assertEqual(get_zipf_counts(9, 3, 0), [3, 3, 3])
+
+
+class GenerateDatasetTests(TestCase):
+    def generate(self, *args):
+        out = StringIO()
+        call_command('generate_dataset', '--artists', '20', '--hits', '500', '--batch-size', '200', *args, stdout=out)
+        return out.getvalue()
+
+    def test_generates_skewed_dataset(self):
+        output = self.generate()
+
+        self.assertIn('Hits: 500 / 500', output)
+        counts = list(Artist.objects.order_by('-hit_count').values_list('hit_count', flat=True))
+        self.assertEqual(counts, sorted(get_zipf_counts(500, 20, 1.0), reverse=True))
+        self.assertEqual(Artist.objects.values('first_name', 'last_name').distinct().count(), 20)
+        for hit in Hit.objects.select_related('artist')[:50]:
+            self.assertGreaterEqual(hit.created_at, hit.artist.created_at)
+
+    def test_same_seed_generates_same_dataset(self):
+        self.generate('--seed', '3')
+        first = list(Hit.objects.order_by('id').values_list('id', 'title', 'artist_id', 'created_at'))
+        Artist.objects.all().delete()
+
+        self.generate('--seed', '3')
+        self.assertEqual(list(Hit.objects.order_by('id').values_list('id', 'title', 'artist_id', 'created_at')),
+                         first)
+
+    def test_existing_seed_is_rejected(self):
+        self.generate()
+        with self.assertRaisesMessage(CommandError, 'use another --seed'):
+            self.generate()
@@ -0,0 +1,94 @@
+# Python imports
+from unittest import mock
+# Django imports
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase
+from django.urls import URLPattern, URLResolver, reverse
+# DRF imports
+from rest_framework import status
+from rest_framework.test import APITestCase
+# Internal imports
+from Artists.models import Artist
+from Hits.models import Hit
+from Hits.views import HitExportView, HitListCreateView
+from RestHits import api_v1_urls
+from RestHits.Utils.local_cache import local_cache
+from RestHits.Utils.query_budget import (QueryBudgetExceeded, QueryRecorder, get_query_budget,
+                                         get_query_fingerprint)
+
+
+def get_view_classes(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from get_view_classes(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback.cls
+
+
+class QueryRecorderTests(SimpleTestCase):
+    def record(self, *queries):
+        recorder = QueryRecorder()
+        for sql in queries:
+            recorder(lambda *args: None, sql, [], False, {})
+        return recorder
+
+    def test_fingerprint_ignores_length_of_placeholder_lists(self):
+        self.assertEqual(get_query_fingerprint('SELECT 1 WHERE id IN (%s, %s, %s) AND a = %s'),
+                         get_query_fingerprint('SELECT 1 WHERE id IN (%s, %s) AND a = %s'))
+
+    def test_duplicates_are_repeated_fingerprints(self):
+        recorder = self.record('SELECT a WHERE id = %s', 'SELECT a WHERE id = %s', 'SELECT a WHERE id = %s',
+                               'SELECT b')
+        self.assertEqual(recorder.count, 4)
+        self.assertEqual(recorder.get_duplicates(), {'SELECT a WHERE id = %s': 3})
+
+    def test_savepoints_are_not_counted(self):
+        recorder = self.record('SAVEPOINT "s1"', 'INSERT INTO t VALUES (%s)', 'RELEASE SAVEPOINT "s1"')
+        self.assertEqual(recorder.queries, ['INSERT INTO t VALUES (%s)'])
+
+    def test_budget_allows_token_lookup(self):
+        factory = RequestFactory()
+        self.assertEqual(get_query_budget(HitListCreateView, factory.get('/')), 2)
+        self.assertEqual(get_query_budget(HitListCreateView, factory.get('/', HTTP_AUTHORIZATION='Token abc')), 3)
+        self.assertIsNone(get_query_budget(HitListCreateView, factory.put('/')))
+        self.assertIsNone(get_query_budget(None, factory.get('/')))
+
+    def test_every_api_view_has_a_budget_per_method(self):
+        for view_class in get_view_classes(api_v1_urls.urlpatterns):
+            # streamed rows are read after the middleware has returned
+            if view_class is HitExportView:
+                continue
+            methods = {method.upper() for method in view_class.http_method_names
+                       if method not in ('head', 'options') and hasattr(view_class, method)}
+            with self.subTest(view=view_class.__name__):
+                self.assertEqual(set(view_class.query_budget), methods)
+
+
+class QueryInstrumentationMiddlewareTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        artist = Artist.objects.create(first_name='Freddie', last_name='Mercury')
+        Hit.objects.create(artist=artist, title='Bohemian Rhapsody')
+        self.url = reverse('hits_list_create')
+
+    def test_headers(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertEqual(response['X-Query-Duplicates'], '0')
+        self.assertEqual(response['X-Query-Budget'], '2')
+        self.assertGreater(float(response['X-Query-Time-Ms']), 0)
+
+    def test_cached_response_runs_no_query(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url)['X-Query-Count'], '0')
+
+    def test_request_over_budget_fails(self):
+        with mock.patch.object(HitListCreateView, 'query_budget', {'GET': 1}):
+            with self.assertRaisesMessage(QueryBudgetExceeded, 'ran 2 queries, over the budget of 1'):
+                self.client.get(self.url)
+
+    def test_view_without_budget(self):
+        response = self.client.get(reverse('hits_export'))
+        self.assertNotIn('X-Query-Budget', response)
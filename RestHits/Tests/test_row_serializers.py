@@ -0,0 +1,105 @@
+# Python imports
+from datetime import timedelta
+from unittest import mock
+# Django imports
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+# DRF imports
+from rest_framework import status
+from rest_framework.test import APITestCase
+# Internal imports
+from Artists.models import Artist
+from Artists.views import ArtistListCreateView
+from Hits.models import Hit
+from Hits.views import HitListCreateView, HitsByArtistView
+from RestHits.Utils.local_cache import local_cache
+
+
+class RowSerializerParityTests(APITestCase):
+    """
+    Responses built from `.values()` rows must be byte-identical to the serializer ones.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now().replace(microsecond=123456)
+        names = [('Freddie', 'Mercury'), ('Björk', 'Guðmundsdóttir'), ('Alice', 'Cooper'), ('"Weird Al"', 'Yankovic')]
+        artists = [Artist.objects.create(first_name=first, last_name=last) for first, last in names]
+        Artist.objects.create(first_name='Annie', last_name='Lennox')  # no hits
+        for i in range(45):
+            Hit.objects.create(
+                artist=artists[i % len(artists)],
+                title=f'Żółta łódź {i % 7} "{i}"' if i % 3 else f'Title {i:02}',
+                # equal timestamps, and one with whole seconds
+                created_at=now - timedelta(minutes=i // 4, microseconds=0 if i == 5 else i),
+            )
+
+    def _get(self, view_class, url, params=None, row_serializers=True):
+        cache.clear()
+        local_cache.clear()
+        if row_serializers:
+            return self.client.get(url, params)
+        with mock.patch.object(view_class, 'row_serializer_class', None):
+            return self.client.get(url, params)
+
+    def assert_parity(self, view_class, url, params=None):
+        fast = self._get(view_class, url, params)
+        slow = self._get(view_class, url, params, row_serializers=False)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(slow.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_hit_list(self):
+        url = reverse('hits_list_create')
+        for params in ({}, {'page': 2}, {'page_size': 100}, {'count': 'false'}, {'ordering': '-title'},
+                       {'ordering': 'artist__last_name,-created_at'}, {'title': 'łódź'},
+                       {'artist_name': 'bjö'}, {'format': 'json'}):
+            with self.subTest(params=params):
+                self.assert_parity(HitListCreateView, url, params)
+
+    def test_hit_list_cursor_pages(self):
+        for params in ({'cursor': '', 'page_size': 7}, {'cursor': '', 'ordering': 'artist__first_name,-created_at'}):
+            with self.subTest(params=params):
+                response = self.assert_parity(HitListCreateView, reverse('hits_list_create'), params)
+                pages = 1
+                while response.json()['next']:
+                    response = self.assert_parity(HitListCreateView, response.json()['next'])
+                    pages += 1
+                self.assertGreater(pages, 1)
+                previous = response.json()['previous']
+                self.assert_parity(HitListCreateView, previous)
+
+    def test_artist_list(self):
+        url = reverse('artists_list_create')
+        for params in ({}, {'page_size': 2, 'page': 2}, {'ordering': '-created_at'}, {'last_name': 'o'},
+                       {'count': '0'}):
+            with self.subTest(params=params):
+                self.assert_parity(ArtistListCreateView, url, params)
+
+    def test_hits_by_artist(self):
+        url = reverse('hits_by_artist')
+        for params in ({}, {'hits_limit': 0}, {'hits_limit': 3}, {'hits_limit': 1000}, {'page_size': 2, 'page': 2}):
+            with self.subTest(params=params):
+                self.assert_parity(HitsByArtistView, url, params)
+
+    @override_settings(TIME_ZONE='Europe/Warsaw')
+    def test_datetimes_in_local_timezone(self):
+        response = self.assert_parity(HitListCreateView, reverse('hits_list_create'))
+        self.assertTrue(response.json()['results'][0]['created_at'].endswith(('+01:00', '+02:00')))
+        self.assert_parity(HitsByArtistView, reverse('hits_by_artist'))
+
+    def test_rows_are_not_model_instances(self):
+        with mock.patch.object(Hit, 'from_db', side_effect=AssertionError), \
+                mock.patch.object(Artist, 'from_db', side_effect=AssertionError):
+            for url in (reverse('hits_list_create'), reverse('artists_list_create'), reverse('hits_by_artist')):
+                self.assertEqual(self._get(None, url).status_code, status.HTTP_200_OK)
+
+    def test_hits_by_artist_query_count(self):
+        # count of the page, artists, their limited hits
+        cache.clear()
+        local_cache.clear()
+        with self.assertNumQueries(3):
+            self.client.get(reverse('hits_by_artist'), {'hits_limit': 2})
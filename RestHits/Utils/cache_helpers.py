@@ -0,0 +1,343 @@
+# Python imports
+import hashlib
+import time
+import uuid
+from collections import defaultdict
+from functools import lru_cache
+from urllib.parse import urlencode
+# Django imports
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from django_filters.widgets import SuffixedMultiWidget
+# Internal imports
+from Artists.models import Artist
+from Hits.models import Hit
+from .local_cache import local_cache, INVALIDATION_CHANNEL
+
+# Query strings longer than this are hashed, to keep Redis keys short and bounded.
+MAX_PARAMS_KEY_LENGTH = 200
+
+# Lifetime of a generation counter after its last write. Longer than any entry of a generation
+# lives (`cache_timeout` + `cache_stale_timeout`); an expired counter is seeded again with the
+# current time, which is newer than any generation it had, so it is never reused either.
+GENERATION_TIMEOUT = 60 * 60
+
+# Sets the generation to max(current + 1, now in ms): strictly increasing, and never reused
+# after Redis loses its data, since it follows the clock. A missing key counts as 0.
+BUMP_GENERATION_SCRIPT = """
+local generation = math.max(tonumber(redis.call('GET', KEYS[1]) or '0') + 1, tonumber(ARGV[1]))
+redis.call('SET', KEYS[1], generation, 'PX', ARGV[2])
+return generation
+"""
+
+# Generation shared by the hit lists of all artists (see `get_artist_hits_namespace`),
+# bumped by writes that may touch any number of artists.
+ARTIST_HITS_NAMESPACE = 'ArtistHitsView'
+
+# Left in place of evicted detail entries for `DATABASE_REPLICA_PIN_SECONDS`, as
+# (DETAIL_EVICTED_MARKER, unique token): their next build reads from the primary, which
+# already has the write a lagging replica may still miss.
+DETAIL_EVICTED_MARKER = 'evicted'
+
+# Stores a detail entry only if the key still holds the bytes read before the entry was built
+# (ARGV[1], empty when the key was missing), so a build cannot overwrite a later eviction.
+SET_IF_UNCHANGED_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+# Maps a model label (e.g. "Hits.Hit") to the cache namespaces whose entries read that model.
+# Filled by `register_cache_dependencies`, see `CacheListMixin.cache_dependencies`.
+CACHE_DEPENDENCY_REGISTRY = defaultdict(set)
+
+
+def get_generation_key(namespace: str) -> str:
+    """
+    Build the cache key holding the generation counter of a namespace.
+
+    :param namespace: Cache namespace (class name of the view).
+    :return: Cache key string, e.g. "HitListCreateView:generation".
+    """
+    return f'{namespace}:generation'
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def get_cache_generation(namespace: str) -> int:
+    """
+    Return the current generation number of a cache namespace.
+
+    Generations are millisecond timestamps of the last invalidation, so they double
+    as the Last-Modified time of the namespace. A namespace without a counter yet
+    (never invalidated, or Redis lost its data) is seeded with the current time.
+
+    :param namespace: Cache namespace (class name of the view).
+    :return: Current generation number.
+    """
+    return get_cache_generations([namespace])[0]
+
+
+def get_cache_generations(namespaces) -> list[int]:
+    """
+    Return the current generation numbers of several cache namespaces in one round trip
+    (see `get_cache_generation`).
+
+    :param namespaces: Iterable of cache namespaces.
+    :return: Generation numbers, in the order of `namespaces`.
+    """
+    keys = [get_generation_key(namespace) for namespace in namespaces]
+    generations = cache.get_many(keys)
+    missing = [key for key in keys if key not in generations]
+    if missing:
+        for key in missing:
+            cache.add(key, now_ms(), timeout=GENERATION_TIMEOUT)
+        generations.update(cache.get_many(missing))
+    return [generations[key] for key in keys]
+
+
+def get_generations_key_part(generations) -> str:
+    """
+    Turn the generations a cache entry depends on into the version part of its key, e.g. "123.456".
+    """
+    return '.'.join(str(generation) for generation in generations)
+
+
+def bump_cache_generation(namespace: str) -> int:
+    """
+    Invalidate every cache entry of a namespace with a single counter bump.
+
+    The problem:
+        Deleting all keys of a namespace requires a SCAN over the whole Redis keyspace,
+        which gets slower with every cached filter/page combination.
+    The solution:
+        Cache keys embed the generation number of their namespace. Bumping the counter
+        makes all existing entries unreachable in O(1); they expire through their own TTL.
+
+    :param namespace: Cache namespace (class name of the view).
+    :return: New generation number.
+    """
+    return bump_cache_generations([namespace])[0]
+
+
+def bump_cache_generations(namespaces) -> list[int]:
+    """
+    Bump generation counters of several namespaces in one pipelined Redis round trip.
+
+    The same round trip broadcasts the namespaces on the invalidation channel, so every
+    worker drops its in-process entries of them (see `RestHits.Utils.local_cache`).
+
+    :param namespaces: Iterable of cache namespaces.
+    :return: New generation numbers, in the order of `namespaces`.
+    """
+    namespaces = list(namespaces)
+    # Django's cache API has no atomic read-modify-write for this, so go to the raw client,
+    # using `make_key` to keep the key prefix/version of the cache.
+    client = get_redis_connection('default')
+    bump = client.register_script(BUMP_GENERATION_SCRIPT)
+    timestamp = now_ms()
+    pipeline = client.pipeline(transaction=False)
+    for namespace in namespaces:
+        bump(keys=[cache.make_key(get_generation_key(namespace))], args=[timestamp, GENERATION_TIMEOUT * 1000],
+             client=pipeline)
+    for namespace in namespaces:
+        pipeline.publish(INVALIDATION_CHANNEL, namespace)
+    results = pipeline.execute()
+    # this worker does not have to wait for its own broadcast
+    for namespace in namespaces:
+        local_cache.drop_namespace(namespace)
+    return results[:len(namespaces)]
+
+
+def register_cache_dependencies(namespace: str, models) -> None:
+    """
+    Declare that cache entries of `namespace` are built from rows of `models`.
+
+    :param namespace: Cache namespace (class name of the view).
+    :param models: Iterable of model classes read by the view.
+    """
+    for model in models:
+        CACHE_DEPENDENCY_REGISTRY[model._meta.label].add(namespace)
+
+
+def get_dependent_namespaces(model) -> list[str]:
+    """
+    Return the cache namespaces that have to be invalidated when `model` changes.
+
+    :param model: Model class (or instance) that was written.
+    :return: Sorted list of namespaces.
+    """
+    return sorted(CACHE_DEPENDENCY_REGISTRY[model._meta.label])
+
+
+def invalidate_dependent_caches(model) -> None:
+    """
+    Invalidate every cache namespace that depends on `model`, in one round trip.
+
+    :param model: Model class (or instance) that was written.
+    """
+    namespaces = get_dependent_namespaces(model)
+    if namespaces:
+        bump_cache_generations(namespaces)
+
+
+def get_detail_cache_key(namespace: str, pk) -> str:
+    """
+    Build the cache key of a single object served by a detail view.
+
+    :param namespace: Cache namespace (class name of the view).
+    :param pk: Primary key of the object.
+    :return: Cache key string, e.g. "HitDetailView:obj:<uuid>".
+    """
+    return f'{namespace}:obj:{pk}'
+
+
+def get_detail_cache_entry(key: str) -> tuple[bytes | None, object]:
+    """
+    Read a detail entry together with the bytes it is stored as, which serve as its version
+    for `set_detail_cache_entry`.
+
+    :param key: Cache key, see `get_detail_cache_key`.
+    :return: Tuple (stored bytes or None, decoded entry or None).
+    """
+    raw = get_redis_connection('default').get(cache.make_key(key))
+    return raw, None if raw is None else cache.client.decode(raw)
+
+
+def set_detail_cache_entry(key: str, version: bytes | None, entry, timeout: int) -> bool:
+    """
+    Store a detail entry unless the key changed since `version` was read.
+
+    The problem:
+        A miss loads the object while a write commits and evicts it; a plain `set` after
+        the load would put the pre-write object back for the whole `cache_timeout`.
+    The solution:
+        Compare and set in one script: every eviction writes a marker with a unique token,
+        so the stored bytes differ from `version` once anything evicted the entry.
+
+    :param key: Cache key, see `get_detail_cache_key`.
+    :param version: Bytes returned by `get_detail_cache_entry` before the entry was built.
+    :param entry: Entry to store.
+    :param timeout: Time in seconds to keep the entry.
+    :return: Whether the entry was stored.
+    """
+    client = get_redis_connection('default')
+    store = client.register_script(SET_IF_UNCHANGED_SCRIPT)
+    return bool(store(keys=[cache.make_key(key)], args=[version or b'', cache.client.encode(entry), int(timeout)]))
+
+
+def invalidate_detail_caches(namespace: str, pks) -> None:
+    """
+    Evict cached entries (including cached 404s) of the given objects of a detail view,
+    marking them as recently evicted, see `DETAIL_EVICTED_MARKER`.
+
+    :param namespace: Cache namespace (class name of the view).
+    :param pks: Iterable of primary keys.
+    """
+    markers = {get_detail_cache_key(namespace, pk): (DETAIL_EVICTED_MARKER, uuid.uuid4().hex) for pk in pks}
+    if markers:
+        cache.set_many(markers, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def get_artist_hits_namespace(artist_pk) -> str:
+    """
+    Return the cache namespace of the hits of one artist.
+
+    :param artist_pk: Primary key of the artist.
+    :return: Namespace string, e.g. "ArtistHitsView:<uuid>".
+    """
+    return f'{ARTIST_HITS_NAMESPACE}:{artist_pk}'
+
+
+def invalidate_hit_caches(artist_pks=None, models=(Hit,)) -> None:
+    """
+    Invalidate the list caches reading hits and the hit lists of the given artists,
+    in one round trip. Writes that send no signals (bulk inserts, imports) call it
+    once per batch, `on_hit_change` once per hit.
+
+    :param artist_pks: Primary keys of the artists whose hits were written. None for set-based
+        writes, which invalidate the hit lists of every artist with a single bump, however
+        many artists they touched.
+    :param models: Models written, e.g. also `Artist` when artists were inserted.
+    """
+    namespaces = sorted({namespace for model in models for namespace in get_dependent_namespaces(model)})
+    if artist_pks is None:
+        namespaces.append(ARTIST_HITS_NAMESPACE)
+    else:
+        namespaces += sorted(get_artist_hits_namespace(pk) for pk in artist_pks)
+    bump_cache_generations(namespaces)
+
+
+def invalidate_artist_caches(artist_pks, updated: bool) -> None:
+    """
+    Clear cache of every view reading artists after the given artists were written,
+    with a single bump of the dependent namespaces however many artists there are.
+
+    :param artist_pks: Primary keys of the written artists.
+    :param updated: Whether existing artists were updated; hit details embed the artist,
+        so those of their hits are evicted as well.
+    """
+    invalidate_dependent_caches(Artist)
+    invalidate_detail_caches("ArtistDetailView", artist_pks)
+    if updated:
+        hit_pks = Hit.objects.filter(artist_id__in=artist_pks).values_list('pk', flat=True)
+        invalidate_detail_caches("HitDetailView", hit_pks)
+
+
+@lru_cache(maxsize=None)
+def get_filterset_param_names(filterset_class) -> frozenset[str]:
+    """
+    Return the query param names a FilterSet reads.
+
+    Range filters read suffixed params, e.g. `created_at` reads `created_at_after`
+    and `created_at_before`.
+
+    :param filterset_class: django-filter FilterSet class.
+    :return: Set of query param names.
+    """
+    names = set()
+    for name, filter_ in filterset_class.base_filters.items():
+        widget = filter_.field.widget
+        if isinstance(widget, SuffixedMultiWidget):
+            names.update(widget.suffixed(name, suffix) for suffix in widget.suffixes)
+        else:
+            names.add(name)
+    return frozenset(names)
+
+
+def build_params_key_part(params) -> str:
+    """
+    Turn canonical (name, value) pairs into the query part of a cache key.
+
+    :param params: Sorted list of (name, value) pairs.
+    :return: Urlencoded params, "no-params" when empty, or a hash when too long.
+    """
+    encoded = urlencode(params)
+    if not encoded:
+        # avoid a key ending with ':'
+        return 'no-params'
+    if len(encoded) > MAX_PARAMS_KEY_LENGTH:
+        return f'sha1-{hashlib.sha1(encoded.encode()).hexdigest()}'
+    return encoded
+
+
+def get_cache_validators(namespace: str, generations, params_part: str) -> tuple[str, int]:
+    """
+    Build HTTP validators of a cached list response, without touching its body or the database.
+
+    A response only changes when one of its generations changes, so the pair
+    (generations, canonical params) identifies its content.
+
+    :param namespace: Cache namespace (class name of the view).
+    :param generations: Current generations the response depends on (see `CacheListMixin.get_cache_generations`).
+    :param params_part: Canonical query params key fragment.
+    :return: Tuple (strong ETag, Last-Modified as a Unix timestamp).
+    """
+    version = get_generations_key_part(generations)
+    digest = hashlib.sha1(f'{namespace}:{version}:{params_part}'.encode()).hexdigest()
+    return f'"{digest}"', max(generations) // 1000
@@ -0,0 +1,74 @@
+# Python imports
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+# Django imports
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Alias the reads of the current request (or block) go to, None for Django's default routing.
+read_alias = ContextVar('read_alias', default=None)
+
+
+def get_replica_aliases() -> list[str]:
+    """
+    Return the database aliases of the read replicas (see `DATABASE_REPLICAS` in settings).
+    """
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Send reads inside the block to one replica, picked at random.
+
+    A single replica serves the whole block, so its queries do not mix
+    replicas that lag by different amounts. Without replicas, reads stay on the primary.
+    """
+    replicas = get_replica_aliases()
+    token = read_alias.set(random.choice(replicas) if replicas else None)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+@contextmanager
+def read_from_primary():
+    """
+    Send reads inside the block to the primary, e.g. to build data shared with other clients
+    right after a write, which the replicas may not have yet.
+    """
+    token = read_alias.set(DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send reads to the alias chosen for the current request, and everything else to the primary.
+
+    The problem:
+        Nearly all traffic is anonymous GETs, yet every query goes to the single primary,
+        which also has to serve the writes.
+    The solution:
+        `ReplicaRoutingMiddleware` marks safe requests with `read_from_replica()`, so their
+        reads go to a streaming replica. Writes, migrations and reads outside of such requests
+        (writes, management commands, clients pinned after a write) use the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas follow the schema of the primary through replication
+        return db == DEFAULT_DB_ALIAS
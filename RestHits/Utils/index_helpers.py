@@ -0,0 +1,24 @@
+# Django imports
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models import TextField
+from django.db.models.functions import Cast, Upper
+
+
+def icontains_trigram_index(field_name: str, name: str) -> GinIndex:
+    """
+    Build a GIN trigram index that serves `icontains` lookups on a text column.
+
+    The problem:
+        On Postgres `icontains` compiles to `UPPER(col::text) LIKE UPPER('%x%')`. A leading
+        wildcard cannot use a B-tree index, so every such filter is a sequential scan.
+    The solution:
+        A `pg_trgm` GIN index over exactly that expression. The planner matches the index
+        expression with the one in the WHERE clause and answers the LIKE from trigrams,
+        so the `icontains` filters keep working unchanged. Needs the `pg_trgm` extension
+        (see `TrigramExtension` in the migrations).
+
+    :param field_name: Name of the CharField/TextField to index.
+    :param name: Index name (expression indexes need an explicit name).
+    :return: GinIndex to put in `Meta.indexes`.
+    """
+    return GinIndex(OpClass(Upper(Cast(field_name, output_field=TextField())), name='gin_trgm_ops'), name=name)
@@ -0,0 +1,171 @@
+# Python imports
+import os
+import threading
+import time
+from collections import OrderedDict
+# Django imports
+from django_redis import get_redis_connection
+
+# Redis pub/sub channel carrying the names of invalidated cache namespaces.
+INVALIDATION_CHANNEL = 'RestHits:cache-invalidation'
+# Upper bound of the memory used by cached bodies in a single worker process.
+LOCAL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+# Approximate per-entry bookkeeping cost (key, tuple, OrderedDict node), added to the body size.
+ENTRY_OVERHEAD_BYTES = 256
+# Delay before the listener reconnects after losing its Redis connection (or failing on a message).
+LISTENER_RECONNECT_DELAY = 1.0
+
+
+class LocalCache:
+    """
+    Per-process LRU cache of rendered responses, bounded by the total size of stored bodies.
+
+    Used as the first tier in front of Redis (see `CacheListMixin`). Entries are grouped
+    by cache namespace, so an invalidation can drop all entries of a view at once.
+
+    The problem:
+        A namespace may be invalidated between reading its entry from Redis and storing it here,
+        and the stale entry would then be served for the whole local TTL.
+    The solution:
+        Every drop of a namespace bumps its local epoch. Callers read the epoch before going
+        to Redis and pass it to `set()`, which ignores the write if the epoch changed meanwhile.
+
+    Namespaces nest on ':', e.g. "ArtistHitsView:<uuid>" is inside "ArtistHitsView":
+    dropping a namespace drops the nested ones as well.
+    """
+
+    def __init__(self, max_bytes=LOCAL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # key -> (namespace, expires_at, value, size)
+        self._epochs = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the value stored under `key`, or None if missing or expired.
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[1] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[2]
+
+    def get_epoch(self, namespace):
+        """
+        Return the current local epoch of a namespace, to be passed to `set()`.
+        """
+        with self._lock:
+            return self._get_epoch(namespace)
+
+    def set(self, namespace, key, value, size, timeout, epoch):
+        """
+        Store `value` under `key` for `timeout` seconds, evicting least recently used entries
+        to stay within `max_bytes`.
+
+        :param namespace: Cache namespace the entry belongs to.
+        :param key: Entry key.
+        :param value: Value to store.
+        :param size: Size of the value in bytes.
+        :param timeout: Time in seconds to keep the entry.
+        :param epoch: Namespace epoch read before the value was fetched.
+        """
+        size += ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if self._get_epoch(namespace) != epoch:
+                # the namespace was invalidated while the value was being fetched
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (namespace, time.monotonic() + timeout, value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def drop_namespace(self, namespace):
+        """
+        Drop every entry of a namespace and of the namespaces nested in it.
+        """
+        nested = f'{namespace}:'
+        with self._lock:
+            self._epochs[namespace] = self._epochs.get(namespace, 0) + 1
+            for key in [key for key, item in self._entries.items()
+                        if item[0] == namespace or item[0].startswith(nested)]:
+                self._remove(key)
+
+    def clear(self):
+        """
+        Drop every entry of every namespace.
+        """
+        with self._lock:
+            for namespace in {item[0] for item in self._entries.values()}:
+                self._epochs[namespace] = self._epochs.get(namespace, 0) + 1
+            self._entries.clear()
+            self.size = 0
+
+    def _get_epoch(self, namespace):
+        # the drops of the enclosing namespaces count as well; epochs only grow, so does their sum
+        parts = namespace.split(':')
+        return sum(self._epochs.get(':'.join(parts[:depth]), 0) for depth in range(1, len(parts) + 1))
+
+    def _remove(self, key):
+        self.size -= self._entries.pop(key)[3]
+
+
+class InvalidationListener:
+    """
+    Background thread dropping local cache namespaces announced on the Redis invalidation channel.
+
+    Started lazily in every worker process (see `ensure_started`), so it also works with
+    servers forking workers after import. The local cache must only be used while `ready`
+    is True - invalidations published when not subscribed would be missed.
+    """
+
+    def __init__(self, local):
+        self.local = local
+        self.ready = False
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def ensure_started(self):
+        """
+        Start the listener thread, once per process.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.ready = False
+            self._pid = os.getpid()
+            thread = threading.Thread(target=self._run, name='cache-invalidation-listener', daemon=True)
+            thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = get_redis_connection('default').pubsub()
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    if message['type'] == 'subscribe':
+                        self.ready = True
+                    elif message['type'] == 'message':
+                        self.local.drop_namespace(message['data'].decode())
+            except Exception:
+                # a lost connection (RedisError) or a bad message; either way the thread must
+                # keep running, or `ready` would stay True with nobody applying invalidations
+                pass
+            # invalidations may have been missed while disconnected
+            self.ready = False
+            self.local.clear()
+            time.sleep(LISTENER_RECONNECT_DELAY)
+
+
+local_cache = LocalCache()
+invalidation_listener = InvalidationListener(local_cache)
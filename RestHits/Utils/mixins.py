@@ -1,10 +1,66 @@
+# Python imports
+import random
+import time
+from contextlib import nullcontext
 # Django imports
+from django.conf import settings
 from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 # DRF imports
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+# Redis imports
+from redis.exceptions import LockError
+# Internal imports
+from .cache_helpers import (get_cache_generation, register_cache_dependencies, get_detail_cache_key,
+                            get_filterset_param_names, build_params_key_part, get_cache_validators,
+                            get_generations_key_part, get_detail_cache_entry, set_detail_cache_entry,
+                            DETAIL_EVICTED_MARKER)
+from .db_router import read_from_primary
+from .local_cache import local_cache, invalidation_listener
+from .view_helpers import without_format_override
 
 
+def accepts_cached_format(request):
+    """
+    Tell whether the negotiated response format is the one stored in the cache (plain JSON).
+
+    Other formats (browsable API, JSON with `indent` media type params) bypass the cache.
+    """
+    renderer = request.accepted_renderer
+    return renderer.format == 'json' and request.accepted_media_type == renderer.media_type
+
+
+def render_for_cache(view, response):
+    """
+    Render a DRF Response in place and return what the cache stores for it.
+
+    The response is marked as rendered, so DRF/Django will not render it a second time.
+
+    :param view: The view that produced the response.
+    :param response: DRF Response, not yet rendered.
+    :return: Tuple (content bytes, content type).
+    """
+    response.accepted_renderer = view.request.accepted_renderer
+    response.accepted_media_type = view.request.accepted_media_type
+    response.renderer_context = view.get_renderer_context()
+    response.render()
+    return response.content, response['Content-Type']
+
+
+def set_validator_headers(response, etag, last_modified):
+    """
+    Set the ETag and Last-Modified (Unix timestamp) headers on a response.
+    """
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
 
 class PermitGetAdminModifyMixin:
     """
@@ -23,52 +79,453 @@ class PermitGetAdminModifyMixin:
         return [IsAuthenticated(), IsAdminUser()]
 
 
+class ValuesListMixin:
+    """
+    Build GET list pages from `.values()` rows with a `RowSerializer`, instead of
+    model instances and the serializer class (see `RestHits.Utils.row_serializers`).
+
+    Filtering, ordering and pagination are unchanged; the serializer class is still
+    used for writes and the schema. The row serializer mirrors the list serializer,
+    so the response is byte-identical.
+
+    Attributes:
+        row_serializer_class (type): `RowSerializer` subclass, None falls back to the serializer class.
+    """
+    row_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.row_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        row_serializer = self.row_serializer_class(self.get_serializer_context())
+        queryset = row_serializer.get_values_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.to_representation_many(page))
+        return Response(row_serializer.to_representation_many(queryset))
+
+
 class CacheListMixin:
     """
     Cache GET list responses based on query params only.
 
-    On `list()`, uses `get_cache_key` to fetch/set cached `.data`
-    for up to `cache_timeout` seconds.
+    Keys are built from canonical query params (see `get_cache_params`),
+    so equivalent requests, e.g. `?page=1` and no params, share one entry.
+
+    On `list()`, uses `get_cache_key` to fetch/set the rendered JSON body
+    for up to `cache_timeout` seconds. A hit is served as a plain HttpResponse
+    with the cached bytes - no object reconstruction, no JSON encoding. Keys embed the generation number
+    of the view namespace, so invalidation is a single counter bump
+    (see `RestHits.Utils.cache_helpers.bump_cache_generation`).
+
+    Hot entries are also kept in a small per-process LRU (`RestHits.Utils.local_cache`)
+    for `cache_local_timeout` seconds, which serves them without a Redis round trip.
+    Invalidations are broadcast over Redis pub/sub, so every worker drops them at once.
+
+    Responses carry a strong ETag and Last-Modified derived from the namespace generation
+    and the canonical params, so `If-None-Match` / `If-Modified-Since` are answered with
+    304 before any body is fetched, serialized or queried from the database.
+
+    The problem:
+        When an entry expires or its namespace is invalidated, every concurrent
+        request for it misses at once and runs the same queries (cache stampede).
+    The solution:
+        - Expiry is soft: an entry is fresh for `cache_timeout` minus a random jitter,
+          then stays in Redis as stale for `cache_stale_timeout` more seconds.
+        - Only the worker holding the Redis lock of the key rebuilds it. Others are
+          served the stale value, or - when there is none - briefly wait for the rebuild,
+          as long as the lock is held.
 
     Attributes:
-        cache_timeout (int): Time in seconds to keep cached responses.
+        cache_timeout (int): Time in seconds to keep cached responses fresh.
+        cache_jitter (float): Max fraction of `cache_timeout` randomly cut from freshness,
+            so entries written together do not expire together.
+        cache_stale_timeout (int): Time in seconds a stale entry may still be served
+            while it is being rebuilt.
+        cache_lock_timeout (int): Time in seconds after which a rebuild lock expires.
+        cache_lock_wait (float): Max time in seconds to wait for another worker's rebuild.
+        cache_lock_poll_interval (float): Time in seconds between checks while waiting.
+        cache_local_timeout (int): Time in seconds to keep entries in the in-process tier,
+            0 disables it.
+        cache_dependencies (list): Models the cached responses are built from.
+            Writes to any of them invalidate the view namespace
+            (see `RestHits.Utils.cache_helpers.invalidate_dependent_caches`).
+        cache_extra_params (list): Query params read by the view itself, besides
+            the filterset, ordering and pagination ones, which are part of the key.
 
     Methods:
         list(request): overrides DRF ListModelMixin.list()
+        rebuild_cache_entry(key, request): runs the real list() and caches its rendered body
+        local_cache_available(): tells whether the in-process tier can be used
+        store_locally(namespace, local_key, entry, epoch): copies an entry to the in-process tier
+        build_cached_response(request, entry): turns a cache entry into an HttpResponse (or a 304)
+        wait_for_cache_entry(key, lock): waits for an entry rebuilt by another worker
+        get_cache_namespace(): returns the namespace used for keys and invalidation
+        get_cache_generations(): returns the generations embedded in keys and validators
+        get_cache_param_names(): returns names of query params that affect the response
+        normalize_cache_param(name, value): returns the canonical value of a query param
+        get_cache_params(request): returns canonical query params of the request
+        get_cache_params_part(request): returns canonical query params as a key fragment
         get_cache_key(request): builds cache key string
     """
     cache_timeout = 300  # default: 5 minutes
+    cache_jitter = 0.1
+    cache_stale_timeout = 60
+    cache_lock_timeout = 10
+    cache_lock_wait = 2.0
+    cache_lock_poll_interval = 0.05
+    cache_local_timeout = 5
+    cache_dependencies = []
+    cache_extra_params = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        register_cache_dependencies(cls.__name__, cls.cache_dependencies)
 
     def list(self, request, *args, **kwargs):
         """
         Serve cached response if available, otherwise proceed and cache it.
         """
-        # only cache GET requests
-        if request.method != 'GET':
+        # only cache GET requests rendered as plain JSON
+        if request.method != 'GET' or not accepts_cached_format(request):
             return super().list(request, *args, **kwargs)
 
-        key = self.get_cache_key(request)
-        cached_data = cache.get(key)
-        if cached_data is not None:
-            return Response(cached_data)
+        namespace = self.get_cache_namespace()
+        params_part = self.get_cache_params_part(request)
+        local_key = f'{namespace}:{params_part}'
+        epoch = None
+        if self.local_cache_available():
+            entry = local_cache.get(local_key)
+            if entry is not None:
+                return self.build_cached_response(request, entry)
+            # read before going to Redis, see `LocalCache.set`
+            epoch = local_cache.get_epoch(namespace)
+
+        generations = self.get_cache_generations()
+        # conditional GET is answered before the body is fetched or built
+        validators = get_cache_validators(namespace, generations, params_part)
+        not_modified = get_conditional_response(request, etag=validators[0], last_modified=validators[1])
+        if not_modified is not None:
+            return set_validator_headers(not_modified, *validators)
+
+        key = self.get_cache_key(request, params_part, generations)
+        entry = cache.get(key)
+        if entry is not None and entry['fresh_until'] > time.time():
+            self.store_locally(namespace, local_key, entry, epoch)
+            return self.build_cached_response(request, entry)
+
+        # single-flight: only the lock holder recomputes the entry
+        lock = cache.lock(f'{key}:lock', timeout=self.cache_lock_timeout)
+        if lock.acquire(blocking=False):
+            try:
+                response, entry = self.rebuild_cache_entry(key, validators, request, *args, **kwargs)
+            finally:
+                try:
+                    lock.release()
+                except LockError:
+                    # the lock expired during a slow rebuild and may belong to another worker now
+                    pass
+            self.store_locally(namespace, local_key, entry, epoch)
+            return response
+
+        if entry is not None:
+            # another worker is refreshing this entry, serve the stale one meanwhile
+            return self.build_cached_response(request, entry)
+
+        entry = self.wait_for_cache_entry(key, lock)
+        if entry is not None:
+            self.store_locally(namespace, local_key, entry, epoch)
+            return self.build_cached_response(request, entry)
+        # the rebuilding worker is too slow, or its response was not cacheable (e.g. 404)
+        response, entry = self.rebuild_cache_entry(key, validators, request, *args, **kwargs)
+        self.store_locally(namespace, local_key, entry, epoch)
+        return response
+
+    def rebuild_cache_entry(self, key, validators, request, *args, **kwargs):
+        """
+        Build the response with the real `list()` and store it with a jittered soft expiry.
+
+        Entries of a generation younger than `DATABASE_REPLICA_PIN_SECONDS` are built from the
+        primary: a lagging replica could miss the write that invalidated the namespace, and
+        its stale rows would be served to every client under the new generation.
 
-        response = super().list(request, *args, **kwargs)
+        :param key: Cache key of the entry.
+        :param validators: Tuple (ETag, Last-Modified) of the generation the key belongs to.
+        :return: Tuple (response, cache entry or None if the response was not cached).
+        """
+        # Last-Modified is the newest generation timestamp rounded down to seconds
+        invalidated_for = time.time() - validators[1] - 1
+        recent = invalidated_for < settings.DATABASE_REPLICA_PIN_SECONDS
+        with read_from_primary() if recent else nullcontext():
+            response = super().list(request, *args, **kwargs)
+        entry = None
         # only cache successful responses
         if response.status_code == 200:
-            cache.set(key, response.data, self.cache_timeout)
-        return response
+            content, content_type = render_for_cache(self, response)
+            set_validator_headers(response, *validators)
+            fresh_for = self.cache_timeout * (1 - random.uniform(0, self.cache_jitter))
+            entry = {
+                'content': content,
+                'content_type': content_type,
+                'etag': validators[0],
+                'last_modified': validators[1],
+                'fresh_until': time.time() + fresh_for,
+            }
+            cache.set(key, entry, fresh_for + self.cache_stale_timeout)
+        return response, entry
 
-    def get_cache_key(self, request):
+    def local_cache_available(self):
         """
-        Build cache key from view name and full query params string.
+        Tell whether the in-process cache tier can be used, starting its invalidation listener.
+
+        Until the listener is subscribed, invalidations from other workers could be missed,
+        so requests go straight to Redis.
+        """
+        if self.cache_local_timeout <= 0:
+            return False
+        invalidation_listener.ensure_started()
+        return invalidation_listener.ready
+
+    def store_locally(self, namespace, local_key, entry, epoch):
+        """
+        Keep a fresh Redis entry in the in-process tier for up to `cache_local_timeout` seconds.
+        """
+        if entry is None or epoch is None:
+            return
+        timeout = min(self.cache_local_timeout, entry['fresh_until'] - time.time())
+        if timeout > 0:
+            local_cache.set(namespace, local_key, entry, len(entry['content']), timeout, epoch)
+
+    def build_cached_response(self, request, entry):
+        """
+        Serve a cache entry as-is: the stored body bytes with their content type and validators,
+        or 304 Not Modified if the client already has them.
+        """
+        validators = entry['etag'], entry['last_modified']
+        not_modified = get_conditional_response(request, etag=validators[0], last_modified=validators[1])
+        if not_modified is not None:
+            return set_validator_headers(not_modified, *validators)
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        return set_validator_headers(response, *validators)
+
+    def wait_for_cache_entry(self, key, lock):
+        """
+        Poll the cache for up to `cache_lock_wait` seconds for an entry rebuilt by another worker.
+
+        Waiting stops as soon as the rebuild lock is released without an entry: responses that
+        are not cached (invalid page, bad filter, 404) would otherwise keep every waiter asleep
+        for the whole `cache_lock_wait`.
+
+        :param key: Cache key of the entry.
+        :param lock: Rebuild lock of the key, held by the other worker.
+        :return: The cache entry, or None if it did not show up in time or will not show up.
+        """
+        deadline = time.monotonic() + self.cache_lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(self.cache_lock_poll_interval)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry
+            if not lock.locked():
+                return None
+        return None
+
+    def get_cache_namespace(self):
+        """
+        Return the cache namespace of this view (its class name).
+        """
+        return self.__class__.__name__
+
+    def get_cache_generations(self):
+        """
+        Return the generations the entries of this view depend on, embedded in their keys
+        and validators: by default the generation of the view namespace.
+        """
+        return [get_cache_generation(self.get_cache_namespace())]
+
+    def get_cache_param_names(self):
+        """
+        Return names of the query params the response depends on:
+        filterset fields, ordering, pagination, the format override and `cache_extra_params`.
+        """
+        names = set(self.cache_extra_params)
+        # hyperlinks in the body keep `?format=` (see `rest_framework.reverse`)
+        if api_settings.URL_FORMAT_OVERRIDE:
+            names.add(api_settings.URL_FORMAT_OVERRIDE)
+        filterset_class = getattr(self, 'filterset_class', None)
+        if filterset_class and DjangoFilterBackend in self.filter_backends:
+            names |= get_filterset_param_names(filterset_class)
+        if OrderingFilter in self.filter_backends:
+            names.add(OrderingFilter.ordering_param)
+        if isinstance(self.paginator, PageNumberPagination):
+            names.add(self.paginator.page_query_param)
+        page_size_param = getattr(self.paginator, 'page_size_query_param', None)
+        if page_size_param:
+            names.add(page_size_param)
+        cursor_param = getattr(self.paginator, 'cursor_query_param', None)
+        if cursor_param:
+            names.add(cursor_param)
+        count_param = getattr(self.paginator, 'count_query_param', None)
+        if count_param:
+            names.add(count_param)
+        return names
+
+    def normalize_cache_param(self, name, value):
+        """
+        Return the canonical form of a query param value, for params whose equivalent
+        spellings give the same response (e.g. case of a search query). Empty values are dropped.
+        """
+        return value
+
+    def get_cache_params(self, request):
+        """
+        Return canonical (name, value) pairs of the request query params, sorted by name.
+
+        - params the view does not read (e.g. cache-busting timestamps) are dropped,
+        - empty values and values equal to the defaults (first page, default page size,
+          default ordering) are dropped,
+        - ordering is reduced to the fields the view allows,
+        - other values are canonicalized by `normalize_cache_param`.
+
+        :param request: DRF Request object.
+        :return: Sorted list of (name, value) pairs.
+        """
+        params = {}
+        for name in self.get_cache_param_names():
+            value = self.normalize_cache_param(name, request.query_params.get(name, '').strip())
+            if value:
+                params[name] = value
+
+        cursor_param = getattr(self.paginator, 'cursor_query_param', None)
+        if cursor_param in request.query_params and cursor_param not in params:
+            # an empty cursor still switches the paginator to cursor mode
+            params[cursor_param] = 'first'
+
+        count_param = getattr(self.paginator, 'count_query_param', None)
+        if count_param in params:
+            if self.paginator.is_count_disabled(request):
+                params[count_param] = 'false'
+            else:
+                del params[count_param]
+
+        ordering_param = OrderingFilter.ordering_param
+        if ordering_param in params:
+            allowed = set(getattr(self, 'ordering_fields', None) or [])
+            terms = [term.strip() for term in params[ordering_param].split(',')]
+            ordering = [term for term in terms if term.lstrip('-') in allowed]
+            default = getattr(self, 'ordering', None) or []
+            if ordering and ordering != list(default):
+                params[ordering_param] = ','.join(ordering)
+            else:
+                del params[ordering_param]
+
+        if isinstance(self.paginator, PageNumberPagination):
+            if params.get(self.paginator.page_query_param) == '1':
+                del params[self.paginator.page_query_param]
+        page_size_param = getattr(self.paginator, 'page_size_query_param', None)
+        if page_size_param in params:
+            # same clamping/fallback as the paginator applies
+            page_size = self.paginator.get_page_size(request)
+            if page_size == self.paginator.page_size:
+                del params[page_size_param]
+            else:
+                params[page_size_param] = str(page_size)
+
+        return sorted(params.items())
+
+    def get_cache_params_part(self, request):
+        """
+        Return the canonical query params of the request as a cache key fragment.
+        """
+        # canonical params include pagination (page, page_size), filters, ordering, etc.
+        return build_params_key_part(self.get_cache_params(request))
+
+    def get_cache_key(self, request, params_part=None, generations=None):
+        """
+        Build cache key from view name, namespace generation(s) and canonical query params.
 
         :param request: DRF Request object.
+        :param params_part: Result of `get_cache_params_part(request)`, if already computed.
+        :param generations: Result of `get_cache_generations()`, if already fetched.
+        :return: Unique cache key string.
+        """
+        if params_part is None:
+            params_part = self.get_cache_params_part(request)
+        if generations is None:
+            generations = self.get_cache_generations()
+        # example key: "HitListCreateView:v0:no-params" or
+        # "ArtistListCreateView:v3:ordering=last_name&page=2"
+        return f'{self.get_cache_namespace()}:v{get_generations_key_part(generations)}:{params_part}'
+
+
+class CacheDetailMixin:
+    """
+    Cache GET detail responses per object, keyed by the primary key from the URL.
+
+    On `retrieve()`, serves the cached rendered JSON body if present. Lookups of missing
+    objects are cached as well, for `cache_not_found_timeout` seconds, so a flood
+    of nonexistent UUIDs does not reach the database.
+    Entries are evicted per object by the model signals
+    (see `RestHits.Utils.cache_helpers.invalidate_detail_caches`); the first build
+    after an eviction reads from the primary, other misses use the default routing.
+
+    Attributes:
+        cache_timeout (int): Time in seconds to keep cached responses.
+        cache_not_found_timeout (int): Time in seconds to keep cached 404s.
+
+    Methods:
+        retrieve(request): overrides DRF RetrieveModelMixin.retrieve()
+        get_serializer_context(): builds links without the format override
+        get_cache_key(): builds cache key string
+    """
+    cache_timeout = 300  # default: 5 minutes
+    cache_not_found_timeout = 30
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Serve cached response (or cached 404) if available, otherwise proceed and cache it.
+        """
+        if not accepts_cached_format(request):
+            return super().retrieve(request, *args, **kwargs)
+
+        key = self.get_cache_key()
+        version, cached = get_detail_cache_entry(key)
+        evicted = cached is not None and cached[0] == DETAIL_EVICTED_MARKER
+        if cached is not None and not evicted:
+            status_code, payload, content_type = cached
+            if status_code == 404:
+                raise Http404(payload)
+            return HttpResponse(payload, content_type=content_type)
+
+        try:
+            # a write evicted the entry moments ago, replicas may still lag behind it
+            with read_from_primary() if evicted else nullcontext():
+                response = super().retrieve(request, *args, **kwargs)
+        except Http404 as exc:
+            set_detail_cache_entry(key, version, (404, str(exc), None), self.cache_not_found_timeout)
+            raise
+
+        if response.status_code == 200:
+            content, content_type = render_for_cache(self, response)
+            # an eviction since the read means the object may be older than the write
+            set_detail_cache_entry(key, version, (200, content, content_type), self.cache_timeout)
+        return response
+
+    def get_serializer_context(self):
+        """
+        One entry per object is served for plain and `?format=json` requests alike,
+        so its links must not keep the format override of the request that built it.
+        """
+        context = super().get_serializer_context()
+        context['request'] = without_format_override(self.request)
+        return context
+
+    def get_cache_key(self):
+        """
+        Build cache key from view name and the primary key of the requested object.
+
         :return: Unique cache key string.
         """
-        # urlencode includes pagination (page, page_size), filters, ordering, etc.
-        params = request.query_params.urlencode()
-        # if no params, add suffix to avoid key ending with ':'
-        params_part = params if params else 'no-params'
-        # example key: "HitListCreateView:no-params" or
-        # "ArtistListCreateView:page=2&ordering=last_name"
-        return f'{self.__class__.__name__}:{params_part}'
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        # example key: "HitDetailView:obj:1b2c..."
+        return get_detail_cache_key(self.__class__.__name__, self.kwargs[lookup_url_kwarg])
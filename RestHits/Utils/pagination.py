@@ -1,7 +1,495 @@
+# Python imports
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import partial
+from urllib.parse import urlencode
+# Django imports
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
 # DRF improts
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+# Internal imports
+from .cache_helpers import get_generations_key_part, build_params_key_part
+
+
+def get_base_url(request, view):
+    """
+    Return the absolute URL the `next`/`previous` links of a page are built from.
+
+    Cached views serve one response to every spelling of the same query, so their links are
+    built from the canonical params (see `CacheListMixin.get_cache_params`): params the view
+    does not read, e.g. cache-busting timestamps, must not leak into a response shared by all clients.
+    """
+    if not hasattr(view, 'get_cache_params'):
+        return request.build_absolute_uri()
+    query = urlencode(view.get_cache_params(request))
+    return request.build_absolute_uri(f'{request.path}?{query}' if query else request.path)
+
 
 class DefaultPagination(PageNumberPagination):
     page_size = 20
     max_page_size = 100
-    page_size_query_param = 'page_size'
\ No newline at end of file
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = get_base_url(request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_next_link(self):
+        if not self.page.has_next():
+            return None
+        return replace_query_param(self.base_url, self.page_query_param, self.page.next_page_number())
+
+    def get_previous_link(self):
+        if not self.page.has_previous():
+            return None
+        page_number = self.page.previous_page_number()
+        if page_number == 1:
+            return remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(self.base_url, self.page_query_param, page_number)
+
+
+class UncountedPage(Page):
+    """
+    Page of a `CountingPaginator`, which knows whether a next page exists without a total.
+    """
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class CountingPaginator(Paginator):
+    """
+    Django paginator finding its pages without a total: one extra row tells whether there
+    is a next page, and a page past the last row is invalid.
+
+    The total is taken from `count_getter` instead of a plain `COUNT(*)`, and only computed
+    when asked for explicitly (e.g. for `?page=last`).
+    """
+
+    def __init__(self, object_list, per_page, count_getter, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_getter = count_getter
+
+    @property
+    def count(self):
+        if not hasattr(self, '_count'):
+            self._count = self.count_getter()
+        return self._count
+
+    @property
+    def num_pages(self):
+        if hasattr(self, '_known_pages'):
+            # the pages up to the fetched one, plus the next one if it exists
+            return self._known_pages
+        return super().num_pages
+
+    def page(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        has_next = len(rows) > self.per_page
+        self._known_pages = number + has_next
+        return UncountedPage(rows[:self.per_page], number, self, has_next)
+
+
+class CachedCountPagination(DefaultPagination):
+    """
+    Page number pagination with cheap totals.
+
+    The problem:
+        Every page runs an exact `COUNT(*)` over the filtered queryset, also on cache-miss
+        pages where the client never looks at `count`. On big tables the count costs
+        more than fetching the rows of the page.
+    The solution:
+        - pages do not depend on the total: `next` and the validity of the page number
+          come from fetching one extra row (see `CountingPaginator`);
+        - counts are cached per (view cache namespace + generation, filter params), apart
+          from the page cache, so all pages and orderings of a filter share one count;
+        - unfiltered lists of big tables report the planner estimate (`pg_class.reltuples`),
+          which is maintained by VACUUM/ANALYZE and costs a single catalog lookup
+          (small tables are counted by the same query). The estimate is only reported,
+          never used to find pages;
+        - `?count=false` skips the total: `count` is null.
+
+    Counts are only cached for views with `CacheListMixin`; other views fall back to `COUNT(*)`.
+    """
+    count_query_param = 'count'
+    count_disabled_values = ('false', '0')
+    count_cache_timeout = 300
+    # Unfiltered tables estimated above this number of rows report the estimate.
+    count_estimate_threshold = 100_000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.with_count = not self.is_count_disabled(request)
+        self.count_source = (queryset, request, view)
+        # an exact total, for `?page=last`
+        self.django_paginator_class = partial(
+            CountingPaginator,
+            count_getter=partial(self.get_count, queryset, request, view, estimate=False),
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def is_count_disabled(self, request):
+        value = request.query_params.get(self.count_query_param, '').strip().lower()
+        return value in self.count_disabled_values
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.get_reported_count() if self.with_count else None,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count']['nullable'] = True
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            'name': self.count_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Pass `false` to skip the total number of results (`count` is null).',
+            'schema': {'type': 'boolean'},
+        }]
+
+    def get_reported_count(self):
+        """
+        Return the `count` of the response: the exact total if the paginator already needed it,
+        otherwise the cached, estimated or counted one.
+        """
+        paginator = self.page.paginator
+        if hasattr(paginator, '_count'):
+            return paginator.count
+        return self.get_count(*self.count_source)
+
+    def get_count(self, queryset, request, view, estimate=True):
+        """
+        Return the total number of results: cached, estimated or counted, in this order.
+
+        :param queryset: Filtered queryset being paginated.
+        :param request: DRF Request object.
+        :param view: The view being paginated.
+        :param estimate: Whether an unfiltered list may get the planner estimate.
+        :return: Number of results.
+        """
+        if not hasattr(view, 'get_cache_generations'):
+            return queryset.count()
+        filter_params = self.get_filter_params(request, view)
+        estimate = estimate and not filter_params
+        version = get_generations_key_part(view.get_cache_generations())
+        kind = 'count:estimate' if estimate else 'count'
+        key = f'{view.get_cache_namespace()}:v{version}:{kind}:{build_params_key_part(filter_params)}'
+        count = cache.get(key)
+        if count is None:
+            count = self.estimate_count(queryset) if estimate else None
+            if count is None:
+                count = queryset.count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+    def get_filter_params(self, request, view):
+        """
+        Return the canonical params of the view without pagination and ordering ones,
+        i.e. the params that change the number of results.
+        """
+        ignored = {self.page_query_param, self.page_size_query_param, self.count_query_param,
+                   getattr(self, 'cursor_query_param', None), OrderingFilter.ordering_param,
+                   api_settings.URL_FORMAT_OVERRIDE}
+        return [(name, value) for name, value in view.get_cache_params(request) if name not in ignored]
+
+    def estimate_count(self, queryset):
+        """
+        Return the planner row estimate of the queryset's table, or its exact `COUNT(*)` if
+        the table is below `count_estimate_threshold` (or was never analyzed), in one query.
+        Returns None for other databases than PostgreSQL.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        with connection.cursor() as cursor:
+            # the subquery is an InitPlan, only run when the CASE gets to it;
+            # reltuples is -1 for tables that were never vacuumed or analyzed
+            cursor.execute(
+                f'SELECT CASE WHEN reltuples >= %s THEN reltuples::bigint '
+                f'ELSE (SELECT COUNT(*) FROM {table}) END '
+                f'FROM pg_class WHERE oid = %s::regclass',
+                [self.count_estimate_threshold, table],
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row else None
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the active ordering of the queryset, with `pk` as a tiebreaker.
+
+    The problem:
+        `OFFSET n` makes the database walk and discard n rows, and page numbers need
+        a `COUNT(*)` on every request, so deep pages get slower and slower.
+    The solution:
+        The cursor holds the ordering values of the last row of the page. The next page
+        is `WHERE (ordering, pk) > (cursor values) ORDER BY ordering, pk LIMIT page_size`,
+        which a composite index on (ordering field, pk) answers at constant cost.
+
+    Cursors are opaque base64 JSON: position values, the ordering they belong to and
+    the direction (backwards for `previous` links). No `count` is returned.
+    """
+    page_size = DefaultPagination.page_size
+    max_page_size = DefaultPagination.max_page_size
+    page_size_query_param = DefaultPagination.page_size_query_param
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = get_base_url(request, view)
+        page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.position_fields = self.get_position_fields(queryset)
+        self.pk_name = queryset.model._meta.pk.name
+
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor['r'])
+        ordering = [self.flip(term) for term in self.ordering] if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(self.build_seek_filter(ordering, cursor['p']))
+
+        # one extra row tells whether there is anything after this page
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if self.reverse:
+            rows.reverse()
+            # we came backwards from the page after this one
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+        cursor_position = cursor['p'] if cursor else None
+        first = self.get_position(rows[0]) if rows else cursor_position
+        last = self.get_position(rows[-1]) if rows else cursor_position
+        self.next_position = last if has_next else None
+        self.previous_position = first if has_previous else None
+        return rows
+
+    def get_page_size(self, request):
+        # same page size rules as the page number pagination
+        return DefaultPagination.get_page_size(self, request)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Keyset pagination cursor. Pass an empty value to start cursor mode.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_ordering(self, queryset):
+        """
+        Return the ordering applied to the queryset (by OrderingFilter or the model),
+        extended with `pk` as a tiebreaker in the direction of the last field.
+        """
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not any(term.lstrip('-') in ('pk', 'id') for term in ordering):
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append('-pk' if descending else 'pk')
+        return ordering
+
+    def get_position_fields(self, queryset):
+        """
+        Return the field of every ordering term (a model field, possibly across relations,
+        or the output field of an annotation), which parses the cursor values back.
+        """
+        fields = []
+        for term in self.ordering:
+            name = term.lstrip('-')
+            if name in queryset.query.annotations:
+                fields.append(queryset.query.annotations[name].output_field)
+                continue
+            model = queryset.model
+            for part in name.split('__'):
+                field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+                model = field.related_model
+            fields.append(field)
+        return fields
+
+    @staticmethod
+    def flip(term):
+        return term[1:] if term.startswith('-') else f'-{term}'
+
+    @staticmethod
+    def build_seek_filter(ordering, position):
+        """
+        Build `(f1, f2, ..., pk) > (v1, v2, ..., vpk)` for mixed sort directions, as
+        `f1 > v1 OR (f1 = v1 AND f2 > v2) OR ...` with `<` for descending fields.
+
+        The OR chain is not an index condition, so it is combined with the redundant
+        `f1 >= v1`, which lets the database start an index range scan at the cursor.
+        """
+        seek = Q()
+        equal = Q()
+        for term, value in zip(ordering, position):
+            field = term.lstrip('-')
+            lookup = 'lt' if term.startswith('-') else 'gt'
+            seek |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        first = ordering[0]
+        lookup = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{lookup}': position[0]}) & seek
+
+    def get_position(self, instance):
+        """
+        Return the ordering values of a row: a model instance, or a `.values()` dict
+        holding every ordering field under its lookup name (e.g. `artist__first_name`).
+        """
+        position = []
+        for term in self.ordering:
+            field = term.lstrip('-')
+            if isinstance(instance, dict):
+                position.append(instance[self.pk_name if field == 'pk' else field])
+                continue
+            value = instance
+            for attr in field.split('__'):
+                value = getattr(value, attr)
+            position.append(value)
+        return position
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': position, 'o': self.ordering, 'r': int(reverse)}
+        # str() keeps microseconds of datetimes and is parsed back by the model fields
+        encoded = urlsafe_b64encode(json.dumps(payload, default=str).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """
+        Return the decoded cursor, or None for the first page (missing or empty cursor).
+
+        Position values are parsed by the fields of their ordering terms, so a cursor
+        holding values of the wrong type is rejected here, like a malformed one.
+        """
+        encoded = request.query_params.get(self.cursor_query_param, '').strip()
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            valid = (cursor['o'] == self.ordering and isinstance(cursor['p'], list)
+                     and len(cursor['p']) == len(self.ordering) and cursor['r'] in (0, 1))
+            if valid:
+                cursor['p'] = [field.to_python(value) for field, value in zip(self.position_fields, cursor['p'])]
+                # the seek filter cannot compare with NULL
+                valid = None not in cursor['p']
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+
+class OptInKeysetPagination(CachedCountPagination):
+    """
+    Page number pagination (with cheap counts, see `CachedCountPagination`) by default,
+    keyset pagination when the `cursor` param is present.
+
+    `?cursor=` (empty) starts cursor mode on the first page; the `next`/`previous` links
+    of cursor pages carry the following cursors. See `KeysetPagination`.
+    """
+    keyset_pagination_class = KeysetPagination
+    cursor_query_param = KeysetPagination.cursor_query_param
+
+    def __init__(self):
+        self.keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_pagination_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        cursor_parameters = self.keyset_pagination_class().get_schema_operation_parameters(view)
+        return super().get_schema_operation_parameters(view) + cursor_parameters[:1]
+
+    def get_next_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_next_link()
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_previous_link()
+        return super().get_previous_link()
@@ -0,0 +1,74 @@
+# Python imports
+import re
+import time
+from collections import Counter
+
+# Runs of placeholders, e.g. the values of an `IN (...)` list, which vary in length.
+PLACEHOLDER_RUN = re.compile(r'%s(?:, %s)+')
+# Savepoints of nested `atomic()` blocks; outside of tests, transactions are not cursor queries either.
+TRANSACTION_CONTROL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+# Budgets are for anonymous requests, TokenAuthentication adds the lookup of the token and its user.
+AUTHENTICATION_QUERIES = 1
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    A view ran more queries than its `query_budget` allows (see `QueryInstrumentationMiddleware`).
+    """
+
+
+def get_query_fingerprint(sql: str) -> str:
+    """
+    Reduce a query to its shape: values are already placeholders in the SQL Django executes,
+    only the length of placeholder lists is dropped.
+
+    :param sql: SQL as passed to the database cursor.
+    :return: Fingerprint string.
+    """
+    return PLACEHOLDER_RUN.sub('%s, ...', sql)
+
+
+def get_query_budget(view_class, request):
+    """
+    Return the max number of queries a request may run, from the `query_budget`
+    attribute of the view class, e.g. `query_budget = {'GET': 2}`.
+
+    :param view_class: View class handling the request, or None.
+    :param request: Django HttpRequest.
+    :return: Number of queries, or None when the view declares no budget for the method.
+    """
+    budget = (getattr(view_class, 'query_budget', None) or {}).get(request.method)
+    if budget is not None and 'HTTP_AUTHORIZATION' in request.META:
+        budget += AUTHENTICATION_QUERIES
+    return budget
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper recording the queries of a request and their time
+    (see `connection.execute_wrapper`). Savepoint statements are not counted.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not sql.startswith(TRANSACTION_CONTROL):
+                self.time += time.perf_counter() - start
+                self.queries.append(sql)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def get_duplicates(self) -> dict[str, int]:
+        """
+        Return the fingerprints run more than once, with their counts - a sign of N+1 queries.
+        """
+        counts = Counter(get_query_fingerprint(sql) for sql in self.queries)
+        return {fingerprint: count for fingerprint, count in counts.items() if count > 1}
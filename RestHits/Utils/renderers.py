@@ -0,0 +1,101 @@
+# Python imports
+import csv
+import json
+# DRF imports
+from rest_framework import serializers
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def get_flat_field_names(serializer, prefix=''):
+    """
+    Return the names of the fields a serializer outputs, nested serializers flattened
+    with dotted names (e.g. `artist.first_name`), in field order.
+
+    :param serializer: Serializer instance.
+    :param prefix: Prefix of nested field names.
+    :return: List of field names.
+    """
+    names = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.Serializer):
+            names += get_flat_field_names(field, f'{prefix}{name}.')
+        else:
+            names.append(f'{prefix}{name}')
+    return names
+
+
+def flatten_row(row, prefix=''):
+    """
+    Flatten nested dicts of a serialized row into dotted keys, see `get_flat_field_names`.
+    """
+    flat = {}
+    for name, value in row.items():
+        if isinstance(value, dict):
+            flat.update(flatten_row(value, f'{prefix}{name}.'))
+        else:
+            flat[f'{prefix}{name}'] = value
+    return flat
+
+
+class Echo:
+    """
+    File-like object returning what is written to it, so `csv.writer` can produce
+    lines one by one for a streaming response.
+    """
+
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline delimited JSON: one compact JSON object per line.
+
+    `stream()` yields the lines of an iterable of rows, for `StreamingHttpResponse`.
+    `render()` handles regular (e.g. error) responses.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def stream(self, rows, field_names=None):
+        for row in rows:
+            yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.stream(rows)).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV with a header line, nested objects flattened into dotted columns.
+
+    `stream()` yields the lines of an iterable of rows, for `StreamingHttpResponse`.
+    `render()` handles regular (e.g. error) responses.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def stream(self, rows, field_names=None):
+        writer = csv.writer(Echo())
+        if field_names is not None:
+            yield writer.writerow(field_names)
+        for row in rows:
+            flat = flatten_row(row)
+            if field_names is None:
+                field_names = list(flat)
+                yield writer.writerow(field_names)
+            yield writer.writerow([flat.get(name) for name in field_names])
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.stream(rows)).encode(self.charset)
@@ -0,0 +1,70 @@
+# Python imports
+import uuid
+# DRF imports
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+# Primary key put into a route once, to find where the real ones go.
+URL_PLACEHOLDER = uuid.UUID(int=0)
+
+
+class URLTemplate:
+    """
+    Absolute URL of a detail route, reversed once and then filled with primary keys.
+
+    Gives the same URLs as `HyperlinkedIdentityField` (including preserved `?format=`)
+    for the price of a string concatenation.
+    """
+
+    def __init__(self, view_name, request):
+        url = reverse(view_name, kwargs={'pk': URL_PLACEHOLDER}, request=request)
+        self.prefix, self.suffix = url.split(str(URL_PLACEHOLDER))
+
+    def __call__(self, pk):
+        return f'{self.prefix}{pk}{self.suffix}'
+
+
+class RowSerializer:
+    """
+    Serializer-free rendering of list pages from `.values()` rows.
+
+    The problem:
+        A ModelSerializer builds a model instance per row, runs every field through its
+        machinery (nested serializers included) and calls `reverse()` per hyperlink,
+        which dominates the latency of large pages.
+    The solution:
+        Rows are fetched as dicts with `values_fields`, hyperlinks are filled into
+        `URLTemplate`s built once per request, and `to_representation` builds the
+        output dicts directly. Subclasses mirror a ModelSerializer field by field,
+        so the rendered JSON is byte-identical (see `ValuesListMixin`).
+
+    Attributes:
+        values_fields (list): Fields passed to `.values()`, including every field
+            the paginator may order on.
+        url_templates (dict): Name -> view name of the detail routes linked from rows.
+    """
+    values_fields = []
+    url_templates = {}
+
+    def __init__(self, context):
+        self.context = context
+        request = context['request']
+        self.urls = {name: URLTemplate(view_name, request) for name, view_name in self.url_templates.items()}
+        self.datetime_field = serializers.DateTimeField()
+
+    def get_values_queryset(self, queryset):
+        """
+        Turn the filtered queryset of the view into a queryset of `values_fields` dicts.
+        """
+        # prefetching needs model instances, related rows are fetched by `to_representation_many`
+        return queryset.prefetch_related(None).values(*self.values_fields)
+
+    def format_datetime(self, value):
+        # same output (timezone, `Z` suffix) as the serializer field
+        return self.datetime_field.to_representation(value)
+
+    def to_representation(self, row) -> dict:
+        raise NotImplementedError
+
+    def to_representation_many(self, rows) -> list:
+        return [self.to_representation(row) for row in rows]
@@ -1,5 +1,8 @@
 # Python imports
+import copy
 from functools import wraps
+# DRF imports
+from rest_framework.settings import api_settings
 
 
 def swagger_safe_queryset(fn):
@@ -28,3 +31,23 @@ def swagger_safe_queryset(fn):
         return fn(self, *args, **kwargs)
 
     return wrapper
+
+
+def without_format_override(request):
+    """
+    Return a copy of the underlying Django request without the `?format=` query param.
+
+    The problem:
+        DRF's `reverse`, and so every hyperlinked field, keeps `?format=` in the URLs it builds.
+        A view rendering a format the linked views do not have (e.g. CSV) gets links answering 404.
+    The solution:
+        Serializers of such views get this copy as their context request, so their
+        links are built as for a plain JSON request.
+
+    :param request: DRF Request object.
+    :return: Django HttpRequest whose GET has no format override.
+    """
+    clean = copy.copy(request._request)
+    clean.GET = request._request.GET.copy()
+    clean.GET.pop(api_settings.URL_FORMAT_OVERRIDE, None)
+    return clean
@@ -1,7 +1,10 @@
 # Django imports
 from django.urls import path, include
+# Internal imports
+from Hits.views import HitSearchView
 
 urlpatterns = [
     path('artists/', include('Artists.urls')),
     path('hits/', include('Hits.urls')),
+    path('search/', HitSearchView.as_view(), name='search'),
 ]
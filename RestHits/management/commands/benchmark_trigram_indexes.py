@@ -0,0 +1,136 @@
+# Python imports
+import re
+import statistics
+# Django imports
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+# Internal imports
+from Artists.filters import ArtistFilter
+from Artists.models import Artist
+from Hits.filters import HitFilter
+from Hits.models import Hit
+
+# Hits created per artist by `--seed`.
+SEED_HITS_PER_ARTIST = 20
+SEED_WORDS = ['love', 'night', 'heart', 'dance', 'fire', 'rain', 'summer', 'dream', 'river', 'light',
+              'shadow', 'city', 'road', 'star', 'blue', 'golden', 'wild', 'midnight', 'ocean', 'thunder']
+SEED_FIRST_NAMES = ['Michael', 'Madonna', 'Freddie', 'Whitney', 'Elton', 'Aretha', 'David', 'Prince',
+                    'Stevie', 'Tina', 'Bruce', 'Janet', 'George', 'Cyndi', 'Lionel', 'Annie']
+SEED_LAST_NAMES = ['Jackson', 'Ciccone', 'Mercury', 'Houston', 'John', 'Franklin', 'Bowie', 'Nelson',
+                   'Wonder', 'Turner', 'Springsteen', 'Michael', 'Lauper', 'Richie', 'Lennox', 'Cooper']
+
+# Each case is the filtered queryset of a list endpoint: its first page and its count.
+# Selective terms (a few matching rows) and common ones (a large share of the table) behave differently.
+BENCHMARK_CASES = [
+    ('hits ?title=night 4242', HitFilter, Hit.objects.select_related('artist'), {'title': 'night 4242'}),
+    ('hits ?title=night', HitFilter, Hit.objects.select_related('artist'), {'title': 'night'}),
+    ('hits ?artist_name=freddie 42', HitFilter, Hit.objects.select_related('artist'), {'artist_name': 'freddie 42'}),
+    ('hits ?artist_last_name=cury', HitFilter, Hit.objects.select_related('artist'), {'artist_last_name': 'cury'}),
+    ('artists ?first_name=tev', ArtistFilter, Artist.objects.all(), {'first_name': 'tev'}),
+    ('artists ?last_name=ring', ArtistFilter, Artist.objects.all(), {'last_name': 'ring'}),
+]
+TRIGRAM_INDEXES = ['Hits_hit_title_trgm_idx', 'Artists_artist_first_trgm_idx', 'Artists_artist_last_trgm_idx']
+PAGE_SIZE = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare plans and latency of the icontains filters without and with the trigram indexes. '
+        'The "before" run drops the indexes inside a transaction that is rolled back, which takes an '
+        'exclusive lock on the tables - run it against a benchmark database, not production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, metavar='HITS',
+                            help='Insert HITS generated hits (and artists) before benchmarking, e.g. 1000000.')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Number of measured runs per query, the median is reported.')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE "Artists_artist", "Hits_hit"')
+        self.stdout.write(f'Hits: {Hit.objects.count()}, artists: {Artist.objects.count()}')
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index in TRIGRAM_INDEXES:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index)}')
+            before = self.run_cases(options['repeat'])
+            transaction.set_rollback(True)
+        after = self.run_cases(options['repeat'])
+
+        for name, _, _, _ in BENCHMARK_CASES:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for query in ('page', 'count'):
+                old, new = before[name, query], after[name, query]
+                speedup = old['time'] / new['time'] if new['time'] else float('inf')
+                self.stdout.write(f'  {query:<5} before: {old["time"]:9.2f} ms  {old["plan"]}')
+                self.stdout.write(f'  {query:<5} after:  {new["time"]:9.2f} ms  {new["plan"]}  (x{speedup:.1f})')
+
+    def run_cases(self, repeat):
+        results = {}
+        for name, filterset_class, queryset, data in BENCHMARK_CASES:
+            filtered = filterset_class(data, queryset=queryset).qs
+            queries = {
+                'page': filtered.order_by(*queryset.model._meta.ordering)[:PAGE_SIZE],
+                'count': filtered.order_by().values('pk'),
+            }
+            for query, qs in queries.items():
+                sql, params = qs.query.sql_with_params()
+                if query == 'count':
+                    sql = f'SELECT COUNT(*) FROM ({sql}) subquery'
+                results[name, query] = self.explain(sql, params, repeat)
+        return results
+
+    @staticmethod
+    def explain(sql, params, repeat):
+        """
+        Run EXPLAIN ANALYZE `repeat` times (after a warm-up run) and return the median
+        execution time and the scan nodes of the plan.
+        """
+        times = []
+        for run in range(repeat + 1):
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+                plan = [row[0] for row in cursor.fetchall()]
+            if run:
+                times.append(float(re.search(r'Execution Time: ([\d.]+)', plan[-1]).group(1)))
+        scans = [re.sub(r'\s+\(.*', '', line.strip(' ->')) for line in plan if 'Scan' in line]
+        return {'time': statistics.median(times), 'plan': ', '.join(scans)}
+
+    def seed(self, hits):
+        """
+        Insert `hits` hits spread over `hits / SEED_HITS_PER_ARTIST` artists, in two
+        INSERT ... SELECT statements.
+        """
+        artists = max(1, hits // SEED_HITS_PER_ARTIST)
+        self.stdout.write(f'Seeding {artists} artists and {hits} hits...')
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                '''
+                INSERT INTO "Artists_artist" (id, first_name, last_name, created_at, updated_at)
+                SELECT gen_random_uuid(),
+                       (%s::text[])[1 + g %% cardinality(%s::text[])] || ' ' || g,
+                       (%s::text[])[1 + (g / cardinality(%s::text[])) %% cardinality(%s::text[])],
+                       now(), now()
+                FROM generate_series(1, %s) g
+                ''',
+                [SEED_FIRST_NAMES, SEED_FIRST_NAMES, SEED_LAST_NAMES, SEED_FIRST_NAMES, SEED_LAST_NAMES, artists],
+            )
+            cursor.execute(
+                '''
+                INSERT INTO "Hits_hit" (id, title, artist_id, created_at, updated_at)
+                SELECT gen_random_uuid(),
+                       initcap((%s::text[])[1 + (random() * (cardinality(%s::text[]) - 1))::int] || ' '
+                               || (%s::text[])[1 + (random() * (cardinality(%s::text[]) - 1))::int]) || ' ' || g,
+                       artist.id,
+                       now() - g * interval '1 second', now()
+                FROM generate_series(1, %s) g
+                JOIN (SELECT id, row_number() OVER () AS n FROM "Artists_artist") artist
+                  ON artist.n = 1 + g %% %s
+                ''',
+                [SEED_WORDS, SEED_WORDS, SEED_WORDS, SEED_WORDS, hits, artists],
+            )
+        self.stdout.write(self.style.SUCCESS('Seeding completed.'))
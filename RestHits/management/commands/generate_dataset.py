@@ -0,0 +1,176 @@
+# Python imports
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+# Internal imports
+from Artists.models import Artist
+from Hits.models import Hit
+from RestHits.Utils.cache_helpers import invalidate_hit_caches
+
+FIRST_NAMES = ['Michael', 'Madonna', 'Freddie', 'Whitney', 'Elton', 'Aretha', 'David', 'Prince', 'Stevie', 'Tina',
+               'Bruce', 'Janet', 'George', 'Cyndi', 'Lionel', 'Annie', 'Kate', 'Billie', 'Amy', 'Adele', 'Robert',
+               'Nina', 'Marvin', 'Etta', 'Johnny', 'Dolly', 'Joni', 'Bob', 'Patti', 'Leonard', 'Debbie',
+               'Ozzy', 'Kylie', 'Sade', 'Bjork', 'Sting', 'Shania', 'Alanis', 'Norah', 'Lana', 'Frank', 'Ella',
+               'Ray', 'Diana', 'Roy', 'Carole', 'Neil', 'Jimi', 'Janis', 'Kurt', 'Chris', 'Taylor', 'Rihanna']
+LAST_NAMES = ['Jackson', 'Ciccone', 'Mercury', 'Houston', 'John', 'Franklin', 'Bowie', 'Nelson', 'Wonder',
+              'Turner', 'Springsteen', 'Lauper', 'Richie', 'Lennox', 'Cooper', 'Bush', 'Eilish', 'Winehouse',
+              'Adkins', 'Plant', 'Simone', 'Gaye', 'James', 'Cash', 'Parton', 'Mitchell', 'Dylan', 'Smith',
+              'Cohen', 'Nicks', 'Harry', 'Osbourne', 'Minogue', 'Adu', 'Gudmundsdottir', 'Sumner', 'Twain',
+              'Morissette', 'Jones', 'Del Rey', 'Sinatra', 'Fitzgerald', 'Charles', 'Ross', 'Orbison', 'King',
+              'Young', 'Hendrix', 'Joplin', 'Cobain', 'Cornell', 'Swift', 'Fenty', 'Martin', 'Brown', 'Williams']
+TITLE_WORDS = ['love', 'night', 'heart', 'dance', 'fire', 'rain', 'summer', 'dream', 'river', 'light', 'shadow',
+               'city', 'road', 'star', 'blue', 'golden', 'wild', 'midnight', 'ocean', 'thunder', 'baby', 'girl',
+               'boy', 'time', 'world', 'life', 'forever', 'tonight', 'home', 'street', 'angel', 'devil', 'money',
+               'crazy', 'sweet', 'lonely', 'broken', 'electric', 'paradise', 'highway', 'memory', 'kiss', 'tears',
+               'morning', 'sun', 'moon', 'stars', 'wind', 'storm', 'cold', 'hot', 'young', 'old', 'free', 'run',
+               'fly', 'fall', 'rise', 'burn', 'shine', 'stay', 'go', 'back', 'again', 'never', 'always', 'my',
+               'your', 'the', 'of', 'in', 'on', 'me', 'you', 'we', 'all', 'little', 'big', 'last', 'first', 'red',
+               'black', 'white', 'silver', 'diamond', 'rose', 'garden', 'window', 'door', 'train', 'radio',
+               'echo', 'mirror', 'secret', 'whisper', 'desire', 'fever', 'magic', 'heaven', 'hell', 'rock', 'soul']
+# Words per title, weighted like a typical chart: mostly two to four words.
+TITLE_WORD_COUNTS = [1, 2, 3, 4, 5, 6, 7]
+TITLE_WORD_WEIGHTS = [12, 30, 26, 16, 9, 5, 2]
+HIT_COLUMNS = ('id', 'title', 'artist_id', 'created_at', 'updated_at')
+ARTIST_COLUMNS = ('id', 'first_name', 'last_name', 'created_at', 'updated_at', 'hit_count')
+
+
+def get_zipf_counts(total: int, buckets: int, skew: float) -> list[int]:
+    """
+    Split `total` into `buckets` counts proportional to 1 / rank ** skew, largest first.
+
+    Counts are rounded down and the remainder goes to the largest fractional parts,
+    so they sum up to `total` exactly.
+
+    :param total: Number to split, e.g. hits.
+    :param buckets: Number of counts, e.g. artists.
+    :param skew: Zipf exponent; 0 splits evenly, 1 is the classic Zipf distribution.
+    :return: List of `buckets` counts.
+    """
+    weights = [1 / rank ** skew for rank in range(1, buckets + 1)]
+    scale = total / sum(weights)
+    shares = [weight * scale for weight in weights]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(buckets), key=lambda index: counts[index] - shares[index])
+    for index in by_remainder[:total - sum(counts)]:
+        counts[index] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic catalog for load tests and benchmarks: ARTISTS artists and HITS hits, '
+        'hits per artist following a Zipf-like distribution. The same seed (and --until) generates the same '
+        'dataset, ids included, so run it against an empty database or change the seed. '
+        'Rows are written with COPY, hits in batches of their own transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--artists', type=int, default=1000)
+        parser.add_argument('--hits', type=int, default=100_000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the dataset.')
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='Zipf exponent of hits per artist: 0 spreads hits evenly, larger is more skewed.')
+        parser.add_argument('--days', type=int, default=3650, help='Spread created_at over this many days.')
+        parser.add_argument('--until', type=datetime.fromisoformat, default=datetime(2025, 1, 1),
+                            help='Latest created_at (ISO date, UTC).')
+        parser.add_argument('--batch-size', type=int, default=100_000, help='Hits written per transaction.')
+
+    def handle(self, *args, **options):
+        if options['artists'] < 1 or options['hits'] < 0:
+            raise CommandError('--artists must be positive and --hits must not be negative.')
+        rng = random.Random(options['seed'])
+        until = options['until'].replace(tzinfo=options['until'].tzinfo or timezone.utc)
+        since = until - timedelta(days=options['days'])
+        self.start = time.perf_counter()
+
+        artists = self.generate_artists(rng, options['artists'], since, until)
+        hit_counts = get_zipf_counts(options['hits'], len(artists), options['skew'])
+        # the most prolific artists are not the first ones by name or date
+        rng.shuffle(hit_counts)
+        try:
+            with transaction.atomic():
+                self.copy(Artist, ARTIST_COLUMNS, artists)
+        except IntegrityError:
+            raise CommandError('The dataset of this seed is already in the database, use another --seed.')
+        self.stdout.write(f'Artists: {len(artists)}, the top one has {max(hit_counts)} hits.')
+
+        hits = self.generate_hits(rng, artists, hit_counts, until)
+        written = 0
+        while batch := list(islice(hits, options['batch_size'])):
+            with transaction.atomic():
+                self.copy(Hit, HIT_COLUMNS, batch)
+            written += len(batch)
+            self.stdout.write(f'Hits: {written} / {options["hits"]} ({written / self.elapsed():.0f} rows/s)')
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE "{Artist._meta.db_table}", "{Hit._meta.db_table}"')
+        # COPY sends no signals
+        invalidate_hit_caches(models=(Hit, Artist))
+        self.stdout.write(self.style.SUCCESS(f'Dataset generated in {self.elapsed():.1f} s.'))
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    @staticmethod
+    def copy(model, columns, rows):
+        # the driver's COPY bypasses Django's cursor, which maps errors to `django.db` exceptions
+        with connection.cursor() as cursor, connection.wrap_database_errors:
+            with cursor.copy(f'COPY "{model._meta.db_table}" ({", ".join(columns)}) FROM STDIN') as copy:
+                for row in rows:
+                    copy.write_row(row)
+
+    @staticmethod
+    def random_uuid(rng):
+        return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+    def generate_artists(self, rng, count, since, until):
+        """
+        Return artist rows with distinct names (a numbered last name once the combinations run out)
+        and created_at spread over the first half of the period, so that their hits come later.
+        """
+        rows = []
+        names = {}
+        period = (until - since) / 2
+        for _ in range(count):
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            taken = names.get((first_name, last_name), 0)
+            names[first_name, last_name] = taken + 1
+            if taken:
+                last_name = f'{last_name} {taken + 1}'
+            created_at = since + period * rng.random()
+            rows.append((self.random_uuid(rng), first_name, last_name, created_at, created_at, 0))
+        return rows
+
+    def generate_hits(self, rng, artists, hit_counts, until):
+        """
+        Yield hit rows artist by artist, titles unique per artist (see `generate_titles`)
+        and created_at spread between the creation of the artist and `until`.
+        """
+        for artist, count in zip(artists, hit_counts):
+            artist_id, artist_created_at = artist[0], artist[3]
+            active = until - artist_created_at
+            for title in self.generate_titles(rng, count):
+                created_at = artist_created_at + active * rng.random()
+                yield self.random_uuid(rng), title, artist_id, created_at, created_at
+
+    @staticmethod
+    def generate_titles(rng, count):
+        """
+        Return `count` distinct titles of one to seven words. A title drawn twice gets
+        a number, which drawn titles never contain.
+        """
+        titles = []
+        taken = set()
+        while len(titles) < count:
+            words = rng.choices(TITLE_WORDS, k=rng.choices(TITLE_WORD_COUNTS, TITLE_WORD_WEIGHTS)[0])
+            title = ' '.join(word.capitalize() for word in words)
+            if title in taken:
+                title = f'{title} {len(titles) + 1}'
+            taken.add(title)
+            titles.append(title)
+        return titles
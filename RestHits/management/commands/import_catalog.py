@@ -0,0 +1,111 @@
+# Python imports
+import csv
+import json
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+# Internal imports
+from Artists.models import Artist
+from Hits.catalog import copy_catalog
+from Hits.models import Hit
+from RestHits.Utils.cache_helpers import invalidate_hit_caches
+
+RECORD_FIELDS = ('first_name', 'last_name', 'title')
+# Length limits of the model fields (see `CatalogRecordSerializer`).
+MIN_VALUE_LENGTH = 2
+MAX_VALUE_LENGTH = 255
+FORMATS_BY_SUFFIX = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Import a large catalog of (first_name, last_name, title) records from CSV or NDJSON. '
+        'Adds the missing artists and hits, existing ones are left unchanged, so the import can be re-run. '
+        'The file is streamed into Postgres with COPY and merged in one transaction (see `copy_catalog`).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='CSV file with a first_name,last_name,title header, '
+                                         'or NDJSON file with one object per line; "-" reads stdin.')
+        parser.add_argument('--format', choices=['csv', 'ndjson'],
+                            help='Format of the file, by default guessed from its extension.')
+        parser.add_argument('--progress-every', type=int, default=100_000, metavar='ROWS',
+                            help='Report progress every ROWS records.')
+
+    def handle(self, *args, **options):
+        path = options['file']
+        file_format = options['format'] or FORMATS_BY_SUFFIX.get(Path(path).suffix.lower())
+        if not file_format:
+            raise CommandError('Cannot guess the format of the file, use --format.')
+
+        self.skipped = 0
+        self.start = time.perf_counter()
+        try:
+            file = nullcontext(sys.stdin) if path == '-' else open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(f'Cannot open {path}: {error}')
+        with file:
+            records = self.read_csv(file) if file_format == 'csv' else self.read_ndjson(file)
+            result = copy_catalog(records, on_progress=self.report_progress,
+                                  progress_every=options['progress_every'])
+        elapsed = time.perf_counter() - self.start
+
+        if result.artist_ids:
+            # the merge sends no signals, invalidate once for the whole import
+            invalidate_hit_caches(models=(Hit, Artist))
+        if self.skipped:
+            self.stdout.write(self.style.WARNING(f'Skipped {self.skipped} invalid record(s).'))
+        rows = result.hits_inserted + result.hits_unchanged
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {rows} records in {elapsed:.1f} s ({rows / elapsed:.0f} rows/s). '
+            f'Artists inserted: {result.artists_inserted}, hits inserted: {result.hits_inserted}, '
+            f'unchanged: {result.hits_unchanged}.'
+        ))
+
+    def report_progress(self, staged):
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(f'Staged {staged} records ({staged / elapsed:.0f} rows/s)...')
+
+    def read_csv(self, file):
+        reader = csv.DictReader(file)
+        missing = set(RECORD_FIELDS) - set(reader.fieldnames or [])
+        if missing:
+            raise CommandError(f'CSV header is missing: {", ".join(sorted(missing))}.')
+        for row in reader:
+            record = self.clean_record(row)
+            if record:
+                yield record
+
+    def read_ndjson(self, file):
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                data = None
+            if not isinstance(data, dict):
+                self.skipped += 1
+                continue
+            record = self.clean_record(data)
+            if record:
+                yield record
+
+    def clean_record(self, data):
+        """
+        Return the (first_name, last_name, title) tuple of a parsed row, stripped like the API does,
+        or None (counted as skipped) if a value is missing or invalid.
+        """
+        values = tuple(data.get(name) for name in RECORD_FIELDS)
+        if not all(isinstance(value, str) for value in values):
+            self.skipped += 1
+            return None
+        values = tuple(value.strip() for value in values)
+        # NUL cannot be stored in a text column
+        if not all(MIN_VALUE_LENGTH <= len(value) <= MAX_VALUE_LENGTH and '\x00' not in value for value in values):
+            self.skipped += 1
+            return None
+        return values
@@ -0,0 +1,36 @@
+# Django imports
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+# Internal imports
+from Artists.models import Artist
+from Hits.models import Hit
+from RestHits.Utils.cache_helpers import invalidate_dependent_caches
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute Artist.hit_count from the hits table, repairing counts that drifted '
+        '(e.g. after raw SQL with triggers disabled). Hit writes wait until it finishes.'
+    )
+
+    def handle(self, *args, **options):
+        actual = Coalesce(Subquery(
+            Hit.objects
+            .filter(artist=OuterRef('pk'))
+            .order_by()
+            .values('artist')
+            .annotate(hits=Count('pk'))
+            .values('hits')
+        ), 0)
+        with transaction.atomic():
+            # a hit written meanwhile would have its trigger delta overwritten by a stale count
+            with connection.cursor() as cursor:
+                cursor.execute('LOCK TABLE "Hits_hit" IN SHARE MODE')
+            repaired = Artist.objects.exclude(hit_count=actual).update(hit_count=actual)
+
+        if repaired:
+            # queryset updates do not send signals
+            invalidate_dependent_caches(Artist)
+        self.stdout.write(self.style.SUCCESS(f'Hit counts recomputed, {repaired} artist(s) repaired.'))
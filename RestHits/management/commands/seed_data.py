@@ -2,13 +2,14 @@
 import os
 from abc import ABC, abstractmethod
 # Django imports
-from django.db import transaction
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
 # Internal imports
 from Artists.models import Artist
+from Hits.catalog import upsert_catalog
 from Hits.models import Hit
+from RestHits.Utils.cache_helpers import invalidate_hit_caches
 from .demo_data import DEMO_MUSIC_DATA
 
 User = get_user_model()
@@ -43,45 +44,32 @@ class DemoMusicSeedingStrategy(BaseSeedingStrategy):
         super().__init__(command_instance, command_instance.stdout, command_instance.style)
         self.data_to_seed = data
 
-    @transaction.atomic
     def seed(self):
         self.command.stdout.write('Starting to seed music data (Demo Strategy)...')
-        artists_created_count = 0
-        hits_created_count = 0
 
         if not self.data_to_seed:
             self.command.stdout.write(self.command.style.WARNING("No demo data to process"))
             return
 
-        for artist_data in self.data_to_seed:
-            artist, created_artist = Artist.objects.get_or_create(
-                first_name=artist_data['first_name'],
-                last_name=artist_data['last_name']
-            )
-            status_artist = "Created" if created_artist else "Exist"
-            if created_artist:
-                artists_created_count += 1
-            self.command.stdout.write(f'Artist "{artist}": {status_artist}')
-
-            for hit_data in artist_data.get('hits', []):
-                hit, created_hit = Hit.objects.get_or_create(
-                    title=hit_data['title'],
-                    artist=artist,
-                )
-                status_hit = "Created" if created_hit else "Exist"
-                if created_hit:
-                    hits_created_count += 1
-                self.command.stdout.write(f'  Hit "{hit.title}" for {artist}: {status_hit}')
-
-            if artists_created_count > 0 or hits_created_count > 0:
-                self.command.stdout.write(self.command.style.SUCCESS(
-                    f"Seeding of music data completed."
-                    f"Artists: {artists_created_count}, Hits: {hits_created_count}."
-                ))
-            else:
-                self.command.stdout.write(self.command.style.NOTICE(
-                    "No new artists or hits were created (they probably already exist in the database)."
-                ))
+        records = (
+            {'first_name': artist_data['first_name'], 'last_name': artist_data['last_name'], 'title': hit_data['title']}
+            for artist_data in self.data_to_seed
+            for hit_data in artist_data.get('hits', [])
+        )
+        # set-based and idempotent, the demo data fits in a single batch
+        result = upsert_catalog(records)
+
+        if result.hits_inserted:
+            invalidate_hit_caches(models=(Hit, Artist))
+            self.command.stdout.write(self.command.style.SUCCESS(
+                f"Seeding of music data completed. "
+                f"Artists: {result.artists_inserted}, Hits: {result.hits_inserted}, "
+                f"already existing hits: {result.hits_unchanged}."
+            ))
+        else:
+            self.command.stdout.write(self.command.style.NOTICE(
+                "No new artists or hits were created (they probably already exist in the database)."
+            ))
 
 
 class SuperuserCreator:
@@ -0,0 +1,119 @@
+# Python imports
+import hashlib
+from contextlib import ExitStack
+# Django imports
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+# DRF imports
+from rest_framework.permissions import SAFE_METHODS
+# Internal imports
+from RestHits.Utils.db_router import get_replica_aliases, read_from_replica
+from RestHits.Utils.query_budget import QueryBudgetExceeded, QueryRecorder, get_query_budget
+
+
+def get_primary_pin_keys(request, response=None) -> list[str]:
+    """
+    Build the cache keys pinning a client to the primary database.
+
+    A client is identified by its `Authorization` header (API tokens) and its session
+    cookie (admin site), including a session cookie the response has just set (login).
+
+    :param request: Django HttpRequest.
+    :param response: Response to the request, if already produced.
+    :return: List of cache keys, empty for anonymous clients.
+    """
+    identities = [request.META.get('HTTP_AUTHORIZATION'), request.COOKIES.get(settings.SESSION_COOKIE_NAME)]
+    if response is not None and settings.SESSION_COOKIE_NAME in response.cookies:
+        identities.append(response.cookies[settings.SESSION_COOKIE_NAME].value)
+    return [f'db:primary-pin:{hashlib.sha1(identity.encode()).hexdigest()}' for identity in identities if identity]
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the reads of safe requests (GET, HEAD, OPTIONS) to the read replicas,
+    with read-your-writes for the clients that write.
+
+    The problem:
+        Replicas apply the writes of the primary with a delay. An admin reading right
+        after a write could get the state from before it.
+    The solution:
+        A successful unsafe request pins its client to the primary for
+        `DATABASE_REPLICA_PIN_SECONDS` (a cache key per client, see `get_primary_pin_keys`),
+        longer than the usual replica lag. Anonymous requests carry no identity,
+        so they are routed without a cache lookup.
+
+    Not used when no replicas are configured.
+    """
+
+    def __init__(self, get_response):
+        if not get_replica_aliases():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                keys = get_primary_pin_keys(request, response)
+                cache.set_many(dict.fromkeys(keys, True), settings.DATABASE_REPLICA_PIN_SECONDS)
+            return response
+
+        if self.is_pinned(request):
+            return self.get_response(request)
+        with read_from_replica():
+            return self.get_response(request)
+
+    @staticmethod
+    def is_pinned(request):
+        keys = get_primary_pin_keys(request)
+        return bool(keys and cache.get_many(keys))
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record the queries of every request and report them in response headers:
+    `X-Query-Count`, `X-Query-Time-Ms` and `X-Query-Duplicates` (queries repeating
+    the shape of an earlier one, e.g. N+1 lookups in nested serializers).
+
+    Views declare how many queries a request may run, e.g. `query_budget = {'GET': 2}`
+    (see `RestHits.Utils.query_budget.get_query_budget`), reported as `X-Query-Budget`.
+    With `QUERY_BUDGET_ENFORCED` (set by the test runner, see `RestHits.test_runner`)
+    a request over the budget raises `QueryBudgetExceeded`, so it fails the test that made it.
+
+    Only used with `QUERY_INSTRUMENTATION` (DEBUG and tests). Queries of streaming
+    responses run after the middleware returns and are not counted.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        duplicates = recorder.get_duplicates()
+        response['X-Query-Count'] = recorder.count
+        response['X-Query-Time-Ms'] = f'{recorder.time * 1000:.1f}'
+        response['X-Query-Duplicates'] = sum(duplicates.values()) - len(duplicates)
+
+        budget = get_query_budget(getattr(request, 'query_budget_view', None), request)
+        if budget is not None:
+            response['X-Query-Budget'] = budget
+            if recorder.count > budget and settings.QUERY_BUDGET_ENFORCED:
+                queries = '\n'.join(recorder.queries)
+                raise QueryBudgetExceeded(
+                    f'{request.method} {request.path} ran {recorder.count} queries, '
+                    f'over the budget of {budget}:\n{queries}'
+                )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # DRF views expose their class as `cls`, Django class-based views as `view_class`
+        request.query_budget_view = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
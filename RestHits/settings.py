@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # 3rd-party apps
     'rest_framework',
     'django_filters',
@@ -47,7 +48,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'RestHits.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # before everything that may query the database
+    'RestHits.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,6 +60,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Query count/time headers and per-view query budgets (see `RestHits.middleware.QueryInstrumentationMiddleware`).
+# Budgets are enforced by the test runner, which turns both on.
+QUERY_INSTRUMENTATION = os.getenv('DJANGO_QUERY_INSTRUMENTATION', str(DEBUG)) == 'True'
+QUERY_BUDGET_ENFORCED = False
+TEST_RUNNER = 'RestHits.test_runner.QueryBudgetTestRunner'
+
 ROOT_URLCONF = 'RestHits.urls'
 
 TEMPLATES = [
@@ -88,6 +98,18 @@ DATABASES = {
         'PORT': os.getenv('POSTGRES_PORT', '5432'),
     }
 }
+
+# Read replicas of `default`, comma separated hosts, e.g. "db-replica-1,db-replica-2".
+# Reads of safe requests go to them (see `RestHits.Utils.db_router`); in tests they mirror `default`
+# and only serve the tests asking for them (see `RestHits.test_runner`).
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica_{number}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{number}')
+DATABASE_ROUTERS = ['RestHits.Utils.db_router.PrimaryReplicaRouter']
+# Seconds a client reads from the primary after a write, so it does not miss its own writes
+# on lagging replicas (see `RestHits.middleware.ReplicaRoutingMiddleware`).
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('POSTGRES_REPLICA_PIN_SECONDS', '5'))
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,20 @@
+# Django imports
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """
+    Test runner enforcing the `query_budget` of views on every request made by the tests
+    (see `RestHits.middleware.QueryInstrumentationMiddleware`).
+
+    Replica aliases (`POSTGRES_REPLICA_HOSTS`) are test mirrors: separate connections that do
+    not see the uncommitted writes of a test. Reads are only routed to them by the tests
+    that ask for it (see `RestHits.Tests.test_db_router.ReplicaStandInTests`).
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.QUERY_INSTRUMENTATION = True
+        settings.QUERY_BUDGET_ENFORCED = True
+        settings.DATABASE_REPLICAS = []